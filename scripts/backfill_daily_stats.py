@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Roll answers logged before the daily_user_stats table existed into it.
+
+One-off job after upgrading; safe to interrupt and rerun (progress is kept in
+scheduler_state). The bot can keep running meanwhile.
+
+Usage:
+    python scripts/backfill_daily_stats.py --chunk 50000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+
+from srsbot.db import backfill_daily_user_stats, init_db
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunk", type=int, default=50000, help="Answers rolled up per transaction")
+    args = parser.parse_args()
+
+    await init_db()
+    n = await backfill_daily_user_stats(chunk=args.chunk)
+    print(f"Rolled up {n} answers into daily_user_stats")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
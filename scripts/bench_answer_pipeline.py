@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""Benchmark the per-answer DB work of the Today flow, before and after.
+
+"before" replays the statements the old `on_ans` handler issued (separate
+reads, JSON seen-set update, progress upsert, answer log, commit, then
+`increment_day_counters` with its own commit). "after" calls
+`srsbot.answer_service.process_answer`. Both run against a throwaway database
+through the same connection pool, with an SQLite trace callback counting
+statements and commits (a trigger firing re-reports its parent statement, so
+consecutive repeats are counted once).
+
+The gain is in commits and connection checkouts (2 -> 1 each), not in
+statement count. At the time of writing both variants issue 7 statements,
+because "after" also records day_seen marks, the daily_user_stats rollup
+and the user_frontier count in the same transaction, work that "before"
+never did. Rerun the script rather than trusting these figures once the
+answer path changes.
+
+Usage:
+    python scripts/bench_answer_pipeline.py --answers 500
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+from datetime import date
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import srsbot.db as dbmod
+from srsbot.answer_service import process_answer
+from srsbot.models import Progress
+from srsbot.srs import on_answer
+
+
+async def _legacy_answer(user_id: int, card_id: int, ans: str, today: date) -> None:
+    async with dbmod.get_db() as db:
+        cur = await db.execute(
+            "SELECT state, COALESCE(box,0), due_at, lapses, learning_good_count FROM progress WHERE user_id=? AND card_id=?",
+            (user_id, card_id),
+        )
+        row = await cur.fetchone()
+        state, box, _, lapses, lgc = row if row else ("learning", 0, None, 0, 0)
+        p = Progress(user_id, card_id, state, int(box), None, int(lapses), int(lgc), None, None)
+        cur2 = await db.execute("SELECT intra_spacing_k FROM user_config WHERE user_id=?", (user_id,))
+        row2 = await cur2.fetchone()
+        res = on_answer(p, ans, today, int(row2[0]) if row2 else 3)  # type: ignore[arg-type]
+        cur3 = await db.execute(
+            "SELECT review_seen_ids_json, new_seen_ids_json FROM user_day_state WHERE user_id=? AND session_date=?",
+            (user_id, today.isoformat()),
+        )
+        st = await cur3.fetchone()
+        review_seen = set(json.loads(st[0] or "[]")) if st else set()
+        new_seen = set(json.loads(st[1] or "[]")) if st else set()
+        if state == "learning" and int(box) == 0 and card_id not in new_seen:
+            new_seen.add(card_id)
+            await db.execute(
+                "UPDATE user_day_state SET served_review_count = served_review_count + ?, shown_new_today = shown_new_today + ?, "
+                "review_seen_ids_json = ?, new_seen_ids_json = ? WHERE user_id=? AND session_date=?",
+                (0, 1, json.dumps(sorted(review_seen)), json.dumps(sorted(new_seen)), user_id, today.isoformat()),
+            )
+        await db.execute(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at, lapses, learning_good_count, last_answer, last_seen_at) "
+            "VALUES(?,?,?,?,?,?,?,?, datetime('now')) ON CONFLICT(user_id, card_id) DO UPDATE SET state=excluded.state, "
+            "box=excluded.box, due_at=excluded.due_at, lapses=excluded.lapses, learning_good_count=excluded.learning_good_count, "
+            "last_answer=excluded.last_answer, last_seen_at=excluded.last_seen_at",
+            (
+                user_id,
+                card_id,
+                res.progress.state,
+                res.progress.box,
+                res.progress.due_at.isoformat() if res.progress.due_at else None,
+                res.progress.lapses,
+                res.progress.learning_good_count,
+                res.progress.last_answer,
+            ),
+        )
+        await db.execute(
+            "INSERT INTO answers(user_id, card_id, answer, is_new, tags) VALUES(?,?,?,?,?)",
+            (user_id, card_id, ans, 1 if state == "learning" and box == 0 else 0, None),
+        )
+        await db.commit()
+    await dbmod.increment_day_counters(user_id, today.isoformat(), good_delta=1)
+
+
+async def _run(
+    label: str,
+    answer_fn: Callable[[int, int, str, date], Awaitable[object]],
+    user_id: int,
+    n: int,
+    today: date,
+    trace: list[str],
+) -> None:
+    await dbmod.ensure_user_config(user_id)
+    await dbmod.init_or_get_day_state(user_id, today.isoformat())
+    checkouts_before = dbmod.pool_stats().checkouts  # type: ignore[union-attr]
+    trace.clear()
+    latencies: list[float] = []
+    for i in range(n):
+        t0 = time.perf_counter()
+        await answer_fn(user_id, i + 1, "good", today)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    commits = trace.count("COMMIT")
+    executed = [s for i, s in enumerate(trace) if i == 0 or s != trace[i - 1]]
+    statements = sum(1 for s in executed if s.strip().upper() not in {"BEGIN", "COMMIT"})
+    checkouts = dbmod.pool_stats().checkouts - checkouts_before  # type: ignore[union-attr]
+    q = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:>6}: {statements / n:.1f} statements, {commits / n:.1f} commits, "
+        f"{checkouts / n:.1f} connection checkouts per answer; "
+        f"p50 {q[49]:.2f} ms, p99 {q[98]:.2f} ms"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--answers", type=int, default=500, help="Answers per variant")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dbmod.DB_PATH = Path(tmp) / "bench.db"  # type: ignore[misc]
+        await dbmod.init_db()
+        pool = await dbmod.open_pool()
+        trace: list[str] = []
+        for conn in pool.connections:
+            await conn.set_trace_callback(trace.append)
+        today = date.today()
+        try:
+            await _run("before", _legacy_answer, 1, args.answers, today, trace)
+            await _run("after", process_answer, 2, args.answers, today, trace)
+        finally:
+            await dbmod.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
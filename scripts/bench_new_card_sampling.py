@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""Benchmark picking 8 new cards as the catalog grows.
+
+Compares the old path (materialize every unseen card via an anti-join, then
+`select_new_cards`) with `srsbot.queue.sample_new_cards` on catalogs of
+774, 10k and 100k cards.
+
+Usage:
+    python scripts/bench_new_card_sampling.py --repeat 50
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Awaitable, Callable
+
+import srsbot.db as dbmod
+from srsbot.catalog import get_catalog, reset_catalog
+from srsbot.content import NewCard, select_new_cards
+from srsbot.queue import sample_new_cards
+
+SIZES = (774, 10_000, 100_000)
+PACKS = ("daily", "work", "travel", "social")
+
+
+async def _legacy_pick(user_id: int, pack_tags: list[str], limit: int) -> list[NewCard]:
+    async with dbmod.get_read_db() as db:
+        cur = await db.execute(
+            "SELECT c.id, c.phrasal, c.sense_uid, c.tags FROM cards c "
+            "LEFT JOIN progress p ON p.card_id=c.id AND p.user_id=? WHERE p.card_id IS NULL",
+            (user_id,),
+        )
+        rows = await cur.fetchall()
+    candidates = [
+        NewCard(int(r[0]), str(r[1]), str(r[2]), [t for t in str(r[3] or "").split(",") if t])
+        for r in rows
+    ]
+    return select_new_cards(candidates, pack_tags, limit)
+
+
+async def _seed(n: int) -> None:
+    async with dbmod.get_db() as db:
+        rows = [
+            (i, f"verb {i // 2}", "meaning", "[]", PACKS[i % len(PACKS)], f"sense_{i}")
+            for i in range(1, n + 1)
+        ]
+        await db.executemany(
+            "INSERT INTO cards(id, phrasal, meaning_en, examples_json, tags, sense_uid) VALUES(?,?,?,?,?,?)",
+            rows,
+        )
+        await db.commit()
+
+
+async def _time(fn: Callable[[], Awaitable[object]], repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        await fn()
+    return (time.perf_counter() - t0) * 1000 / repeat
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    for n in SIZES:
+        with tempfile.TemporaryDirectory() as tmp:
+            dbmod.DB_PATH = Path(tmp) / "bench.db"  # type: ignore[misc]
+            await dbmod.init_db()
+            await _seed(n)
+            reset_catalog()
+            await get_catalog()
+            legacy = await _time(lambda: _legacy_pick(1, ["work"], 8), args.repeat)
+            sampled = await _time(lambda: sample_new_cards(1, ["work"], 8), args.repeat)
+            print(f"{n:>7} cards: full anti-join {legacy:8.2f} ms, sampled {sampled:6.2f} ms per pick")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""Benchmark the push counts for a minute where every user is due.
+
+Seeds N users who all keep the default 09:00 push time, each with some review
+and learning progress, then compares the old per-user path (one connection and
+three queries per user, including the anti-join over cards) with
+`srsbot.scheduler.compute_counts_batch`, which serves the whole bucket in one
+grouped query.
+
+Usage:
+    python scripts/bench_push_counts.py --users 10000
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import srsbot.db as dbmod
+from srsbot.catalog import get_catalog, reset_catalog
+from srsbot.frontier import reset_frontiers
+from srsbot.scheduler import compute_counts_batch, due_user_ids
+
+CARDS = 774
+PROGRESS_PER_USER = 40
+
+
+async def _legacy_counts(user_id: int) -> tuple[int, int]:
+    async with dbmod.get_read_db() as db:
+        cur = await db.execute(
+            "SELECT review_limit_per_day, daily_new_target FROM user_config WHERE user_id=?",
+            (user_id,),
+        )
+        row = await cur.fetchone()
+        review_limit = int(row[0]) if row else 35
+        new_target = int(row[1]) if row else 8
+        cur = await db.execute(
+            "SELECT COUNT(*) FROM progress WHERE user_id=? AND state='review' AND due_at<=date('now')",
+            (user_id,),
+        )
+        row = await cur.fetchone()
+        reviews_due = min(int(row[0] or 0), review_limit)
+        cur = await db.execute(
+            "SELECT COUNT(*) FROM cards c LEFT JOIN progress p ON p.card_id=c.id AND p.user_id=? WHERE p.card_id IS NULL",
+            (user_id,),
+        )
+        row = await cur.fetchone()
+        new_avail = min(int(row[0] or 0), new_target)
+    return reviews_due, new_avail
+
+
+async def _seed(users: int) -> None:
+    rnd = random.Random(7)
+    today = date.today()
+    async with dbmod.get_db() as db:
+        await db.executemany(
+            "INSERT INTO cards(id, phrasal, meaning_en, examples_json, tags, sense_uid) VALUES(?,?,?,?,?,?)",
+            [(i, f"verb {i}", "m", "[]", "daily", f"s{i}") for i in range(1, CARDS + 1)],
+        )
+        await db.executemany(
+            "INSERT INTO user_config(user_id, tz, push_minute_utc) VALUES (?, 'UTC', 540)",
+            [(u,) for u in range(1, users + 1)],
+        )
+        await db.executemany("INSERT INTO user_state(user_id) VALUES (?)", [(u,) for u in range(1, users + 1)])
+        rows = []
+        for u in range(1, users + 1):
+            for cid in rnd.sample(range(1, CARDS + 1), PROGRESS_PER_USER):
+                due = today + timedelta(days=rnd.randint(-5, 20))
+                rows.append((u, cid, rnd.choice(("learning", "review")), due.isoformat()))
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES(?,?,?,1,?)", rows
+        )
+        await db.commit()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dbmod.DB_PATH = Path(tmp) / "bench.db"  # type: ignore[misc]
+        await dbmod.init_db()
+        await _seed(args.users)
+        reset_catalog()
+        reset_frontiers()
+        await get_catalog()
+        await dbmod.open_pool()
+        try:
+            nine = datetime.now(timezone.utc).replace(hour=9, minute=0, second=0, microsecond=0)
+            due = await due_user_ids(nine)
+            print(f"{len(due)} users due at 09:00")
+
+            t0 = time.perf_counter()
+            legacy = {u: await _legacy_counts(u) for u in due}
+            t_legacy = time.perf_counter() - t0
+
+            # First batch persists missing unseen counts (once per catalog version)
+            t0 = time.perf_counter()
+            await compute_counts_batch(due)
+            t_cold = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            batch = await compute_counts_batch(due)
+            t_warm = time.perf_counter() - t0
+
+            assert batch == legacy
+            print(f"per-user queries: {t_legacy * 1000:8.0f} ms ({3 * len(due)} queries)")
+            print(f"batch, cold:      {t_cold * 1000:8.0f} ms (2 queries + frontier upsert)")
+            print(f"batch, warm:      {t_warm * 1000:8.0f} ms (1 query)")
+        finally:
+            await dbmod.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark memory held per idle Today session, before and after.
+
+"before" keeps the old `SessionData` dataclass (list queue, set of shown ids)
+in a plain dict. "after" fills `srsbot.session.SessionStore` with the same
+sessions: per-session cost of the compact `array('i')`/`__slots__` layout
+while resident, and what stays in memory once idle sessions are evicted to
+their snapshots. Sizes are measured with tracemalloc.
+
+Usage:
+    python scripts/bench_session_memory.py --users 20000 --queue 12 --shown 25
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import random
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from datetime import date
+from pathlib import Path
+from typing import Callable, List, Set
+
+import srsbot.db as dbmod
+from srsbot.session import SessionStore
+
+
+@dataclass
+class _LegacySessionData:
+    queue: List[int] = field(default_factory=list)
+    shown: int = 0
+    good: int = 0
+    consecutive_good: int = 0
+    shown_card_ids: Set[int] = field(default_factory=set)
+
+
+def _measure(build: Callable[[], object]) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, after - before
+
+
+def _fake_session(rng: random.Random, queue: int, shown: int) -> tuple[list[int], list[int]]:
+    return rng.sample(range(1, 5000), queue), rng.sample(range(1, 5000), shown)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20000)
+    parser.add_argument("--queue", type=int, default=12, help="Cards left in each queue")
+    parser.add_argument("--shown", type=int, default=25, help="Cards shown in each session")
+    args = parser.parse_args()
+    rng = random.Random(1)
+    sessions = [_fake_session(rng, args.queue, args.shown) for _ in range(args.users)]
+
+    def build_legacy() -> dict[int, _LegacySessionData]:
+        data: dict[int, _LegacySessionData] = {}
+        for uid, (queue, shown) in enumerate(sessions):
+            data[uid] = _LegacySessionData(queue=list(queue), shown=len(shown), shown_card_ids=set(shown))
+        return data
+
+    _, legacy_bytes = _measure(build_legacy)
+    print(f"before: {legacy_bytes / args.users:.0f} bytes per session, never evicted")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dbmod.DB_PATH = Path(tmp) / "bench.db"  # type: ignore[misc]
+        await dbmod.init_db()
+        await dbmod.open_pool()
+        now = [0.0]
+        store = SessionStore(
+            max_users=args.users, idle_ttl=60, flush_delay=3600, clock=lambda: now[0], today=date.today
+        )
+        try:
+
+            async def fill() -> None:
+                for uid, (queue, shown) in enumerate(sessions):
+                    s = await store.get(uid)
+                    s.queue = queue
+                    for cid in shown:
+                        s.mark_shown(cid)
+                    s.shown = len(shown)
+
+            tracemalloc.start()
+            base = tracemalloc.get_traced_memory()[0]
+            await fill()
+            gc.collect()
+            resident = tracemalloc.get_traced_memory()[0] - base
+            print(f" after: {resident / args.users:.0f} bytes per resident session (incl. pending snapshot state)")
+
+            t0 = time.perf_counter()
+            written = await store.flush()
+            flush_ms = (time.perf_counter() - t0) * 1000
+            gc.collect()
+            flushed = tracemalloc.get_traced_memory()[0] - base
+            print(f"        {flushed / args.users:.0f} bytes per resident session after snapshot ({written} rows, {flush_ms:.0f} ms)")
+
+            now[0] += 61
+            await store.get(-1)  # any access evicts the idle sessions
+            await store.flush()
+            gc.collect()
+            idle = tracemalloc.get_traced_memory()[0] - base
+            tracemalloc.stop()
+            print(f"        {max(idle, 0) / args.users:.0f} bytes per idle session after eviction ({len(store)} resident)")
+
+            t0 = time.perf_counter()
+            for uid in range(min(1000, args.users)):
+                await store.get(uid)
+            restore_ms = (time.perf_counter() - t0) * 1000 / min(1000, args.users)
+            print(f"        restore from snapshot: {restore_ms:.3f} ms per session")
+            await store.close()
+        finally:
+            store.reset()
+            await dbmod.close_pool()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
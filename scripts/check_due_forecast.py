@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Compare due_forecast with counts rebuilt from progress.
+
+Prints every (user, day) whose stored count differs; exits non-zero when
+there is drift. --repair rewrites the drifted rows.
+
+Usage:
+    python scripts/check_due_forecast.py [--repair] [--user 123 ...]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+
+from srsbot.db import init_db
+from srsbot.forecast import check_due_forecast
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repair", action="store_true", help="Overwrite drifted rows")
+    parser.add_argument("--user", type=int, action="append", help="Only check these users")
+    args = parser.parse_args()
+
+    await init_db()
+    drift = await check_due_forecast(args.user, repair=args.repair)
+    for d in drift:
+        print(f"user {d.user_id} {d.day}: stored {d.stored}, progress {d.actual}")
+    print(f"{len(drift)} drifted rows" + (" repaired" if args.repair and drift else ""))
+    return 1 if drift and not args.repair else 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Run answers compaction now and print what it reclaimed.
+
+The bot also runs it once per UTC day; this is for a first run after
+upgrading or for trying another retention.
+
+Usage:
+    python scripts/compact_answers.py --days 90 --archive-dir data/archive
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from srsbot.compaction import compact_answers
+from srsbot.config import ANSWERS_ARCHIVE_DIR, ANSWERS_COMPACT_CHUNK, ANSWERS_RETENTION_DAYS
+from srsbot.db import init_db
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", type=int, default=ANSWERS_RETENTION_DAYS, help="Raw answers kept (days)")
+    parser.add_argument("--chunk", type=int, default=ANSWERS_COMPACT_CHUNK, help="Rows per transaction")
+    parser.add_argument("--archive-dir", type=Path, default=ANSWERS_ARCHIVE_DIR, help="Write gzipped CSV here")
+    args = parser.parse_args()
+
+    await init_db()
+    r = await compact_answers(retention_days=args.days, chunk=args.chunk, archive_dir=args.archive_dir)
+    print(
+        f"Deleted {r.rows_deleted} answers in {r.chunks} chunks into {r.aggregates_written} daily card rows; "
+        f"{r.bytes_freed} bytes freed in the database"
+    )
+    if r.archive_path is not None:
+        print(f"Archived {r.archive_bytes} bytes to {r.archive_path}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
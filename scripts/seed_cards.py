@@ -16,7 +16,8 @@ import json
 from pathlib import Path
 from typing import Any, Iterable
 
-from srsbot.db import get_db, init_db
+from srsbot.content import split_tags
+from srsbot.db import get_db, init_db, set_card_tags
 
 
 async def main() -> None:
@@ -45,6 +46,11 @@ async def main() -> None:
                     1 if c.get("intransitive") else 0,
                 ),
             )
+            # Index tags of the stored row (an ignored duplicate keeps its original tags)
+            cur = await db.execute("SELECT id, tags FROM cards WHERE sense_uid=?", (c["sense_uid"],))
+            row = await cur.fetchone()
+            if row:
+                await set_card_tags(db, int(row[0]), split_tags(row[1]))
         await db.commit()
     print(f"Imported {len(cards)} cards into the database.")
 
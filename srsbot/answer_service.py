@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+"""Answer processing for the Today flow (ans:good / ans:again).
+
+Current progress and per-day state are loaded in one query (intra-round
+spacing comes from the cached user config), and all writes (first-serve
+marks in `day_seen`, per-day counters, progress upsert, answers log and the
+`daily_user_stats` rollup) go out in a single transaction with one commit.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+
+from srsbot.db import get_db
+from srsbot.frontier import note_first_seen
+from srsbot.models import Answer, Progress
+from srsbot.srs import AnswerResult, on_answer
+from srsbot.user_config import get_user_config
+
+
+_LOAD_SQL = """
+SELECT p.state, p.box, p.lapses, p.learning_good_count,
+       d.user_id AS day_user_id,
+       d.served_review_count, d.shown_new_today, d.good_today, d.again_today
+FROM (SELECT ? AS user_id, ? AS card_id, ? AS session_date) q
+LEFT JOIN progress p ON p.user_id=q.user_id AND p.card_id=q.card_id
+LEFT JOIN user_day_state d ON d.user_id=q.user_id AND d.session_date=q.session_date
+"""
+
+
+@dataclass(frozen=True)
+class DayCounters:
+    served_review_count: int
+    shown_new_today: int
+    good_today: int
+    again_today: int
+
+
+@dataclass
+class AnswerOutcome:
+    result: AnswerResult
+    was_new: bool  # first-ever answer for this card (learning, box 0)
+    counters: DayCounters | None  # None when there is no day state row
+
+
+async def process_answer(user_id: int, card_id: int, answer: Answer, today: date) -> AnswerOutcome:
+    """Apply an answer: one read round trip, SRS update, one write transaction."""
+    session_date = today.isoformat()
+    k = (await get_user_config(user_id)).intra_spacing_k
+    async with get_db() as db:
+        cur = await db.execute(_LOAD_SQL, (user_id, card_id, session_date))
+        row = await cur.fetchone()
+        assert row is not None
+        first_progress = row["state"] is None
+        state = str(row["state"]) if row["state"] is not None else "learning"
+        box = int(row["box"] or 0)
+        p = Progress(
+            user_id=user_id,
+            card_id=card_id,
+            state=state,  # type: ignore[arg-type]
+            box=box,
+            due_at=None,
+            lapses=int(row["lapses"] or 0),
+            learning_good_count=int(row["learning_good_count"] or 0),
+            last_answer=None,
+            last_seen_at=None,
+        )
+        was_new = state == "learning" and box == 0
+
+        res = on_answer(p, answer, today, k)
+
+        counters: DayCounters | None = None
+        if row["day_user_id"] is not None:
+            # Count the first serve of a review/new card today: the primary
+            # key makes the insert a no-op for a card already seen
+            add_review = 0
+            add_new = 0
+            if state == "review":
+                cur = await db.execute(
+                    "INSERT OR IGNORE INTO day_seen(user_id, session_date, kind, card_id) VALUES(?,?,'review',?)",
+                    (user_id, session_date, card_id),
+                )
+                add_review = cur.rowcount
+            if was_new:
+                cur = await db.execute(
+                    "INSERT OR IGNORE INTO day_seen(user_id, session_date, kind, card_id) VALUES(?,?,'new',?)",
+                    (user_id, session_date, card_id),
+                )
+                add_new = cur.rowcount
+            good_delta = 1 if answer == "good" else 0
+            again_delta = 1 - good_delta
+            await db.execute(
+                """
+                UPDATE user_day_state
+                SET served_review_count = served_review_count + ?,
+                    shown_new_today = shown_new_today + ?,
+                    good_today = good_today + ?,
+                    again_today = again_today + ?
+                WHERE user_id=? AND session_date=?
+                """,
+                (add_review, add_new, good_delta, again_delta, user_id, session_date),
+            )
+            counters = DayCounters(
+                served_review_count=int(row["served_review_count"]) + add_review,
+                shown_new_today=int(row["shown_new_today"]) + add_new,
+                good_today=int(row["good_today"]) + good_delta,
+                again_today=int(row["again_today"]) + again_delta,
+            )
+
+        await db.execute(
+            """
+            INSERT INTO progress(user_id, card_id, state, box, due_at, lapses, learning_good_count, last_answer, last_seen_at)
+            VALUES(?,?,?,?,?,?,?, ?, datetime('now'))
+            ON CONFLICT(user_id, card_id) DO UPDATE SET
+                state=excluded.state,
+                box=excluded.box,
+                due_at=excluded.due_at,
+                lapses=excluded.lapses,
+                learning_good_count=excluded.learning_good_count,
+                last_answer=excluded.last_answer,
+                last_seen_at=excluded.last_seen_at
+            """,
+            (
+                user_id,
+                card_id,
+                res.progress.state,
+                res.progress.box,
+                res.progress.due_at.isoformat() if res.progress.due_at else None,
+                res.progress.lapses,
+                res.progress.learning_good_count,
+                res.progress.last_answer,
+            ),
+        )
+        await db.execute(
+            "INSERT INTO answers(user_id, card_id, answer, is_new, tags) VALUES(?,?,?,?,?)",
+            (user_id, card_id, answer, 1 if was_new else 0, None),
+        )
+        # Same UTC day as the answer's ts default
+        await db.execute(
+            """
+            INSERT INTO daily_user_stats(user_id, day, shown, good, again, new_count)
+            VALUES(?, date('now'), 1, ?, ?, ?)
+            ON CONFLICT(user_id, day) DO UPDATE SET
+                shown=shown+1, good=good+excluded.good,
+                again=again+excluded.again, new_count=new_count+excluded.new_count
+            """,
+            (user_id, 1 if answer == "good" else 0, 1 if answer == "again" else 0, 1 if was_new else 0),
+        )
+        if first_progress:
+            await db.execute(
+                "UPDATE user_frontier SET unseen_count = MAX(unseen_count - 1, 0) WHERE user_id=?",
+                (user_id,),
+            )
+        await db.commit()
+    if first_progress:
+        note_first_seen(user_id, card_id)
+    return AnswerOutcome(result=res, was_new=was_new, counters=counters)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+"""Process-wide, immutable in-memory card catalog.
+
+The `cards` table is read-only while the bot runs, so it is loaded once into
+compact records with examples and tags already parsed. `scripts/seed_cards.py`
+changes bump `catalog_version` (via triggers), and `refresh_catalog` reloads
+the snapshot only when that stamp moved. Every bot process polls the stamp
+with `run_catalog_refresh_loop`, leader or not.
+"""
+
+import asyncio
+import json
+import logging
+from types import MappingProxyType
+from typing import Iterable, Mapping, Sequence
+
+from srsbot.config import CATALOG_REFRESH_SECONDS
+from srsbot.content import split_tags
+from srsbot.db import get_read_db
+
+
+logger = logging.getLogger(__name__)
+
+
+class CardRecord:
+    __slots__ = (
+        "id",
+        "phrasal",
+        "meaning_en",
+        "examples",
+        "tags",
+        "sense_uid",
+        "separable",
+        "intransitive",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        phrasal: str,
+        meaning_en: str,
+        examples: tuple[str, ...],
+        tags: tuple[str, ...],
+        sense_uid: str,
+        separable: bool,
+        intransitive: bool,
+    ) -> None:
+        self.id = id
+        self.phrasal = phrasal
+        self.meaning_en = meaning_en
+        self.examples = examples
+        self.tags = tags
+        self.sense_uid = sense_uid
+        self.separable = separable
+        self.intransitive = intransitive
+
+    def __repr__(self) -> str:  # pragma: no cover - debugging aid
+        return f"CardRecord(id={self.id}, phrasal={self.phrasal!r}, sense_uid={self.sense_uid!r})"
+
+
+def parse_examples(examples_json: str | None) -> tuple[str, ...]:
+    try:
+        loaded = json.loads(examples_json or "[]")
+    except Exception:
+        return ()
+    return tuple(str(x) for x in loaded) if isinstance(loaded, list) else ()
+
+
+class CardCatalog:
+    def __init__(
+        self,
+        records: Iterable[CardRecord],
+        version: int,
+        pack_counts: Mapping[str, int],
+        pack_ids: Mapping[str, Sequence[int]] | None = None,
+    ) -> None:
+        self.version = version
+        self._by_id: dict[int, CardRecord] = {r.id: r for r in records}
+        self.meanings: tuple[str, ...] = tuple(r.meaning_en for r in self._by_id.values())
+        # Unique phrasals per pack tag
+        self.pack_counts: Mapping[str, int] = MappingProxyType(dict(pack_counts))
+        self.total_phrasals = len({r.phrasal for r in self._by_id.values()})
+        self.min_id = min(self._by_id, default=0)
+        self.max_id = max(self._by_id, default=0)
+        self._all_ids = tuple(sorted(self._by_id))
+        self._pack_ids: dict[tuple[str, ...], tuple[int, ...]] = {
+            (t,): tuple(ids) for t, ids in (pack_ids or {}).items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, card_id: object) -> bool:
+        return card_id in self._by_id
+
+    def get(self, card_id: int) -> CardRecord | None:
+        return self._by_id.get(card_id)
+
+    def ids_for_packs(self, tags: Sequence[str]) -> tuple[int, ...]:
+        """Sorted card ids in any of the (normalized) pack tags; all ids when empty."""
+        if not tags:
+            return self._all_ids
+        key = tuple(sorted(set(tags)))
+        ids = self._pack_ids.get(key)
+        if ids is None:
+            union: set[int] = set()
+            for t in key:
+                union.update(self._pack_ids.get((t,), ()))
+            ids = self._pack_ids[key] = tuple(sorted(union))
+        return ids
+
+
+_catalog: CardCatalog | None = None
+
+# Card ids per pack, read in index order (ix_card_tags_tag_card)
+PACK_IDS_SQL = "SELECT tag, card_id FROM card_tags ORDER BY tag, card_id"
+
+
+async def _read_version() -> int:
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT version FROM catalog_version WHERE id=1")
+        row = await cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+async def load_catalog() -> CardCatalog:
+    """Build a fresh catalog snapshot from the `cards` table."""
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT version FROM catalog_version WHERE id=1")
+        vrow = await cur.fetchone()
+        cur = await db.execute(
+            "SELECT id, phrasal, meaning_en, examples_json, tags, sense_uid, separable, intransitive FROM cards"
+        )
+        rows = await cur.fetchall()
+        cur = await db.execute(
+            "SELECT t.tag, COUNT(DISTINCT c.phrasal) FROM card_tags t "
+            "JOIN cards c ON c.id=t.card_id GROUP BY t.tag"
+        )
+        pack_counts = {str(r[0]): int(r[1]) for r in await cur.fetchall()}
+        cur = await db.execute(PACK_IDS_SQL)
+        pack_ids: dict[str, list[int]] = {}
+        for r in await cur.fetchall():
+            pack_ids.setdefault(str(r[0]), []).append(int(r[1]))
+    records = [
+        CardRecord(
+            id=int(r[0]),
+            phrasal=str(r[1]),
+            meaning_en=str(r[2]),
+            examples=parse_examples(r[3]),
+            tags=split_tags(r[4]),
+            sense_uid=str(r[5]),
+            separable=bool(r[6]),
+            intransitive=bool(r[7]),
+        )
+        for r in rows
+    ]
+    return CardCatalog(records, int(vrow[0]) if vrow else 0, pack_counts, pack_ids)
+
+
+async def refresh_catalog() -> bool:
+    """Reload the process-wide catalog if the version stamp changed; return True if reloaded."""
+    global _catalog
+    if _catalog is not None and _catalog.version == await _read_version():
+        return False
+    _catalog = await load_catalog()
+    return True
+
+
+async def get_catalog() -> CardCatalog:
+    """Return the process-wide catalog, loading it on first use."""
+    if _catalog is None:
+        await refresh_catalog()
+    assert _catalog is not None
+    return _catalog
+
+
+async def run_catalog_refresh_loop(interval: float = CATALOG_REFRESH_SECONDS) -> None:
+    """Pick up re-seeded cards (see refresh_catalog) every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await refresh_catalog():
+                logger.info("card catalog reloaded (version %s)", (await get_catalog()).version)
+        except Exception:
+            logger.exception("catalog refresh failed")
+
+
+def reset_catalog() -> None:
+    """Drop the in-memory catalog (tests, or after switching databases)."""
+    global _catalog
+    _catalog = None
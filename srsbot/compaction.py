@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+"""Retention for the `answers` log.
+
+Raw answers older than ANSWERS_RETENTION_DAYS are rolled into per-user,
+per-day, per-card counts in `answer_daily_card` and deleted. Work goes in
+rowid chunks (answers are appended in time order), one short write
+transaction each, yielding to other writers in between. With an archive
+directory set, each chunk's raw rows are appended to a gzipped CSV before
+they are deleted; a crash between the two can only duplicate archived rows,
+never lose them.
+
+Stats come from `daily_user_stats`, which is backfilled first so compaction
+never removes answers the rollup has not counted.
+"""
+
+import asyncio
+import csv
+import gzip
+import io
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+from typing import Optional
+
+from srsbot.config import ANSWERS_ARCHIVE_DIR, ANSWERS_COMPACT_CHUNK, ANSWERS_RETENTION_DAYS
+from srsbot.db import backfill_daily_user_stats, get_db, get_read_db, get_scheduler_state, set_scheduler_state
+
+
+logger = logging.getLogger(__name__)
+
+# scheduler_state key: UTC date compaction last completed
+COMPACTION_KEY = "answers_compacted_date"
+
+
+@dataclass
+class CompactionReport:
+    rows_deleted: int = 0
+    aggregates_written: int = 0
+    chunks: int = 0
+    bytes_freed: int = 0  # database pages released to the freelist
+    archive_bytes: int = 0
+    archive_path: Optional[Path] = None
+
+
+async def _free_bytes() -> int:
+    async with get_read_db() as db:
+        cur = await db.execute("PRAGMA freelist_count")
+        free = int((await cur.fetchone())[0])
+        cur = await db.execute("PRAGMA page_size")
+        return free * int((await cur.fetchone())[0])
+
+
+def _archive(path: Path, rows: list[tuple]) -> int:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    data = gzip.compress(buf.getvalue().encode("utf-8"))
+    # Concatenated gzip members read back as one stream
+    with path.open("ab") as f:
+        f.write(data)
+    return len(data)
+
+
+async def compact_answers(
+    today: Optional[date] = None,
+    retention_days: int = ANSWERS_RETENTION_DAYS,
+    chunk: int = ANSWERS_COMPACT_CHUNK,
+    archive_dir: Optional[Path] = ANSWERS_ARCHIVE_DIR,
+) -> CompactionReport:
+    """Roll up and delete answers from before `today - retention_days`."""
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = (today - timedelta(days=retention_days)).isoformat()
+    report = CompactionReport()
+    await backfill_daily_user_stats()
+    free_before = await _free_bytes()
+    if archive_dir is not None:
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        report.archive_path = archive_dir / f"answers-before-{cutoff}.csv.gz"
+
+    while True:
+        # Oldest remaining row; answers are appended with ts=now, so once it
+        # is inside the retention window every later row is too
+        async with get_read_db() as db:
+            cur = await db.execute("SELECT rowid, ts FROM answers ORDER BY rowid LIMIT 1")
+            row = await cur.fetchone()
+        if row is None or str(row[1]) >= cutoff:
+            break
+        lo = int(row[0])
+        hi = lo + chunk - 1
+        if report.archive_path is not None:
+            async with get_read_db() as db:
+                cur = await db.execute(
+                    "SELECT rowid, user_id, card_id, answer, ts, is_new, tags FROM answers "
+                    "WHERE rowid BETWEEN ? AND ? AND ts<?",
+                    (lo, hi, cutoff),
+                )
+                rows = [tuple(r) for r in await cur.fetchall()]
+            report.archive_bytes += await asyncio.to_thread(_archive, report.archive_path, rows)
+        async with get_db() as db:
+            before = db.total_changes
+            await db.execute(
+                """
+                INSERT INTO answer_daily_card(user_id, day, card_id, good, again, new_count)
+                SELECT user_id, date(ts), card_id, SUM(answer='good'), SUM(answer='again'), SUM(is_new)
+                FROM answers WHERE rowid BETWEEN ? AND ? AND ts<?
+                GROUP BY user_id, date(ts), card_id
+                ON CONFLICT(user_id, day, card_id) DO UPDATE SET
+                    good=good+excluded.good, again=again+excluded.again,
+                    new_count=new_count+excluded.new_count
+                """,
+                (lo, hi, cutoff),
+            )
+            report.aggregates_written += db.total_changes - before
+            cur = await db.execute("DELETE FROM answers WHERE rowid BETWEEN ? AND ? AND ts<?", (lo, hi, cutoff))
+            report.rows_deleted += cur.rowcount
+            await db.commit()
+        report.chunks += 1
+        await asyncio.sleep(0)  # let queued answer writes through
+
+    report.bytes_freed = max(0, await _free_bytes() - free_before)
+    return report
+
+
+async def run_compaction_daily(today: date) -> Optional[CompactionReport]:
+    """Compact once per UTC day (tracked in scheduler_state)."""
+    if await get_scheduler_state(COMPACTION_KEY) == today.isoformat():
+        return None
+    report = await compact_answers(today)
+    await set_scheduler_state(COMPACTION_KEY, today.isoformat())
+    logger.info(
+        "answers compaction: %d rows deleted in %d chunks, %d aggregates, %d bytes freed, %d bytes archived",
+        report.rows_deleted,
+        report.chunks,
+        report.aggregates_written,
+        report.bytes_freed,
+        report.archive_bytes,
+    )
+    return report
+
+
+async def run_compaction_loop(interval: float = 3600) -> None:
+    """Check hourly; compaction itself runs once per UTC day."""
+    while True:
+        try:
+            await run_compaction_daily(datetime.now(timezone.utc).date())
+        except Exception:
+            logger.exception("answers compaction failed")
+        await asyncio.sleep(interval)
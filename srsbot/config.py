@@ -2,9 +2,10 @@ from __future__ import annotations
 
 import os
 from dataclasses import dataclass
-from datetime import date, datetime, time
+from datetime import date, datetime, time, timezone, tzinfo
 from pathlib import Path
 from typing import Final
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 from dotenv import load_dotenv
 
@@ -15,11 +16,54 @@ ROOT_DIR: Final[Path] = Path(__file__).resolve().parents[1]
 DATA_DIR: Final[Path] = Path(os.getenv("DATA_DIR", str(ROOT_DIR / "data")))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 DB_PATH: Final[Path] = DATA_DIR / "bot.db"
+# Reader connections kept open next to the single writer connection
+DB_POOL_READERS: Final[int] = int(os.getenv("DB_POOL_READERS", "4"))
 
 BOT_TOKEN: Final[str] = os.getenv("BOT_TOKEN", "")
 DEFAULT_PUSH_TIME: Final[str] = os.getenv("PUSH_TIME", "09:00")
 DEFAULT_TZ: Final[str] = os.getenv("TZ", "Asia/Yerevan")
 
+# Push delivery: Telegram allows roughly 30 bulk messages per second per bot
+PUSH_RATE_PER_SEC: Final[float] = float(os.getenv("PUSH_RATE_PER_SEC", "25"))
+PUSH_CONCURRENCY: Final[int] = int(os.getenv("PUSH_CONCURRENCY", "8"))
+PUSH_MAX_ATTEMPTS: Final[int] = int(os.getenv("PUSH_MAX_ATTEMPTS", "3"))
+# Oldest missed minute bucket the scheduler still processes after a stall/restart
+SCHEDULER_MAX_CATCHUP_MINUTES: Final[int] = int(os.getenv("SCHEDULER_MAX_CATCHUP_MINUTES", "180"))
+# Lease that lets only one bot process run the scheduler and push drainer
+SCHEDULER_LEASE_TTL_SECONDS: Final[float] = float(os.getenv("SCHEDULER_LEASE_TTL_SECONDS", "30"))
+# Seconds between catalog version checks, run in every bot process
+CATALOG_REFRESH_SECONDS: Final[float] = float(os.getenv("CATALOG_REFRESH_SECONDS", "60"))
+# user_ui_state write-through cache: max cached users, write coalescing window
+UI_STATE_CACHE_SIZE: Final[int] = int(os.getenv("UI_STATE_CACHE_SIZE", "10000"))
+UI_STATE_FLUSH_SECONDS: Final[float] = float(os.getenv("UI_STATE_FLUSH_SECONDS", "0.25"))
+# Per-user config cache: max cached users, seconds before re-reading (other processes)
+USER_CONFIG_CACHE_SIZE: Final[int] = int(os.getenv("USER_CONFIG_CACHE_SIZE", "10000"))
+USER_CONFIG_TTL_SECONDS: Final[float] = float(os.getenv("USER_CONFIG_TTL_SECONDS", "300"))
+# Today sessions: max users in memory, idle seconds before eviction to a snapshot,
+# snapshot write coalescing window
+SESSION_CACHE_SIZE: Final[int] = int(os.getenv("SESSION_CACHE_SIZE", "10000"))
+SESSION_IDLE_TTL_SECONDS: Final[float] = float(os.getenv("SESSION_IDLE_TTL_SECONDS", "1800"))
+SESSION_SNAPSHOT_SECONDS: Final[float] = float(os.getenv("SESSION_SNAPSHOT_SECONDS", "5"))
+# New-card frontier: max users whose seen-bitmaps stay in memory, unseen
+# candidates handed to select_new_cards per sampling window
+FRONTIER_CACHE_SIZE: Final[int] = int(os.getenv("FRONTIER_CACHE_SIZE", "10000"))
+NEW_SAMPLE_WINDOW: Final[int] = int(os.getenv("NEW_SAMPLE_WINDOW", "32"))
+# Days of day_seen first-serve marks kept before the daily prune (today included)
+DAY_SEEN_RETENTION_DAYS: Final[int] = int(os.getenv("DAY_SEEN_RETENTION_DAYS", "2"))
+# answers log retention: older rows are rolled into answer_daily_card and deleted
+# in chunks; set ANSWERS_ARCHIVE_DIR to keep the raw rows as gzipped CSV
+ANSWERS_RETENTION_DAYS: Final[int] = int(os.getenv("ANSWERS_RETENTION_DAYS", "90"))
+ANSWERS_COMPACT_CHUNK: Final[int] = int(os.getenv("ANSWERS_COMPACT_CHUNK", "5000"))
+ANSWERS_ARCHIVE_DIR: Final[Path | None] = (
+    Path(os.environ["ANSWERS_ARCHIVE_DIR"]) if os.getenv("ANSWERS_ARCHIVE_DIR") else None
+)
+# push_outbox drain: rows per batch, delivery attempts per row, first retry delay
+OUTBOX_BATCH_SIZE: Final[int] = int(os.getenv("OUTBOX_BATCH_SIZE", "200"))
+OUTBOX_MAX_ATTEMPTS: Final[int] = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_BACKOFF_SECONDS: Final[float] = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "30"))
+# Days of sent/failed push_outbox rows kept before the daily prune
+OUTBOX_RETENTION_DAYS: Final[int] = int(os.getenv("OUTBOX_RETENTION_DAYS", "7"))
+
 # Explain feature configuration
 EXPLAIN_API_BASE: Final[str] = os.getenv("EXPLAIN_API_BASE", "")
 EXPLAIN_API_KEY: Final[str] | None = os.getenv("EXPLAIN_API_KEY") or "no-key"
@@ -38,6 +82,10 @@ BOX_INTERVALS: Final[dict[int, int]] = {
 }
 
 JITTER_PCT: Final[float] = 0.15
+# Overdue backlog rebalancing: longest spread in days, and days without answers
+# after which the first /today rebalances before building the round
+REBALANCE_MAX_DAYS: Final[int] = int(os.getenv("REBALANCE_MAX_DAYS", "7"))
+REBALANCE_ABSENCE_DAYS: Final[int] = int(os.getenv("REBALANCE_ABSENCE_DAYS", "2"))
 
 
 def parse_push_time(s: str | None) -> time:
@@ -46,6 +94,31 @@ def parse_push_time(s: str | None) -> time:
     return time(hour=int(hh), minute=int(mm))
 
 
+def push_minute(s: str | None) -> int:
+    """Minute of the day (0..1439) for an HH:MM push time."""
+    t = parse_push_time(s)
+    return t.hour * 60 + t.minute
+
+
+def resolve_tz(name: str | None) -> tzinfo:
+    """ZoneInfo for a stored timezone name; DEFAULT_TZ when unset, UTC if unknown."""
+    try:
+        return ZoneInfo(name or DEFAULT_TZ)
+    except (ZoneInfoNotFoundError, ValueError):
+        return timezone.utc
+
+
+def utc_push_minute(push_time: str | None, tz_name: str | None, on: date) -> int:
+    """UTC minute of the day at which local `push_time` falls on date `on`.
+
+    The offset depends on the date across DST changes, so stored buckets are
+    recomputed nightly (see `srsbot.scheduler.refresh_push_buckets`).
+    """
+    local = datetime.combine(on, parse_push_time(push_time), tzinfo=resolve_tz(tz_name))
+    utc = local.astimezone(timezone.utc)
+    return utc.hour * 60 + utc.minute
+
+
 @dataclass(frozen=True)
 class Today:
     today: date
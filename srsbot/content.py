@@ -5,6 +5,16 @@ import random
 from typing import Sequence
 
 
+def split_tags(raw: str | None) -> tuple[str, ...]:
+    """Parse the comma-separated `cards.tags` column into normalized pack tags."""
+    return tuple(dict.fromkeys(t.strip().lower() for t in (raw or "").split(",") if t.strip()))
+
+
+def normalize_pack_tags(pack_tags: Sequence[str]) -> list[str]:
+    """Normalize a user's pack selection; an empty result means all packs."""
+    return sorted({t.strip().lower() for t in pack_tags if t.strip()})
+
+
 @dataclass(frozen=True)
 class NewCard:
     id: int
@@ -1,239 +1,213 @@
 from __future__ import annotations
 
 import contextlib
-from datetime import date
-from typing import AsyncIterator
+from datetime import date, datetime, timezone
+from typing import AsyncIterator, Iterable
 
 import aiosqlite
 
-from srsbot.config import DB_PATH
+from srsbot.config import DB_PATH, DB_POOL_READERS, utc_push_minute
+from srsbot.migrations import migrate
+from srsbot.pool import ConnectionPool, PoolStats, connect
 
-_SENTINEL = object()
+_pool: ConnectionPool | None = None
+
+
+async def open_pool(readers: int = DB_POOL_READERS) -> ConnectionPool:
+    """Open the process-wide connection pool (call once at startup)."""
+    global _pool
+    if _pool is None:
+        pool = ConnectionPool(DB_PATH.as_posix(), readers=readers)
+        await pool.open()
+        _pool = pool
+    return _pool
+
+
+async def close_pool() -> None:
+    global _pool
+    pool, _pool = _pool, None
+    if pool is not None:
+        await pool.close()
+
+
+def pool_stats() -> PoolStats | None:
+    """Return pool metrics (checkouts, waits, in-use) or None if no pool is open."""
+    return _pool.stats() if _pool is not None else None
 
 
 @contextlib.asynccontextmanager
-async def get_db() -> AsyncIterator[aiosqlite.Connection]:
-    db = await aiosqlite.connect(DB_PATH.as_posix())
-    db.row_factory = aiosqlite.Row
+async def _adhoc_db() -> AsyncIterator[aiosqlite.Connection]:
+    # Used by scripts and tests that run without an open pool
+    db = await connect(DB_PATH.as_posix())
     try:
         yield db
     finally:
         await db.close()
 
 
+@contextlib.asynccontextmanager
+async def get_db() -> AsyncIterator[aiosqlite.Connection]:
+    """Check out the writer connection (exclusive); use for anything that writes."""
+    if _pool is None:
+        async with _adhoc_db() as db:
+            yield db
+        return
+    async with _pool.writer() as db:
+        yield db
+
+
+@contextlib.asynccontextmanager
+async def get_read_db() -> AsyncIterator[aiosqlite.Connection]:
+    """Check out a reader connection; must not be used for writes."""
+    if _pool is None:
+        async with _adhoc_db() as db:
+            yield db
+        return
+    async with _pool.reader() as db:
+        yield db
+
+
 async def init_db() -> None:
+    """Bring the schema up to date; run once at process start, not per request."""
     async with get_db() as db:
-        await db.executescript(
-            """
-            PRAGMA journal_mode=WAL;
-
-            CREATE TABLE IF NOT EXISTS cards (
-                id INTEGER PRIMARY KEY,
-                phrasal TEXT NOT NULL,
-                meaning_en TEXT NOT NULL,
-                examples_json TEXT NOT NULL,
-                tags TEXT,
-                sense_uid TEXT UNIQUE NOT NULL,
-                separable INTEGER NOT NULL DEFAULT 0,
-                intransitive INTEGER NOT NULL DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS progress (
-                user_id INTEGER NOT NULL,
-                card_id INTEGER NOT NULL,
-                state TEXT NOT NULL CHECK(state IN ('learning','review')),
-                box INTEGER NOT NULL DEFAULT 0,
-                due_at DATE,
-                lapses INTEGER NOT NULL DEFAULT 0,
-                learning_good_count INTEGER NOT NULL DEFAULT 0,
-                last_answer TEXT,
-                last_seen_at DATETIME,
-                PRIMARY KEY(user_id, card_id)
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_progress_user_due ON progress(user_id, due_at);
-            CREATE INDEX IF NOT EXISTS idx_progress_user_state ON progress(user_id, state);
-
-            CREATE TABLE IF NOT EXISTS user_config (
-                user_id INTEGER PRIMARY KEY,
-                daily_new_target INTEGER NOT NULL DEFAULT 8,
-                review_limit_per_day INTEGER NOT NULL DEFAULT 35,
-                push_time TEXT NOT NULL DEFAULT '09:00',
-                pack_tags TEXT NOT NULL DEFAULT 'daily',
-                intra_spacing_k INTEGER NOT NULL DEFAULT 3,
-                quiz_question_limit INTEGER NOT NULL DEFAULT 10
-            );
-
-            -- Additional lightweight state for scheduling and stats
-            CREATE TABLE IF NOT EXISTS user_state (
-                user_id INTEGER PRIMARY KEY,
-                last_notified_date DATE,
-                snoozed_until DATETIME,
-                streak_days INTEGER NOT NULL DEFAULT 0
-            );
-
-            CREATE TABLE IF NOT EXISTS answers (
-                user_id INTEGER NOT NULL,
-                card_id INTEGER NOT NULL,
-                answer TEXT NOT NULL CHECK(answer IN ('again','good')),
-                ts DATETIME NOT NULL DEFAULT (datetime('now')),
-                is_new INTEGER NOT NULL DEFAULT 0,
-                tags TEXT
-            );
-
-            -- Per-day state for rounds and counters
-            CREATE TABLE IF NOT EXISTS user_day_state (
-                user_id INTEGER NOT NULL,
-                session_date TEXT NOT NULL,
-                round_index INTEGER NOT NULL DEFAULT 1,
-                served_review_count INTEGER NOT NULL DEFAULT 0,
-                shown_new_today INTEGER NOT NULL DEFAULT 0,
-                good_today INTEGER NOT NULL DEFAULT 0,
-                again_today INTEGER NOT NULL DEFAULT 0,
-                round_card_ids_json TEXT,
-                review_seen_ids_json TEXT,
-                new_seen_ids_json TEXT,
-                PRIMARY KEY (user_id, session_date)
-            );
-            CREATE INDEX IF NOT EXISTS ix_user_day_state_user_date ON user_day_state(user_id, session_date);
-
-            -- UI state for inline navigation and message cleanup
-            CREATE TABLE IF NOT EXISTS user_ui_state (
-                user_id INTEGER PRIMARY KEY,
-                last_ui_message_id INTEGER,
-                current_screen TEXT,
-                awaiting_input_field TEXT,
-                quiz_state_json TEXT
-            );
-
-            -- Cache for Explain feature
-            CREATE TABLE IF NOT EXISTS explain_cache (
-                card_id INTEGER PRIMARY KEY,
-                content TEXT NOT NULL,
-                created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
-            );
-            """
-        )
-        await db.commit()
-        # Migrations: add awaiting_input_field if missing
-        try:
-            await db.execute(
-                "ALTER TABLE user_ui_state ADD COLUMN awaiting_input_field TEXT"
-            )
-            await db.commit()
-        except Exception:
-            pass
-        # Migration: add quiz_state_json if missing
-        try:
-            await db.execute(
-                "ALTER TABLE user_ui_state ADD COLUMN quiz_state_json TEXT"
-            )
-            await db.commit()
-        except Exception:
-            pass
-        # Migration: add quiz_question_limit if missing
-        try:
-            await db.execute(
-                "ALTER TABLE user_config ADD COLUMN quiz_question_limit INTEGER NOT NULL DEFAULT 10"
-            )
-            await db.commit()
-        except Exception:
-            pass
+        await db.execute("PRAGMA journal_mode=WAL")
+        await migrate(db)
 
-        # Ensure explain_cache exists (noop if present)
-        try:
-            await db.execute(
-                """
-                CREATE TABLE IF NOT EXISTS explain_cache (
-                    card_id INTEGER PRIMARY KEY,
-                    content TEXT NOT NULL,
-                    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
-                );
-                """
-            )
-            await db.commit()
-        except Exception:
-            pass
+
+async def set_card_tags(db: aiosqlite.Connection, card_id: int, tags: Iterable[str]) -> None:
+    """Replace the normalized `card_tags` rows of a card (caller commits).
+
+    The `cards` triggers already index plain ASCII tags; this re-applies the
+    Python `split_tags` normalization for anything SQL `lower()` leaves alone.
+    """
+    await db.execute("DELETE FROM card_tags WHERE card_id=?", (card_id,))
+    await db.executemany(
+        "INSERT OR IGNORE INTO card_tags(card_id, tag) VALUES (?, ?)",
+        [(card_id, t) for t in tags],
+    )
 
 
 async def ensure_user_config(user_id: int) -> None:
     async with get_db() as db:
         cur = await db.execute("SELECT 1 FROM user_config WHERE user_id=?", (user_id,))
         if await cur.fetchone() is None:
-            await db.execute("INSERT INTO user_config(user_id) VALUES (?)", (user_id,))
+            cur = await db.execute(
+                "INSERT INTO user_config(user_id) VALUES (?) RETURNING push_time, tz", (user_id,)
+            )
+            row = await cur.fetchone()
+            await _store_push_bucket(db, user_id, row[0], row[1])
             await db.execute("INSERT OR IGNORE INTO user_state(user_id) VALUES (?)", (user_id,))
             await db.commit()
 
 
+async def _store_push_bucket(
+    db: aiosqlite.Connection, user_id: int, push_time: str, tz: str | None
+) -> None:
+    await db.execute(
+        "UPDATE user_config SET push_minute_utc=? WHERE user_id=?",
+        (utc_push_minute(push_time, tz, datetime.now(timezone.utc).date()), user_id),
+    )
+
+
 async def get_push_time(user_id: int) -> str:
-    async with get_db() as db:
+    async with get_read_db() as db:
         cur = await db.execute("SELECT push_time FROM user_config WHERE user_id=?", (user_id,))
         row = await cur.fetchone()
         return row[0] if row else "09:00"
 
 
-async def update_last_notified(user_id: int, d: date) -> None:
+async def set_push_time(user_id: int, value: str) -> None:
+    """Store a new local HH:MM push time together with its UTC minute bucket."""
     async with get_db() as db:
-        await db.execute(
-            "UPDATE user_state SET last_notified_date=? WHERE user_id=?", (d.isoformat(), user_id)
+        cur = await db.execute(
+            "UPDATE user_config SET push_time=? WHERE user_id=? RETURNING tz", (value, user_id)
         )
+        row = await cur.fetchone()
+        if row is not None:
+            await _store_push_bucket(db, user_id, value, row[0])
         await db.commit()
 
 
-async def get_ui_state(user_id: int) -> aiosqlite.Row | None:
-    """Return UI state row for a user if exists."""
+async def set_timezone(user_id: int, tz: str) -> None:
+    """Store the user's IANA timezone and recompute the UTC push bucket."""
     async with get_db() as db:
         cur = await db.execute(
-            "SELECT user_id, last_ui_message_id, current_screen, awaiting_input_field FROM user_ui_state WHERE user_id=?",
-            (user_id,),
+            "UPDATE user_config SET tz=? WHERE user_id=? RETURNING push_time", (tz, user_id)
         )
-        return await cur.fetchone()
+        row = await cur.fetchone()
+        if row is not None:
+            await _store_push_bucket(db, user_id, row[0], tz)
+        await db.commit()
 
 
-async def set_ui_state(
-    user_id: int,
-    last_ui_message_id: int | None = None,
-    current_screen: str | None = None,
-    awaiting_input_field: str | None | object = _SENTINEL,
-) -> None:
-    """Upsert UI state fields for the user."""
-    # Read existing
-    row = await get_ui_state(user_id)
-    new_msg_id = last_ui_message_id if last_ui_message_id is not None else (
-        int(row["last_ui_message_id"]) if row and row["last_ui_message_id"] is not None else None
-    )
-    new_screen = current_screen if current_screen is not None else (
-        str(row["current_screen"]) if row and row["current_screen"] is not None else None
-    )
-    # Sentinel default means keep existing
-    if awaiting_input_field is _SENTINEL:  # keep existing
-        new_awaiting = row["awaiting_input_field"] if row else None
-    else:
-        new_awaiting = awaiting_input_field
+async def get_scheduler_state(key: str) -> str | None:
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT value FROM scheduler_state WHERE key=?", (key,))
+        row = await cur.fetchone()
+    return str(row[0]) if row else None
+
+
+async def set_scheduler_state(key: str, value: str) -> None:
     async with get_db() as db:
         await db.execute(
-            "INSERT INTO user_ui_state(user_id, last_ui_message_id, current_screen, awaiting_input_field) VALUES(?,?,?,?) "
-            "ON CONFLICT(user_id) DO UPDATE SET last_ui_message_id=excluded.last_ui_message_id, current_screen=excluded.current_screen, awaiting_input_field=excluded.awaiting_input_field",
-            (user_id, new_msg_id, new_screen, new_awaiting),
+            "INSERT INTO scheduler_state(key, value) VALUES(?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+            (key, value),
         )
         await db.commit()
 
 
-async def clear_ui_message(user_id: int) -> None:
-    """Clear stored UI message id for the user (screen unchanged)."""
+# scheduler_state keys: last answers rowid logged before daily_user_stats
+# existed, and the rowid the backfill has rolled up to
+DAILY_STATS_BACKFILL_UPTO_KEY = "daily_stats_backfill_upto"
+DAILY_STATS_BACKFILL_DONE_KEY = "daily_stats_backfill_done"
+
+
+async def backfill_daily_user_stats(chunk: int = 50000) -> int:
+    """Roll answers logged before migration 12 into daily_user_stats.
+
+    Walks the answers rowid range in chunks, each added to the rollup in the
+    same transaction that records its progress, so the job can be stopped and
+    rerun at any time. Returns the number of answers rolled up by this call.
+    """
+    upto = int(await get_scheduler_state(DAILY_STATS_BACKFILL_UPTO_KEY) or 0)
+    done = int(await get_scheduler_state(DAILY_STATS_BACKFILL_DONE_KEY) or 0)
+    total = 0
+    while done < upto:
+        hi = min(done + chunk, upto)
+        async with get_db() as db:
+            await db.execute(
+                """
+                INSERT INTO daily_user_stats(user_id, day, shown, good, again, new_count)
+                SELECT user_id, date(ts), COUNT(*), SUM(answer='good'), SUM(answer='again'), SUM(is_new)
+                FROM answers WHERE rowid>? AND rowid<=?
+                GROUP BY user_id, date(ts)
+                ON CONFLICT(user_id, day) DO UPDATE SET
+                    shown=shown+excluded.shown, good=good+excluded.good,
+                    again=again+excluded.again, new_count=new_count+excluded.new_count
+                """,
+                (done, hi),
+            )
+            cur = await db.execute("SELECT COUNT(*) FROM answers WHERE rowid>? AND rowid<=?", (done, hi))
+            total += int((await cur.fetchone())[0])
+            await db.execute(
+                "INSERT INTO scheduler_state(key, value) VALUES(?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value=excluded.value",
+                (DAILY_STATS_BACKFILL_DONE_KEY, str(hi)),
+            )
+            await db.commit()
+        done = hi
+    return total
+
+
+async def update_last_notified(user_id: int, d: date) -> None:
     async with get_db() as db:
         await db.execute(
-            "UPDATE user_ui_state SET last_ui_message_id=NULL WHERE user_id=?",
-            (user_id,),
+            "UPDATE user_state SET last_notified_date=? WHERE user_id=?", (d.isoformat(), user_id)
         )
         await db.commit()
 
 
-async def set_awaiting_input(user_id: int, field: str | None) -> None:
-    """Set or clear the awaiting input field in UI state."""
-    await set_ui_state(user_id, awaiting_input_field=field)
-
-
 # ---- Quiz state helpers ----------------------------------------------------
 
 async def set_quiz_state(user_id: int, state_json: str | None) -> None:
@@ -248,7 +222,7 @@ async def set_quiz_state(user_id: int, state_json: str | None) -> None:
 
 
 async def get_quiz_state_json(user_id: int) -> str | None:
-    async with get_db() as db:
+    async with get_read_db() as db:
         cur = await db.execute(
             "SELECT quiz_state_json FROM user_ui_state WHERE user_id=?",
             (user_id,),
@@ -258,7 +232,7 @@ async def get_quiz_state_json(user_id: int) -> str | None:
 
 
 async def get_day_state(user_id: int, session_date: str) -> aiosqlite.Row | None:
-    async with get_db() as db:
+    async with get_read_db() as db:
         cur = await db.execute(
             "SELECT * FROM user_day_state WHERE user_id=? AND session_date=?",
             (user_id, session_date),
@@ -276,8 +250,8 @@ async def init_or_get_day_state(user_id: int, session_date: str) -> aiosqlite.Ro
         if row is None:
             await db.execute(
                 """
-                INSERT INTO user_day_state(user_id, session_date, round_index, served_review_count, shown_new_today, good_today, again_today, round_card_ids_json, review_seen_ids_json, new_seen_ids_json)
-                VALUES(?, ?, 1, 0, 0, 0, 0, NULL, '[]', '[]')
+                INSERT INTO user_day_state(user_id, session_date, round_index, served_review_count, shown_new_today, good_today, again_today, round_card_ids_json)
+                VALUES(?, ?, 1, 0, 0, 0, 0, NULL)
                 """,
                 (user_id, session_date),
             )
@@ -290,6 +264,14 @@ async def init_or_get_day_state(user_id: int, session_date: str) -> aiosqlite.Ro
         return row  # type: ignore[return-value]
 
 
+async def prune_day_seen(before: str) -> int:
+    """Delete first-serve marks of session dates before `before` (YYYY-MM-DD)."""
+    async with get_db() as db:
+        cur = await db.execute("DELETE FROM day_seen WHERE session_date<?", (before,))
+        await db.commit()
+        return cur.rowcount
+
+
 async def update_day_state(
     user_id: int,
     session_date: str,
@@ -334,7 +316,7 @@ async def increment_day_counters(
 
 async def get_explanation_cached(card_id: int) -> str | None:
     """Return cached explanation content for card_id, if present."""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cur = await db.execute(
             "SELECT content FROM explain_cache WHERE card_id=?",
             (card_id,),
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+"""Per-user review forecast read from `due_forecast`.
+
+`due_forecast(user_id, day, count)` holds how many review cards fall due per
+day. Triggers on `progress` (migration 14) keep it in step with every write,
+so reads are a short primary-key range instead of a `progress` scan.
+`check_due_forecast` rebuilds the counts from `progress` and reports (and
+optionally repairs) any drift.
+"""
+
+import json
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Optional, Sequence
+
+from srsbot.db import get_db, get_read_db
+
+
+@dataclass(frozen=True)
+class UpcomingLoad:
+    due_now: int  # due today or overdue
+    tomorrow: int
+    next_7_days: int  # tomorrow through today + 7
+
+
+# Overdue days are summed too; after a rebalance there are only a few of them
+_UPCOMING_SQL = """
+SELECT user_id,
+       SUM(CASE WHEN day<=:today THEN count ELSE 0 END),
+       SUM(CASE WHEN day=:tomorrow THEN count ELSE 0 END),
+       SUM(CASE WHEN day>:today THEN count ELSE 0 END)
+FROM due_forecast
+WHERE user_id IN (SELECT value FROM json_each(:ids)) AND day<=:week_end
+GROUP BY user_id
+"""
+
+
+async def upcoming_load_batch(user_ids: Sequence[int], today: date) -> dict[int, UpcomingLoad]:
+    """Return an `UpcomingLoad` for each given user (zeros when nothing is due)."""
+    loads = {user_id: UpcomingLoad(0, 0, 0) for user_id in user_ids}
+    if not user_ids:
+        return loads
+    params = {
+        "ids": json.dumps(list(user_ids)),
+        "today": today.isoformat(),
+        "tomorrow": (today + timedelta(days=1)).isoformat(),
+        "week_end": (today + timedelta(days=7)).isoformat(),
+    }
+    async with get_read_db() as db:
+        cur = await db.execute(_UPCOMING_SQL, params)
+        for r in await cur.fetchall():
+            loads[int(r[0])] = UpcomingLoad(int(r[1]), int(r[2]), int(r[3]))
+    return loads
+
+
+async def upcoming_load(user_id: int, today: date) -> UpcomingLoad:
+    return (await upcoming_load_batch([user_id], today))[user_id]
+
+
+async def due_histogram(user_id: int, start: date, end: date) -> dict[date, int]:
+    """Review cards due per day in [start, end] (days with none omitted)."""
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT day, count FROM due_forecast WHERE user_id=? AND day BETWEEN ? AND ?",
+            (user_id, start.isoformat(), end.isoformat()),
+        )
+        return {date.fromisoformat(str(r[0])): int(r[1]) for r in await cur.fetchall()}
+
+
+def format_upcoming_load(load: UpcomingLoad) -> str:
+    return f"Upcoming reviews: {load.tomorrow} tomorrow, {load.next_7_days} in the next 7 days"
+
+
+@dataclass(frozen=True)
+class ForecastDrift:
+    user_id: int
+    day: str
+    stored: int
+    actual: int
+
+
+_DRIFT_SQL = """
+WITH actual AS (
+    SELECT user_id, due_at AS day, COUNT(*) AS n FROM progress
+    WHERE state='review' AND due_at IS NOT NULL {progress_filter}
+    GROUP BY user_id, due_at
+),
+stored AS (
+    SELECT user_id, day, count AS n FROM due_forecast WHERE 1 {forecast_filter}
+)
+SELECT a.user_id, a.day, COALESCE(s.n, 0), a.n FROM actual a
+LEFT JOIN stored s ON s.user_id=a.user_id AND s.day=a.day
+WHERE s.n IS NOT a.n
+UNION ALL
+SELECT s.user_id, s.day, s.n, 0 FROM stored s
+WHERE NOT EXISTS (SELECT 1 FROM actual a WHERE a.user_id=s.user_id AND a.day=s.day)
+"""
+
+
+async def check_due_forecast(
+    user_ids: Optional[Sequence[int]] = None, repair: bool = False
+) -> list[ForecastDrift]:
+    """Diff `due_forecast` against counts rebuilt from `progress`.
+
+    Checks all users, or only `user_ids`. With `repair`, drifted rows are
+    overwritten (or deleted) in the same write transaction as the check, so
+    no answer can slip in between.
+    """
+    if user_ids is None:
+        sql = _DRIFT_SQL.format(progress_filter="", forecast_filter="")
+        params: dict[str, str] = {}
+    else:
+        flt = "AND user_id IN (SELECT value FROM json_each(:ids))"
+        sql = _DRIFT_SQL.format(progress_filter=flt, forecast_filter=flt)
+        params = {"ids": json.dumps(list(user_ids))}
+    if not repair:
+        async with get_read_db() as db:
+            cur = await db.execute(sql, params)
+            rows = await cur.fetchall()
+        return [ForecastDrift(int(r[0]), str(r[1]), int(r[2]), int(r[3])) for r in rows]
+    async with get_db() as db:
+        cur = await db.execute(sql, params)
+        drift = [ForecastDrift(int(r[0]), str(r[1]), int(r[2]), int(r[3])) for r in await cur.fetchall()]
+        await db.executemany(
+            "INSERT INTO due_forecast(user_id, day, count) VALUES(?,?,?) "
+            "ON CONFLICT(user_id, day) DO UPDATE SET count=excluded.count",
+            [(d.user_id, d.day, d.actual) for d in drift if d.actual],
+        )
+        await db.executemany(
+            "DELETE FROM due_forecast WHERE user_id=? AND day=?",
+            [(d.user_id, d.day) for d in drift if not d.actual],
+        )
+        await db.commit()
+    return drift
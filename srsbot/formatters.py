@@ -3,7 +3,7 @@ from __future__ import annotations
 import json
 import html
 import re
-from typing import Iterable
+from typing import Iterable, Sequence
 import re
 
 
@@ -18,13 +18,26 @@ def normalize_tag(s: str) -> str:
     return tag
 
 
+def _examples_list(examples: str | Sequence[str]) -> list[str]:
+    """Accept pre-parsed examples (catalog records) or the raw JSON column."""
+    if not isinstance(examples, str):
+        return [str(x) for x in examples]
+    try:
+        loaded = json.loads(examples)
+        if isinstance(loaded, list):
+            return [str(x) for x in loaded]
+    except Exception:
+        pass
+    return []
+
+
 def html_card_message(
     phrasal: str,
     meaning_en: str,
-    examples_json: str,
+    examples_json: str | Sequence[str],
     *,
     is_new: bool,
-    tags: list[str],
+    tags: Sequence[str],
 ) -> str:
     """Compose the HTML message body for a card.
 
@@ -33,13 +46,7 @@ def html_card_message(
     - Examples list with "- " bullets.
     - Tags as space-separated hashtags (#tag) built from provided tags.
     """
-    examples: list[str] = []
-    try:
-        loaded = json.loads(examples_json)
-        if isinstance(loaded, list):
-            examples = [str(x) for x in loaded]
-    except Exception:
-        examples = []
+    examples = _examples_list(examples_json)
 
     badge = "🆕\n" if is_new else ""
     tags_norm = [normalize_tag(t) for t in tags]
@@ -63,21 +70,15 @@ def html_card_message(
 def build_card_prompt_text(
     phrasal: str,
     meaning_en: str,
-    examples_json: str,
+    examples_json: str | Sequence[str],
     *,
-    tags: list[str] | None = None,
+    tags: Sequence[str] | None = None,
 ) -> str:
     """Build a concise, human-readable text for Explain prompt.
 
     Includes phrasal, meaning, and examples in simple HTML-compatible text.
     """
-    examples: list[str] = []
-    try:
-        loaded = json.loads(examples_json)
-        if isinstance(loaded, list):
-            examples = [str(x) for x in loaded]
-    except Exception:
-        examples = []
+    examples = _examples_list(examples_json)
 
     parts: list[str] = []
     parts.append(f"<b>{escape_html(phrasal)}</b>")
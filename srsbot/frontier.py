@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+"""Per-user "unseen cards" frontier.
+
+A frontier is a seen-bitmap over card ids plus the number of catalog cards
+the user has never answered. Bitmaps live in a bounded in-memory cache and are
+rebuilt from the user's `progress` rows (one indexed range scan) when missing
+or when the catalog version moved. `unseen_count` is also persisted in
+`user_frontier`, so counting new cards for users that are not cached is a
+single-row lookup instead of an anti-join over `cards`.
+"""
+
+import json
+from collections import OrderedDict
+from typing import Iterable, Sequence
+
+from srsbot.catalog import CardCatalog, get_catalog
+from srsbot.config import FRONTIER_CACHE_SIZE
+from srsbot.db import get_db, get_read_db
+
+
+class Frontier:
+    __slots__ = ("catalog_version", "unseen_count", "_seen")
+
+    def __init__(self, catalog: CardCatalog, seen_ids: Iterable[int]) -> None:
+        self.catalog_version = catalog.version
+        self._seen = bytearray(catalog.max_id // 8 + 1)
+        seen_in_catalog = 0
+        for cid in seen_ids:
+            if cid in catalog and self.mark_seen(cid):
+                seen_in_catalog += 1
+        self.unseen_count = len(catalog) - seen_in_catalog
+
+    def is_seen(self, card_id: int) -> bool:
+        i = card_id >> 3
+        return i < len(self._seen) and bool(self._seen[i] & (1 << (card_id & 7)))
+
+    def mark_seen(self, card_id: int) -> bool:
+        """Set the seen bit; return True if the card was unseen before."""
+        i = card_id >> 3
+        if i >= len(self._seen):
+            self._seen.extend(bytes(i + 1 - len(self._seen)))
+        bit = 1 << (card_id & 7)
+        if self._seen[i] & bit:
+            return False
+        self._seen[i] |= bit
+        return True
+
+
+_cache: OrderedDict[int, Frontier] = OrderedDict()
+
+
+async def _rebuild(user_id: int, catalog: CardCatalog) -> Frontier:
+    """Build the bitmap from `progress` on the writer, so no answer lands in between.
+
+    `user_frontier` is only written when the stored row is missing or differs.
+    """
+    async with get_db() as db:
+        cur = await db.execute("SELECT card_id FROM progress WHERE user_id=?", (user_id,))
+        frontier = Frontier(catalog, (int(r[0]) for r in await cur.fetchall()))
+        cur = await db.execute(
+            "SELECT catalog_version, unseen_count FROM user_frontier WHERE user_id=?", (user_id,)
+        )
+        row = await cur.fetchone()
+        if row is None or (int(row[0]), int(row[1])) != (frontier.catalog_version, frontier.unseen_count):
+            await db.execute(
+                "INSERT INTO user_frontier(user_id, catalog_version, unseen_count) VALUES(?,?,?) "
+                "ON CONFLICT(user_id) DO UPDATE SET catalog_version=excluded.catalog_version, unseen_count=excluded.unseen_count",
+                (user_id, frontier.catalog_version, frontier.unseen_count),
+            )
+            await db.commit()
+    return frontier
+
+
+async def get_frontier(user_id: int) -> Frontier:
+    """Return the user's frontier, rebuilding it if missing or stale."""
+    catalog = await get_catalog()
+    frontier = _cache.get(user_id)
+    if frontier is None or frontier.catalog_version != catalog.version:
+        frontier = await _rebuild(user_id, catalog)
+        _cache[user_id] = frontier
+        if len(_cache) > FRONTIER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    _cache.move_to_end(user_id)
+    return frontier
+
+
+async def unseen_count(user_id: int) -> int:
+    """Number of catalog cards the user has never answered, in O(1)."""
+    catalog = await get_catalog()
+    frontier = _cache.get(user_id)
+    if frontier is not None and frontier.catalog_version == catalog.version:
+        return frontier.unseen_count
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT unseen_count FROM user_frontier WHERE user_id=? AND catalog_version=?",
+            (user_id, catalog.version),
+        )
+        row = await cur.fetchone()
+    if row is not None:
+        return int(row[0])
+    return (await get_frontier(user_id)).unseen_count
+
+
+# Recount never-answered cards for a json list of users and upsert them in one
+# statement, so no answer commit can fall between the count and the write
+_REBUILD_COUNTS_SQL = """
+INSERT INTO user_frontier(user_id, catalog_version, unseen_count)
+SELECT u.user_id, :version, MAX(:cards - COUNT(c.id), 0)
+FROM (SELECT DISTINCT value AS user_id FROM json_each(:ids)) u
+LEFT JOIN progress p ON p.user_id=u.user_id
+LEFT JOIN cards c ON c.id=p.card_id
+WHERE true
+GROUP BY u.user_id
+ON CONFLICT(user_id) DO UPDATE SET catalog_version=excluded.catalog_version, unseen_count=excluded.unseen_count
+RETURNING user_id, unseen_count
+"""
+
+
+async def rebuild_unseen_counts(user_ids: Sequence[int]) -> dict[int, int]:
+    """Recompute and persist `unseen_count` for many users in one writer statement.
+
+    Used by batch readers for users whose persisted count is missing or was
+    built for an older catalog version; cached bitmaps are left untouched.
+    """
+    if not user_ids:
+        return {}
+    catalog = await get_catalog()
+    async with get_db() as db:
+        cur = await db.execute(
+            _REBUILD_COUNTS_SQL,
+            {"version": catalog.version, "cards": len(catalog), "ids": json.dumps(list(user_ids))},
+        )
+        counts = {int(r[0]): int(r[1]) for r in await cur.fetchall()}
+        await db.commit()
+    return counts
+
+
+def note_first_seen(user_id: int, card_id: int) -> None:
+    """Update a cached frontier after the first progress row for a card was written.
+
+    The persisted `unseen_count` is decremented by the answer transaction itself.
+    """
+    frontier = _cache.get(user_id)
+    if frontier is not None and frontier.mark_seen(card_id):
+        frontier.unseen_count = max(0, frontier.unseen_count - 1)
+
+
+def reset_frontiers() -> None:
+    """Drop all cached frontiers (tests, or after switching databases)."""
+    _cache.clear()
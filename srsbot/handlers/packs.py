@@ -1,15 +1,16 @@
 from __future__ import annotations
 
-from collections import defaultdict
-from typing import Dict, Set
+from typing import Dict
 
 from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
+from srsbot.catalog import get_catalog
 from srsbot.db import get_db
 from srsbot.keyboards import kb_packs
-from srsbot.ui import SCREEN_PACKS, show_screen
+from srsbot.ui import SCREEN_PACKS, edit_screen, show_screen
+from srsbot.user_config import get_user_config, invalidate_user_config
 
 
 router = Router()
@@ -17,21 +18,8 @@ router = Router()
 
 async def _load_pack_counts() -> tuple[Dict[str, int], int]:
     """Return (per-tag counts of unique phrasals, total unique phrasals)."""
-    async with get_db() as db:
-        cur = await db.execute("SELECT phrasal, tags FROM cards")
-        rows = await cur.fetchall()
-
-    by_tag: Dict[str, Set[str]] = defaultdict(set)
-    all_phrasals: Set[str] = set()
-    for r in rows:
-        phrasal = str(r[0])
-        all_phrasals.add(phrasal)
-        tags_raw = (r[1] or "")
-        for t in (x.strip().lower() for x in tags_raw.split(",") if x.strip()):
-            by_tag[t].add(phrasal)
-
-    counts = {t: len(s) for t, s in by_tag.items()}
-    return counts, len(all_phrasals)
+    catalog = await get_catalog()
+    return dict(catalog.pack_counts), catalog.total_phrasals
 
 
 def _render_packs_text(current: set[str]) -> str:
@@ -54,14 +42,7 @@ async def cmd_packs(message: Message) -> None:
         await message.answer("No packs found. Seed cards first (scripts/seed_cards.py).")
         return
 
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT pack_tags FROM user_config WHERE user_id=?", (user_id,)
-        )
-        row = await cur.fetchone()
-    selected_set: set[str] = set(
-        t.strip() for t in (row[0] or "").split(",") if t.strip()
-    ) if row else set()
+    selected_set: set[str] = set((await get_user_config(user_id)).pack_tag_list)
 
     tags_sorted = sorted(counts.keys())
     packs_list = [(t, counts.get(t, 0)) for t in tags_sorted]
@@ -80,14 +61,7 @@ async def on_packs_open(cb: CallbackQuery) -> None:
     user_id = cb.from_user.id
 
     counts, _ = await _load_pack_counts()
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT pack_tags FROM user_config WHERE user_id=?", (user_id,)
-        )
-        row = await cur.fetchone()
-    selected_set: set[str] = set(
-        t.strip() for t in (row[0] or "").split(",") if t.strip()
-    ) if row else set()
+    selected_set: set[str] = set((await get_user_config(user_id)).pack_tag_list)
     tags_sorted = sorted(counts.keys())
     packs_list = [(t, counts.get(t, 0)) for t in tags_sorted]
     await show_screen(
@@ -125,11 +99,14 @@ async def on_packs_toggle(cb: CallbackQuery) -> None:
             (new_tags, user_id),
         )
         await db.commit()
+    invalidate_user_config(user_id)
 
     tags_sorted = sorted(counts.keys())
     packs_list = [(t, counts.get(t, 0)) for t in tags_sorted]
     # Re-render in place
-    await cb.message.edit_text(
+    await edit_screen(
+        cb.message,
+        user_id,
         _render_packs_text(selected),
         reply_markup=kb_packs(packs_list, selected),
     )
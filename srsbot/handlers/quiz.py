@@ -12,14 +12,16 @@ from typing import Dict, List, Tuple
 from aiogram import F, Router
 from aiogram.types import CallbackQuery
 
+from srsbot.catalog import get_catalog
 from srsbot.db import (
-    get_db,
+    get_read_db,
     get_quiz_state_json,
     set_quiz_state,
 )
 from srsbot.formatters import format_quiz_question_html, format_quiz_summary_html
 from srsbot.keyboards import kb_main_menu, kb_quiz_question, kb_quiz_summary
 from srsbot.ui import SCREEN_MENU, SCREEN_QUIZ, show_screen
+from srsbot.user_config import get_user_config
 
 
 router = Router()
@@ -77,26 +79,21 @@ async def _build_quiz_session(user_id: int) -> Tuple[str | None, str]:
     Returns (quiz_json_or_none, message_text). If no eligible cards, returns (None, info_message).
     """
     # Load eligible review cards and config
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT quiz_question_limit FROM user_config WHERE user_id=?",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-        limit = int(row[0]) if row else 10
-
+    limit = (await get_user_config(user_id)).quiz_question_limit
+    async with get_read_db() as db:
         cur2 = await db.execute(
-            """
-            SELECT p.card_id, c.phrasal, c.meaning_en
-            FROM progress p JOIN cards c ON c.id=p.card_id
-            WHERE p.user_id=? AND p.state='review'
-            """,
+            "SELECT card_id FROM progress WHERE user_id=? AND state='review'",
             (user_id,),
         )
-        cards = [(int(r[0]), str(r[1]), str(r[2])) for r in await cur2.fetchall()]
-
-        cur3 = await db.execute("SELECT meaning_en FROM cards")
-        meanings = [str(r[0]) for r in await cur3.fetchall()]
+        review_ids = [int(r[0]) for r in await cur2.fetchall()]
+
+    catalog = await get_catalog()
+    cards = [
+        (c.id, c.phrasal, c.meaning_en)
+        for c in (catalog.get(cid) for cid in review_ids)
+        if c is not None
+    ]
+    meanings = list(catalog.meanings)
 
     if not cards:
         return None, "No review cards available for quiz today."
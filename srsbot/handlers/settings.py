@@ -4,14 +4,18 @@ from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
-from srsbot.db import get_db, get_ui_state, set_awaiting_input
+from srsbot.catalog import get_catalog
+from srsbot.config import DEFAULT_TZ
+from srsbot.db import get_db, get_read_db, set_push_time, set_timezone
 from srsbot.keyboards import (
     kb_settings_input_back,
     kb_settings_list,
     kb_settings_packs,
 )
-from srsbot.ui import SCREEN_SETTINGS, show_screen
-from srsbot.validators import validate_hhmm, validate_int_in_range
+from srsbot.ui import SCREEN_SETTINGS, edit_screen, show_screen
+from srsbot.ui_state import get_ui_state, set_awaiting_input
+from srsbot.user_config import get_user_config, invalidate_user_config
+from srsbot.validators import validate_hhmm, validate_int_in_range, validate_timezone
 
 
 router = Router()
@@ -33,6 +37,11 @@ FIELD_META = {
         "Daily reminder time in your local timezone.",
         validate_hhmm,
     ),
+    "tz": (
+        "Timezone",
+        "Your IANA timezone (e.g. Europe/Berlin), used for the notification time.",
+        validate_timezone,
+    ),
     "intra_spacing_k": (
         "In-round spacing",
         "How many other cards to show before repeating a missed card within the same round.",
@@ -46,7 +55,7 @@ FIELD_META = {
 }
 
 
-def _fmt_settings_text(row: tuple[int, int, str, str, int, int]) -> str:
+def _fmt_settings_text(row: tuple[int, int, str, str, int, int], tz: str | None = None) -> str:
     daily_new, review_cap, push_time, pack_tags, k, quiz_limit = row
     packs_display = (
         ", ".join(t.strip().title() for t in pack_tags.split(",") if t.strip()) or "All"
@@ -56,30 +65,27 @@ def _fmt_settings_text(row: tuple[int, int, str, str, int, int]) -> str:
         f"• Daily new cards: {daily_new}\n"
         f"• Daily review cap: {review_cap}\n"
         f"• Notification time: {push_time}\n"
+        f"• Timezone: {tz or DEFAULT_TZ}\n"
         f"• Active packs: {packs_display}\n"
         f"• In-round spacing: {k}\n"
         f"• Quiz questions per session: {quiz_limit}"
     )
 
 
-async def _load_settings_row(user_id: int) -> tuple[int, int, str, str, int, int]:
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT daily_new_target, review_limit_per_day, push_time, pack_tags, intra_spacing_k, quiz_question_limit FROM user_config WHERE user_id=?",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-    if not row:
-        return (8, 35, "09:00", "", 3, 10)
-    return int(row[0]), int(row[1]), str(row[2]), str(row[3] or ""), int(row[4]), int(row[5] if row[5] is not None else 10)
-
-
 async def show_settings(message_or_cb, user_id: int) -> None:
-    row = await _load_settings_row(user_id)
+    cfg = await get_user_config(user_id)
+    row = (
+        cfg.daily_new_target,
+        cfg.review_limit_per_day,
+        cfg.push_time,
+        cfg.pack_tags,
+        cfg.intra_spacing_k,
+        cfg.quiz_question_limit,
+    )
     await show_screen(
         bot=message_or_cb.bot,
         user_id=user_id,
-        text=_fmt_settings_text(row),
+        text=_fmt_settings_text(row, cfg.tz),
         reply_markup=kb_settings_list(),
         screen_id=SCREEN_SETTINGS,
     )
@@ -164,12 +170,18 @@ async def on_text_input(message: Message) -> None:
         return
     # Persist
     value = (message.text or "").strip()
-    async with get_db() as db:
-        await db.execute(
-            f"UPDATE user_config SET {field}=? WHERE user_id=?",
-            (value, user_id),
-        )
-        await db.commit()
+    if field == "push_time":
+        await set_push_time(user_id, value)
+    elif field == "tz":
+        await set_timezone(user_id, "UTC" if value.upper() == "UTC" else value)
+    else:
+        async with get_db() as db:
+            await db.execute(
+                f"UPDATE user_config SET {field}=? WHERE user_id=?",
+                (value, user_id),
+            )
+            await db.commit()
+    invalidate_user_config(user_id)
     await set_awaiting_input(user_id, None)
     await show_settings(message, user_id)
 
@@ -184,27 +196,8 @@ async def on_settings_packs_open(cb: CallbackQuery) -> None:
         await cb.answer("Finish entering the value or tap Back.", show_alert=False)
         return
     # Build counts
-    from collections import defaultdict
-    from typing import Dict, Set
-
-    async with get_db() as db:
-        cur = await db.execute("SELECT phrasal, tags FROM cards")
-        rows = await cur.fetchall()
-        cur2 = await db.execute(
-            "SELECT pack_tags FROM user_config WHERE user_id=?", (user_id,)
-        )
-        row2 = await cur2.fetchone()
-
-    by_tag: Dict[str, Set[str]] = defaultdict(set)
-    for r in rows:
-        phrasal = str(r[0])
-        for t in (x.strip().lower() for x in (r[1] or "").split(",") if x.strip()):
-            by_tag[t].add(phrasal)
-    counts = {t: len(s) for t, s in by_tag.items()}
-
-    selected: set[str] = set(
-        t.strip() for t in (row2[0] or "").split(",") if t.strip()
-    ) if row2 else set()
+    counts = (await get_catalog()).pack_counts
+    selected: set[str] = set((await get_user_config(user_id)).pack_tag_list)
     tags_sorted = sorted(counts.keys())
     packs_list = [(t, counts.get(t, 0)) for t in tags_sorted]
     # Reuse text from settings line
@@ -232,7 +225,7 @@ async def on_settings_packs_toggle(cb: CallbackQuery) -> None:
         return
     _, _, tag = cb.data.split(":", 3)
     # Read current
-    async with get_db() as db:
+    async with get_read_db() as db:
         cur = await db.execute(
             "SELECT pack_tags FROM user_config WHERE user_id=?", (user_id,)
         )
@@ -251,23 +244,15 @@ async def on_settings_packs_toggle(cb: CallbackQuery) -> None:
             (new_tags, user_id),
         )
         await db.commit()
+    invalidate_user_config(user_id)
     # Rebuild counts
-    from collections import defaultdict
-    from typing import Dict, Set
-
-    async with get_db() as db:
-        cur = await db.execute("SELECT phrasal, tags FROM cards")
-        rows = await cur.fetchall()
-    by_tag: Dict[str, Set[str]] = defaultdict(set)
-    for r in rows:
-        phrasal = str(r[0])
-        for t in (x.strip().lower() for x in (r[1] or "").split(",") if x.strip()):
-            by_tag[t].add(phrasal)
-    counts = {t: len(s) for t, s in by_tag.items()}
+    counts = (await get_catalog()).pack_counts
     tags_sorted = sorted(counts.keys())
     packs_list = [(t, counts.get(t, 0)) for t in tags_sorted]
     # Re-render inline
-    await cb.message.edit_text(
+    await edit_screen(
+        cb.message,
+        user_id,
         "<b>Active packs</b>\nToggle packs on/off.",
         reply_markup=kb_settings_packs(packs_list, selected),
     )
@@ -8,7 +8,7 @@ from aiogram.types import CallbackQuery, Message
 
 from srsbot.db import get_db
 from srsbot.keyboards import kb_back_to_menu, kb_snooze_options
-from srsbot.ui import SCREEN_SNOOZE, show_screen
+from srsbot.ui import SCREEN_SNOOZE, edit_screen, show_screen
 
 
 router = Router()
@@ -61,7 +61,9 @@ async def on_snooze_set(cb: CallbackQuery) -> None:
         )
         await db.commit()
     # Refresh UI in place with confirmation
-    await cb.message.edit_text(
+    await edit_screen(
+        cb.message,
+        user_id,
         _snooze_text(prefix=f"Snoozed for {hours} hour(s)."),
         reply_markup=kb_snooze_options(),
     )
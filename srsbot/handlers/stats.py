@@ -6,7 +6,8 @@ from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
-from srsbot.db import get_db
+from srsbot.db import get_read_db
+from srsbot.forecast import format_upcoming_load, upcoming_load
 from srsbot.keyboards import kb_back_to_menu
 from srsbot.ui import SCREEN_STATS, show_screen
 
@@ -16,32 +17,31 @@ router = Router()
 
 async def _build_stats_text(user_id: int) -> str:
     now = datetime.now(timezone.utc)
-    today_start = now.date().isoformat()
+    today = now.date().isoformat()
     week_ago = (now - timedelta(days=7)).date().isoformat()
 
-    async with get_db() as db:
+    # At most 8 rollup rows (today and the 7 days before)
+    async with get_read_db() as db:
         cur = await db.execute(
-            "SELECT COUNT(*), SUM(answer='good') FROM answers WHERE user_id=? AND date(ts)=?",
-            (user_id, today_start),
-        )
-        row = await cur.fetchone()
-        today_shown = int(row[0] or 0)
-        today_good = int(row[1] or 0)
-
-        cur = await db.execute(
-            "SELECT COUNT(*), SUM(answer='good') FROM answers WHERE user_id=? AND date(ts)>=?",
+            "SELECT day, shown, good FROM daily_user_stats WHERE user_id=? AND day>=?",
             (user_id, week_ago),
         )
-        row = await cur.fetchone()
-        week_shown = int(row[0] or 0)
-        week_good = int(row[1] or 0)
+        rows = await cur.fetchall()
+    today_shown = today_good = week_shown = week_good = 0
+    for day, shown, good in rows:
+        week_shown += int(shown)
+        week_good += int(good)
+        if day == today:
+            today_shown, today_good = int(shown), int(good)
 
+    load = await upcoming_load(user_id, now.date())
     today_acc = (today_good / today_shown) if today_shown else 0.0
     week_acc = (week_good / week_shown) if week_shown else 0.0
     return (
         "<b>Stats</b>\n"
         f"Today: shown {today_shown}, good {today_good}, accuracy {today_acc:.0%}\n"
-        f"Week: shown {week_shown}, good {week_good}, accuracy {week_acc:.0%}"
+        f"Week: shown {week_shown}, good {week_good}, accuracy {week_acc:.0%}\n"
+        f"{format_upcoming_load(load)}"
     )
 
 
@@ -7,11 +7,12 @@ from aiogram import F, Router
 from aiogram.filters import Command
 from aiogram.types import CallbackQuery, Message
 
+from srsbot.answer_service import process_answer
+from srsbot.catalog import CardRecord, get_catalog
 from srsbot.db import (
     get_db,
-    init_db,
+    get_read_db,
     init_or_get_day_state,
-    increment_day_counters,
     update_day_state,
 )
 from srsbot.formatters import (
@@ -23,11 +24,11 @@ from srsbot.formatters import (
     format_explain_error_html,
 )
 from srsbot.keyboards import round_end_keyboard, today_card_kb, kb_main_menu, kb_explain_back
-from srsbot.models import Progress
-from srsbot.session import store
-from srsbot.srs import AnswerResult, on_answer
-from srsbot.queue import build_round_queue, compute_daily_candidates
-from srsbot.ui import SCREEN_TODAY, SCREEN_MENU, show_screen
+from srsbot.session import SessionData, store
+from srsbot.queue import build_round_queue, compute_daily_candidates, sample_new_cards
+from srsbot.rebalance import rebalance_after_absence
+from srsbot.ui import SCREEN_TODAY, SCREEN_MENU, edit_screen, show_screen
+from srsbot.user_config import get_user_config
 from srsbot.explain_client import get_explanation, ExplainClientError
 
 
@@ -36,27 +37,45 @@ router = Router()
 logger = logging.getLogger(__name__)
 
 
+async def _card_text(
+    user_id: int, card: CardRecord, s: SessionData, *, mark_shown: bool = True
+) -> str:
+    """Render a card; the 🆕 badge shows on its first-ever display in this session."""
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT last_seen_at FROM progress WHERE user_id=? AND card_id=?",
+            (user_id, card.id),
+        )
+        prow = await cur.fetchone()
+    first_time_ever = prow is None or prow[0] is None
+    first_time_this_session = not s.was_shown(card.id)
+    if mark_shown:
+        s.mark_shown(card.id)
+    return html_card_message(
+        card.phrasal,
+        card.meaning_en,
+        card.examples,
+        is_new=first_time_ever and first_time_this_session,
+        tags=card.tags,
+    )
+
+
 @router.message(Command("today"))
 async def cmd_today(message: Message) -> None:
     assert message.from_user
     user_id = message.from_user.id
     s = await store.get(user_id)
-    await init_db()
     today = datetime.now(timezone.utc).date()
     ds = await init_or_get_day_state(user_id, today.isoformat())
-    # Load config
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT daily_new_target, review_limit_per_day, pack_tags FROM user_config WHERE user_id=?",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-    daily_new_target = int(row[0]) if row else 8
-    review_limit = int(row[1]) if row else 35
-    pack_tags = (row[2] if row else "daily").split(",")
+    cfg = await get_user_config(user_id)
+    daily_new_target = cfg.daily_new_target
+    review_limit = cfg.review_limit_per_day
+    pack_tags = cfg.pack_tag_list
 
     # If no active queue, build a round snapshot based on remaining capacities
     if not s.queue:
+        if int(ds["round_index"]) == 1 and int(ds["served_review_count"]) == 0:
+            await rebalance_after_absence(user_id, today)
         review_remaining = max(0, review_limit - int(ds["served_review_count"]))
         new_remaining = max(0, daily_new_target - int(ds["shown_new_today"]))
         s.queue = await build_round_queue(
@@ -83,18 +102,9 @@ async def cmd_today(message: Message) -> None:
         return
 
     next_id = s.queue.pop(0)
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT phrasal, meaning_en, examples_json, tags FROM cards WHERE id=?",
-            (next_id,),
-        )
-        row = await cur.fetchone()
-        cur2 = await db.execute(
-            "SELECT last_seen_at FROM progress WHERE user_id=? AND card_id=?",
-            (user_id, next_id),
-        )
-        prow = await cur2.fetchone()
-    if not row:
+    s.current_card_id = next_id
+    card = (await get_catalog()).get(next_id)
+    if card is None:
         await show_screen(
             bot=message.bot,
             user_id=user_id,
@@ -103,16 +113,10 @@ async def cmd_today(message: Message) -> None:
             screen_id=SCREEN_MENU,
         )
         return
-    # Determine if this is the first-ever show for this user
-    first_time_ever = prow is None or prow[0] is None
-    first_time_this_session = next_id not in s.shown_card_ids
-    is_new_badge = first_time_ever and first_time_this_session
-    s.shown_card_ids.add(next_id)
-    tags_list = [t for t in str(row[3] or "").split(",") if t]
     await show_screen(
         bot=message.bot,
         user_id=user_id,
-        text=html_card_message(row[0], row[1], row[2], is_new=is_new_badge, tags=tags_list),
+        text=await _card_text(user_id, card, s),
         reply_markup=today_card_kb(next_id),
         screen_id=SCREEN_TODAY,
     )
@@ -124,21 +128,16 @@ async def on_today_from_menu(cb: CallbackQuery) -> None:
     assert cb.from_user
     user_id = cb.from_user.id
     s = await store.get(user_id)
-    await init_db()
     today = datetime.now(timezone.utc).date()
     ds = await init_or_get_day_state(user_id, today.isoformat())
-    # Load config
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT daily_new_target, review_limit_per_day, pack_tags FROM user_config WHERE user_id=?",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-    daily_new_target = int(row[0]) if row else 8
-    review_limit = int(row[1]) if row else 35
-    pack_tags = (row[2] if row else "daily").split(",")
+    cfg = await get_user_config(user_id)
+    daily_new_target = cfg.daily_new_target
+    review_limit = cfg.review_limit_per_day
+    pack_tags = cfg.pack_tag_list
 
     if not s.queue:
+        if int(ds["round_index"]) == 1 and int(ds["served_review_count"]) == 0:
+            await rebalance_after_absence(user_id, today)
         review_remaining = max(0, review_limit - int(ds["served_review_count"]))
         new_remaining = max(0, daily_new_target - int(ds["shown_new_today"]))
         s.queue = await build_round_queue(
@@ -166,18 +165,9 @@ async def on_today_from_menu(cb: CallbackQuery) -> None:
         return
 
     next_id = s.queue.pop(0)
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT phrasal, meaning_en, examples_json, tags FROM cards WHERE id=?",
-            (next_id,),
-        )
-        row = await cur.fetchone()
-        cur2 = await db.execute(
-            "SELECT last_seen_at FROM progress WHERE user_id=? AND card_id=?",
-            (user_id, next_id),
-        )
-        prow = await cur2.fetchone()
-    if not row:
+    s.current_card_id = next_id
+    card = (await get_catalog()).get(next_id)
+    if card is None:
         await show_screen(
             bot=cb.message.bot,  # type: ignore[union-attr]
             user_id=user_id,
@@ -187,15 +177,10 @@ async def on_today_from_menu(cb: CallbackQuery) -> None:
         )
         await cb.answer()
         return
-    first_time_ever = prow is None or prow[0] is None
-    first_time_this_session = next_id not in s.shown_card_ids
-    is_new_badge = first_time_ever and first_time_this_session
-    s.shown_card_ids.add(next_id)
-    tags_list = [t for t in str(row[3] or "").split(",") if t]
     await show_screen(
         bot=cb.message.bot,  # type: ignore[union-attr]
         user_id=user_id,
-        text=html_card_message(row[0], row[1], row[2], is_new=is_new_badge, tags=tags_list),
+        text=await _card_text(user_id, card, s),
         reply_markup=today_card_kb(next_id),
         screen_id=SCREEN_TODAY,
     )
@@ -209,124 +194,23 @@ async def on_ans(cb: CallbackQuery) -> None:
     _, ans, card_id_s = cb.data.split(":", 2)
     card_id = int(card_id_s)
 
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT state, COALESCE(box,0), due_at, lapses, learning_good_count FROM progress WHERE user_id=? AND card_id=?",
-            (user_id, card_id),
-        )
-        row = await cur.fetchone()
-        if row:
-            state, box, due_at, lapses, lgc = row
-        else:
-            state, box, due_at, lapses, lgc = ("learning", 0, None, 0, 0)
-
-        p = Progress(
-            user_id=user_id,
-            card_id=card_id,
-            state=state,
-            box=int(box),
-            due_at=None,
-            lapses=int(lapses),
-            learning_good_count=int(lgc),
-            last_answer=None,
-            last_seen_at=None,
-        )
-
-        today = datetime.now(timezone.utc).date()
-        # intra-spacing k
-        cur2 = await db.execute(
-            "SELECT intra_spacing_k FROM user_config WHERE user_id=?", (user_id,)
-        )
-        row2 = await cur2.fetchone()
-        k = int(row2[0]) if row2 else 3
-
-        res: AnswerResult = on_answer(p, ans, today, k)
-
-        # Update per-day counters on first serve of review/new
-        # Track using seen sets stored in user_day_state JSON columns
-        cur3 = await db.execute(
-            "SELECT review_seen_ids_json, new_seen_ids_json FROM user_day_state WHERE user_id=? AND session_date=?",
-            (user_id, today.isoformat()),
-        )
-        st = await cur3.fetchone()
-        import json as _json
-        review_seen = set(_json.loads(st[0] or "[]")) if st else set()
-        new_seen = set(_json.loads(st[1] or "[]")) if st else set()
-        add_review = 0
-        add_new = 0
-        if state == "review" and card_id not in review_seen:
-            review_seen.add(card_id)
-            add_review = 1
-        if state == "learning" and int(box) == 0 and card_id not in new_seen:
-            new_seen.add(card_id)
-            add_new = 1
-        if add_review or add_new:
-            await db.execute(
-                """
-                UPDATE user_day_state
-                SET served_review_count = served_review_count + ?,
-                    shown_new_today = shown_new_today + ?,
-                    review_seen_ids_json = ?,
-                    new_seen_ids_json = ?
-                WHERE user_id=? AND session_date=?
-                """,
-                (
-                    add_review,
-                    add_new,
-                    _json.dumps(sorted(review_seen)),
-                    _json.dumps(sorted(new_seen)),
-                    user_id,
-                    today.isoformat(),
-                ),
-            )
-
-        # Upsert progress
-        await db.execute(
-            """
-            INSERT INTO progress(user_id, card_id, state, box, due_at, lapses, learning_good_count, last_answer, last_seen_at)
-            VALUES(?,?,?,?,?,?,?, ?, datetime('now'))
-            ON CONFLICT(user_id, card_id) DO UPDATE SET
-                state=excluded.state,
-                box=excluded.box,
-                due_at=excluded.due_at,
-                lapses=excluded.lapses,
-                learning_good_count=excluded.learning_good_count,
-                last_answer=excluded.last_answer,
-                last_seen_at=excluded.last_seen_at
-            """,
-            (
-                user_id,
-                card_id,
-                res.progress.state,
-                res.progress.box,
-                res.progress.due_at.isoformat() if res.progress.due_at else None,
-                res.progress.lapses,
-                res.progress.learning_good_count,
-                res.progress.last_answer,
-            ),
-        )
+    # Updates of one user run in order (PerUserSerialMiddleware), so a second
+    # tap on the same card arrives after the first moved the session on
+    s = await store.get(user_id)
+    if s.is_stale_answer(card_id):
+        await cb.answer()
+        return
 
-        # Log answer
-        await db.execute(
-            "INSERT INTO answers(user_id, card_id, answer, is_new, tags) VALUES(?,?,?,?,?)",
-            (
-                user_id,
-                card_id,
-                ans,
-                1 if state == "learning" and box == 0 else 0,
-                None,
-            ),
-        )
-        await db.commit()
+    today = datetime.now(timezone.utc).date()
+    outcome = await process_answer(user_id, card_id, ans, today)  # type: ignore[arg-type]
+    res = outcome.result
+    s.current_card_id = 0
 
-    s = await store.get(user_id)
     s.shown += 1
     if ans == "good":
         s.good += 1
-        await increment_day_counters(user_id, today.isoformat(), good_delta=1)
         s.consecutive_good += 1
     else:
-        await increment_day_counters(user_id, today.isoformat(), again_delta=1)
         s.consecutive_good = 0
 
     # Requeue if needed
@@ -336,60 +220,37 @@ async def on_ans(cb: CallbackQuery) -> None:
 
     # Dynamic boost: every 5 consecutive good -> inject one extra new id if available
     if s.consecutive_good > 0 and s.consecutive_good % 5 == 0:
-        async with get_db() as db:
-            cur = await db.execute(
-                """
-                SELECT c.id FROM cards c
-                LEFT JOIN progress p ON p.card_id=c.id AND p.user_id=?
-                WHERE p.card_id IS NULL
-                LIMIT 1
-                """,
-                (user_id,),
-            )
-            row = await cur.fetchone()
-            if row:
-                s.queue.append(int(row[0]))
-
-    print("queue:", s.queue)
+        boost = await sample_new_cards(user_id, [], 1, exclude=s.queue)
+        if boost:
+            s.queue.append(boost[0].id)
+
     if not s.queue:
         # End of round: show completion UI with remaining counts in place
-        async with get_db() as db:
-            cur = await db.execute(
-                "SELECT daily_new_target, review_limit_per_day, pack_tags FROM user_config WHERE user_id=?",
-                (user_id,),
-            )
-            row = await cur.fetchone()
-        daily_new_target = int(row[0]) if row else 8
-        review_limit = int(row[1]) if row else 35
-        pack_tags = (row[2] if row else "daily").split(",")
+        cfg = await get_user_config(user_id)
+        daily_new_target = cfg.daily_new_target
+        review_limit = cfg.review_limit_per_day
+        pack_tags = cfg.pack_tag_list
         # Remaining capacities
-        async with get_db() as db:
-            cur = await db.execute(
-                "SELECT served_review_count, shown_new_today, good_today, again_today FROM user_day_state WHERE user_id=? AND session_date=?",
-                (user_id, today.isoformat()),
-            )
-            ds = await cur.fetchone()
-        served_reviews = int(ds[0]) if ds else 0
-        shown_new = int(ds[1]) if ds else 0
-        good_today = int(ds[2]) if ds else 0
-        again_today = int(ds[3]) if ds else 0
+        ds = outcome.counters
+        served_reviews = ds.served_review_count if ds else 0
+        shown_new = ds.shown_new_today if ds else 0
+        good_today = ds.good_today if ds else 0
+        again_today = ds.again_today if ds else 0
         review_remaining = max(0, review_limit - served_reviews)
         new_remaining = max(0, daily_new_target - shown_new)
-        # Candidates now
-        learning_due, reviews_due_all, new_candidates = await compute_daily_candidates(
-            user_id, today
+        # Candidates now, new ones already filtered by packs and capped
+        learning_due, reviews_due_all, new_picked = await compute_daily_candidates(
+            user_id, today, pack_tags, new_limit=new_remaining
         )
         # Apply remaining caps to compute remaining today
         remaining_learning = len(learning_due)
         remaining_reviews = min(len(reviews_due_all), review_remaining)
-        # Filter new by tags and cap
-        from srsbot.content import select_new_cards
-
-        new_picked = select_new_cards(new_candidates, pack_tags, new_remaining)
         remaining_new = len(new_picked)
 
         # Show round complete in the same message
-        await cb.message.edit_text(
+        await edit_screen(
+            cb.message,
+            user_id,
             format_round_complete(
                 good_today,
                 again_today,
@@ -404,26 +265,13 @@ async def on_ans(cb: CallbackQuery) -> None:
 
     # Show next card
     next_id = s.queue.pop(0)
-    print("next_id:", next_id)
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT phrasal, meaning_en, examples_json, tags FROM cards WHERE id=?",
-            (next_id,),
-        )
-        row = await cur.fetchone()
-        cur2 = await db.execute(
-            "SELECT last_seen_at FROM progress WHERE user_id=? AND card_id=?",
-            (user_id, next_id),
-        )
-        prow = await cur2.fetchone()
-    if row:
-        first_time_ever = prow is None or prow[0] is None
-        first_time_this_session = next_id not in s.shown_card_ids
-        is_new_badge = first_time_ever and first_time_this_session
-        s.shown_card_ids.add(next_id)
-        tags_list = [t for t in str(row[3] or "").split(",") if t]
-        await cb.message.edit_text(
-            html_card_message(row[0], row[1], row[2], is_new=is_new_badge, tags=tags_list),
+    s.current_card_id = next_id
+    card = (await get_catalog()).get(next_id)
+    if card is not None:
+        await edit_screen(
+            cb.message,
+            user_id,
+            await _card_text(user_id, card, s),
             reply_markup=today_card_kb(next_id),
         )
     await cb.answer()
@@ -435,20 +283,16 @@ async def on_round_repeat(cb: CallbackQuery) -> None:
     user_id = cb.from_user.id
     today = datetime.now(timezone.utc).date()
     # Load config and day state
-    async with get_db() as db:
+    cfg = await get_user_config(user_id)
+    async with get_read_db() as db:
         cur = await db.execute(
-            "SELECT daily_new_target, review_limit_per_day, pack_tags FROM user_config WHERE user_id=?",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-        cur2 = await db.execute(
             "SELECT served_review_count, shown_new_today FROM user_day_state WHERE user_id=? AND session_date=?",
             (user_id, today.isoformat()),
         )
-        ds = await cur2.fetchone()
-    daily_new_target = int(row[0]) if row else 8
-    review_limit = int(row[1]) if row else 35
-    pack_tags = (row[2] if row else "daily").split(",")
+        ds = await cur.fetchone()
+    daily_new_target = cfg.daily_new_target
+    review_limit = cfg.review_limit_per_day
+    pack_tags = cfg.pack_tag_list
     served_reviews = int(ds[0]) if ds else 0
     shown_new = int(ds[1]) if ds else 0
     review_remaining = max(0, review_limit - served_reviews)
@@ -457,8 +301,8 @@ async def on_round_repeat(cb: CallbackQuery) -> None:
     s = await store.get(user_id)
     s.queue = await build_round_queue(user_id, today, pack_tags, review_remaining, new_remaining)
     if not s.queue:
-        await cb.message.edit_text(
-            "Nothing left for today 🎉", reply_markup=round_end_keyboard()
+        await edit_screen(
+            cb.message, user_id, "Nothing left for today 🎉", reply_markup=round_end_keyboard()
         )
         await cb.answer()
         return
@@ -471,27 +315,15 @@ async def on_round_repeat(cb: CallbackQuery) -> None:
         await db.commit()
     # Show first card of new round
     next_id = s.queue.pop(0)
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT phrasal, meaning_en, examples_json, tags FROM cards WHERE id=?",
-            (next_id,),
-        )
-        row = await cur.fetchone()
-        cur2 = await db.execute(
-            "SELECT last_seen_at FROM progress WHERE user_id=? AND card_id=?",
-            (user_id, next_id),
-        )
-        prow = await cur2.fetchone()
-    if not row:
-        await cb.message.edit_text("Card not found.")
+    s.current_card_id = next_id
+    card = (await get_catalog()).get(next_id)
+    if card is None:
+        await edit_screen(cb.message, user_id, "Card not found.")
     else:
-        first_time_ever = prow is None or prow[0] is None
-        first_time_this_session = next_id not in s.shown_card_ids
-        is_new_badge = first_time_ever and first_time_this_session
-        s.shown_card_ids.add(next_id)
-        tags_list = [t for t in str(row[3] or "").split(",") if t]
-        await cb.message.edit_text(
-            html_card_message(row[0], row[1], row[2], is_new=is_new_badge, tags=tags_list),
+        await edit_screen(
+            cb.message,
+            user_id,
+            await _card_text(user_id, card, s),
             reply_markup=today_card_kb(next_id),
         )
     await cb.answer()
@@ -502,7 +334,7 @@ async def on_round_finish(cb: CallbackQuery) -> None:
     assert cb.from_user
     user_id = cb.from_user.id
     today = datetime.now(timezone.utc).date()
-    async with get_db() as db:
+    async with get_read_db() as db:
         cur = await db.execute(
             "SELECT good_today, again_today, shown_new_today, served_review_count FROM user_day_state WHERE user_id=? AND session_date=?",
             (user_id, today.isoformat()),
@@ -538,7 +370,7 @@ async def on_card_explain(cb: CallbackQuery) -> None:
     card_id = int(card_id_s)
 
     # Show loading in place
-    await cb.message.edit_text(format_explain_loading_html())
+    await edit_screen(cb.message, user_id, format_explain_loading_html())
 
     # Check cache
     from srsbot.db import get_explanation_cached, store_explanation
@@ -547,23 +379,17 @@ async def on_card_explain(cb: CallbackQuery) -> None:
     if cached is not None:
         from srsbot.formatters import markdown_to_html_telegram
         rendered = markdown_to_html_telegram(cached)
-        await cb.message.edit_text("\n".join(["<b>Explain</b>", "", rendered]), reply_markup=kb_explain_back(card_id))
+        await edit_screen(cb.message, user_id, "\n".join(["<b>Explain</b>", "", rendered]), reply_markup=kb_explain_back(card_id))
         await cb.answer()
         return
 
     # Load card to build prompt
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT phrasal, meaning_en, examples_json, tags FROM cards WHERE id=?",
-            (card_id,),
-        )
-        row = await cur.fetchone()
-    if not row:
-        await cb.message.edit_text(format_explain_error_html(), reply_markup=kb_explain_back(card_id))
+    card = (await get_catalog()).get(card_id)
+    if card is None:
+        await edit_screen(cb.message, user_id, format_explain_error_html(), reply_markup=kb_explain_back(card_id))
         await cb.answer()
         return
 
-    tags_list = [t for t in str(row[3] or "").split(",") if t]
     prompt = "\n".join(
         [
             "Explain the following card for an English learner who is not a native speaker.",
@@ -571,7 +397,7 @@ async def on_card_explain(cb: CallbackQuery) -> None:
             "Add helpful details to make the meaning easy to understand. Keep it concise.",
             "",
             "CARD:",
-            build_card_prompt_text(row[0], row[1], row[2], tags=tags_list),
+            build_card_prompt_text(card.phrasal, card.meaning_en, card.examples, tags=card.tags),
         ]
     )
 
@@ -580,10 +406,10 @@ async def on_card_explain(cb: CallbackQuery) -> None:
         await store_explanation(card_id, content)
         from srsbot.formatters import markdown_to_html_telegram
         rendered = markdown_to_html_telegram(content)
-        await cb.message.edit_text("\n".join(["<b>Explain</b>", "", rendered]), reply_markup=kb_explain_back(card_id))
+        await edit_screen(cb.message, user_id, "\n".join(["<b>Explain</b>", "", rendered]), reply_markup=kb_explain_back(card_id))
     except Exception as e:
         logger.exception("Failed to explain card", exc_info=e)
-        await cb.message.edit_text(format_explain_error_html(), reply_markup=kb_explain_back(card_id))
+        await edit_screen(cb.message, user_id, format_explain_error_html(), reply_markup=kb_explain_back(card_id))
     finally:
         await cb.answer()
 
@@ -597,27 +423,15 @@ async def on_card_explain_back(cb: CallbackQuery) -> None:
 
     # Re-render the same card view without changing SRS state
     s = await store.get(user_id)
-    async with get_db() as db:
-        cur = await db.execute(
-            "SELECT phrasal, meaning_en, examples_json, tags FROM cards WHERE id=?",
-            (card_id,),
-        )
-        row = await cur.fetchone()
-        cur2 = await db.execute(
-            "SELECT last_seen_at FROM progress WHERE user_id=? AND card_id=?",
-            (user_id, card_id),
-        )
-        prow = await cur2.fetchone()
-    if not row:
-        await cb.message.edit_text("Card not found.")
+    card = (await get_catalog()).get(card_id)
+    if card is None:
+        await edit_screen(cb.message, user_id, "Card not found.")
         await cb.answer()
         return
-    first_time_ever = prow is None or prow[0] is None
-    first_time_this_session = card_id not in s.shown_card_ids
-    is_new_badge = first_time_ever and first_time_this_session
-    tags_list = [t for t in str(row[3] or "").split(",") if t]
-    await cb.message.edit_text(
-        html_card_message(row[0], row[1], row[2], is_new=is_new_badge, tags=tags_list),
+    await edit_screen(
+        cb.message,
+        user_id,
+        await _card_text(user_id, card, s, mark_shown=False),
         reply_markup=today_card_kb(card_id),
     )
     await cb.answer()
@@ -99,6 +99,7 @@ def kb_settings_list() -> InlineKeyboardMarkup:
             [InlineKeyboardButton(text="🆕 Daily new cards", callback_data="ui:settings.input:daily_new_target")],
             [InlineKeyboardButton(text="🔁 Daily review cap", callback_data="ui:settings.input:review_limit_per_day")],
             [InlineKeyboardButton(text="⏰ Notification time", callback_data="ui:settings.input:push_time")],
+            [InlineKeyboardButton(text="🌍 Timezone", callback_data="ui:settings.input:tz")],
             [InlineKeyboardButton(text="🧩 Active packs", callback_data="ui:settings.packs")],
             [InlineKeyboardButton(text="↔️ In-round spacing", callback_data="ui:settings.input:intra_spacing_k")],
             [InlineKeyboardButton(text="📝 Quiz questions per session", callback_data="ui:settings.input:quiz_question_limit")],
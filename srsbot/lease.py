@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+"""SQLite-backed leases for running background jobs in a single process.
+
+Several bot processes may share one database. All of them serve updates, but
+only the holder of the "scheduler" lease runs the scheduler tick and the push
+outbox drainer. A lease is a row in `leases` with an expiry timestamp
+(wall clock, shared across processes). The holder renews it every heartbeat;
+if the holder dies, another process takes over once the lease has expired.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+from srsbot.config import SCHEDULER_LEASE_TTL_SECONDS
+from srsbot.db import get_db
+
+
+logger = logging.getLogger(__name__)
+
+
+def default_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class Lease:
+    def __init__(
+        self,
+        name: str,
+        holder: Optional[str] = None,
+        ttl: float = SCHEDULER_LEASE_TTL_SECONDS,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.name = name
+        self.holder = holder or default_holder()
+        self.ttl = ttl
+        self._clock = clock
+        self._held_until = 0.0
+
+    @property
+    def held(self) -> bool:
+        """True while our last successful acquire/renew has not expired."""
+        return self._clock() < self._held_until
+
+    async def try_acquire(self) -> bool:
+        """Acquire the lease, or renew it if we hold it. Atomic across processes."""
+        now = self._clock()
+        expires = now + self.ttl
+        async with get_db() as db:
+            cur = await db.execute(
+                """
+                INSERT INTO leases(name, holder, expires_at) VALUES(?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET holder=excluded.holder, expires_at=excluded.expires_at
+                WHERE leases.holder=excluded.holder OR leases.expires_at<=?
+                """,
+                (self.name, self.holder, expires, now),
+            )
+            acquired = cur.rowcount == 1
+            await db.commit()
+        self._held_until = expires if acquired else 0.0
+        return acquired
+
+    async def release(self) -> None:
+        self._held_until = 0.0
+        async with get_db() as db:
+            await db.execute("DELETE FROM leases WHERE name=? AND holder=?", (self.name, self.holder))
+            await db.commit()
+
+
+async def run_while_leader(
+    lease: Lease,
+    job: Callable[[], Awaitable[object]],
+    heartbeat: Optional[float] = None,
+) -> None:
+    """Run `job` only while holding `lease`; renew every heartbeat, stop on loss.
+
+    Never returns on its own; cancel it to release the lease.
+    """
+    heartbeat = heartbeat if heartbeat is not None else lease.ttl / 3
+    task: Optional[asyncio.Task[object]] = None
+    try:
+        while True:
+            try:
+                held = await lease.try_acquire()
+            except Exception:
+                logger.exception("lease %s: heartbeat failed", lease.name)
+                held = lease.held
+            if held and task is None:
+                logger.info("lease %s: acquired by %s", lease.name, lease.holder)
+                task = asyncio.create_task(job())
+            elif not held and task is not None:
+                logger.warning("lease %s: lost by %s, stopping jobs", lease.name, lease.holder)
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                task = None
+            elif task is not None and task.done():
+                # Job crashed; log and restart it on the next heartbeat
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error("lease %s: job failed", lease.name, exc_info=task.exception())
+                task = None
+            await asyncio.sleep(heartbeat)
+    finally:
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        with contextlib.suppress(Exception):
+            await lease.release()
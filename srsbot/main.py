@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 from contextlib import suppress
 
 from aiogram import Bot, Dispatcher, Router
@@ -9,16 +10,37 @@ from aiogram.enums import ParseMode
 from aiogram.filters import Command
 from aiogram.types import Message
 
+from srsbot.catalog import refresh_catalog, run_catalog_refresh_loop
+from srsbot.compaction import run_compaction_loop
 from srsbot.config import BOT_TOKEN
-from srsbot.db import init_db
+from srsbot.db import close_pool, init_db, open_pool
 from srsbot.handlers import menu, packs, settings, snooze, start, stats, today, quiz
-from srsbot.scheduler import daily_tick
+from srsbot.lease import Lease, run_while_leader
+from srsbot.middleware import PerUserSerialMiddleware
+from srsbot.outbox import drain_outbox, recover_outbox
+from srsbot.scheduler import run_scheduler_loop
+from srsbot.session import store as session_store
+from srsbot.ui_state import ui_state_cache
 
 
-async def run_scheduler(bot: Bot) -> None:
+logger = logging.getLogger(__name__)
+
+
+async def run_push_worker(bot: Bot) -> None:
+    await recover_outbox()
     while True:
-        await daily_tick(bot)
-        await asyncio.sleep(60)
+        result = await drain_outbox(bot)
+        if result.outcomes:
+            logger.info(
+                "push outbox: sent=%d blocked=%d bad_request=%d failed=%d retry_after=%d",
+                result.sent,
+                result.blocked,
+                result.bad_request,
+                result.failed,
+                result.retry_after,
+            )
+        else:
+            await asyncio.sleep(1)
 
 
 # Local router for simple, app-wide commands
@@ -30,8 +52,11 @@ async def main() -> None:
         raise RuntimeError("BOT_TOKEN is not set. Please configure .env")
 
     await init_db()
+    await open_pool()
+    await refresh_catalog()
     bot = Bot(BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
     dp = Dispatcher()
+    dp.update.outer_middleware(PerUserSerialMiddleware())
 
     # Built-in help
     dp.include_router(router)
@@ -45,13 +70,26 @@ async def main() -> None:
     dp.include_router(snooze.router)
     dp.include_router(quiz.router)
 
-    # Background scheduler
-    asyncio.create_task(run_scheduler(bot))
+    # Background scheduler (enqueues pushes), outbox delivery and answers
+    # compaction, run by whichever process holds the scheduler lease
+    async def background_jobs() -> None:
+        await asyncio.gather(run_scheduler_loop(), run_push_worker(bot), run_compaction_loop())
+
+    leader = asyncio.create_task(run_while_leader(Lease("scheduler"), background_jobs))
+    # Every process serves handlers from its own catalog copy, so all of them
+    # poll for re-seeded cards, not just the leader
+    catalog_refresher = asyncio.create_task(run_catalog_refresh_loop())
 
     try:
         await dp.start_polling(bot)
     finally:
+        leader.cancel()
+        catalog_refresher.cancel()
+        await asyncio.gather(leader, catalog_refresher, return_exceptions=True)
         await bot.session.close()
+        await ui_state_cache().close()
+        await session_store.close()
+        await close_pool()
 
 
 if __name__ == "__main__":
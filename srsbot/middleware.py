@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+"""Dispatcher middleware that processes each user's updates one at a time.
+
+Polling handles updates as concurrent tasks, so two quick taps from one user
+could interleave inside `on_ans` (answer writes, session queue). Updates from
+the same user wait on that user's lock in arrival order (asyncio locks are
+FIFO); different users still run in parallel. A lock is dropped as soon as no
+update of its user is running or waiting.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, User
+
+
+class PerUserSerialMiddleware(BaseMiddleware):
+    def __init__(self) -> None:
+        self._locks: Dict[int, asyncio.Lock] = {}
+        self._users: Dict[int, int] = {}  # updates running or waiting, per user
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        user: User | None = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        lock = self._locks.get(user.id)
+        if lock is None:
+            lock = self._locks[user.id] = asyncio.Lock()
+        self._users[user.id] = self._users.get(user.id, 0) + 1
+        try:
+            async with lock:
+                return await handler(event, data)
+        finally:
+            left = self._users.pop(user.id) - 1
+            if left:
+                self._users[user.id] = left
+            else:
+                del self._locks[user.id]
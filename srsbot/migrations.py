@@ -0,0 +1,454 @@
+from __future__ import annotations
+
+"""Ordered, schema-versioned migrations.
+
+Each migration runs exactly once per database; the applied versions are
+recorded in `schema_version`. `srsbot.db.init_db` calls `migrate` once at
+process start so request handlers never execute DDL.
+"""
+
+from typing import Awaitable, Callable
+
+import aiosqlite
+
+from srsbot.config import push_minute
+from srsbot.content import split_tags
+
+
+Migration = Callable[[aiosqlite.Connection], Awaitable[None]]
+
+
+async def _has_column(db: aiosqlite.Connection, table: str, column: str) -> bool:
+    cur = await db.execute(f"PRAGMA table_info({table})")
+    return any(str(r[1]) == column for r in await cur.fetchall())
+
+
+async def _add_column(db: aiosqlite.Connection, table: str, column: str, ddl: str) -> None:
+    if not await _has_column(db, table, column):
+        await db.execute(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}")
+
+
+async def _m001_baseline(db: aiosqlite.Connection) -> None:
+    """Initial schema (idempotent for databases created before versioning)."""
+    await db.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS cards (
+            id INTEGER PRIMARY KEY,
+            phrasal TEXT NOT NULL,
+            meaning_en TEXT NOT NULL,
+            examples_json TEXT NOT NULL,
+            tags TEXT,
+            sense_uid TEXT UNIQUE NOT NULL,
+            separable INTEGER NOT NULL DEFAULT 0,
+            intransitive INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS progress (
+            user_id INTEGER NOT NULL,
+            card_id INTEGER NOT NULL,
+            state TEXT NOT NULL CHECK(state IN ('learning','review')),
+            box INTEGER NOT NULL DEFAULT 0,
+            due_at DATE,
+            lapses INTEGER NOT NULL DEFAULT 0,
+            learning_good_count INTEGER NOT NULL DEFAULT 0,
+            last_answer TEXT,
+            last_seen_at DATETIME,
+            PRIMARY KEY(user_id, card_id)
+        );
+
+        CREATE INDEX IF NOT EXISTS idx_progress_user_due ON progress(user_id, due_at);
+        CREATE INDEX IF NOT EXISTS idx_progress_user_state ON progress(user_id, state);
+
+        CREATE TABLE IF NOT EXISTS user_config (
+            user_id INTEGER PRIMARY KEY,
+            daily_new_target INTEGER NOT NULL DEFAULT 8,
+            review_limit_per_day INTEGER NOT NULL DEFAULT 35,
+            push_time TEXT NOT NULL DEFAULT '09:00',
+            pack_tags TEXT NOT NULL DEFAULT 'daily',
+            intra_spacing_k INTEGER NOT NULL DEFAULT 3,
+            quiz_question_limit INTEGER NOT NULL DEFAULT 10
+        );
+
+        -- Additional lightweight state for scheduling and stats
+        CREATE TABLE IF NOT EXISTS user_state (
+            user_id INTEGER PRIMARY KEY,
+            last_notified_date DATE,
+            snoozed_until DATETIME,
+            streak_days INTEGER NOT NULL DEFAULT 0
+        );
+
+        CREATE TABLE IF NOT EXISTS answers (
+            user_id INTEGER NOT NULL,
+            card_id INTEGER NOT NULL,
+            answer TEXT NOT NULL CHECK(answer IN ('again','good')),
+            ts DATETIME NOT NULL DEFAULT (datetime('now')),
+            is_new INTEGER NOT NULL DEFAULT 0,
+            tags TEXT
+        );
+
+        -- Per-day state for rounds and counters
+        CREATE TABLE IF NOT EXISTS user_day_state (
+            user_id INTEGER NOT NULL,
+            session_date TEXT NOT NULL,
+            round_index INTEGER NOT NULL DEFAULT 1,
+            served_review_count INTEGER NOT NULL DEFAULT 0,
+            shown_new_today INTEGER NOT NULL DEFAULT 0,
+            good_today INTEGER NOT NULL DEFAULT 0,
+            again_today INTEGER NOT NULL DEFAULT 0,
+            round_card_ids_json TEXT,
+            review_seen_ids_json TEXT,
+            new_seen_ids_json TEXT,
+            PRIMARY KEY (user_id, session_date)
+        );
+        CREATE INDEX IF NOT EXISTS ix_user_day_state_user_date ON user_day_state(user_id, session_date);
+
+        -- UI state for inline navigation and message cleanup
+        CREATE TABLE IF NOT EXISTS user_ui_state (
+            user_id INTEGER PRIMARY KEY,
+            last_ui_message_id INTEGER,
+            current_screen TEXT,
+            awaiting_input_field TEXT,
+            quiz_state_json TEXT
+        );
+
+        -- Cache for Explain feature
+        CREATE TABLE IF NOT EXISTS explain_cache (
+            card_id INTEGER PRIMARY KEY,
+            content TEXT NOT NULL,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        );
+        """
+    )
+
+
+async def _m002_legacy_columns(db: aiosqlite.Connection) -> None:
+    """Columns that older databases may lack (formerly ad-hoc ALTERs in init_db)."""
+    await _add_column(db, "user_ui_state", "awaiting_input_field", "TEXT")
+    await _add_column(db, "user_ui_state", "quiz_state_json", "TEXT")
+    await _add_column(
+        db, "user_config", "quiz_question_limit", "INTEGER NOT NULL DEFAULT 10"
+    )
+
+
+async def _m003_catalog_version(db: aiosqlite.Connection) -> None:
+    """Version stamp for the in-memory card catalog, bumped on any cards change."""
+    await db.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS catalog_version (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO catalog_version(id, version) VALUES (1, 1);
+
+        CREATE TRIGGER IF NOT EXISTS trg_cards_version_ins AFTER INSERT ON cards
+        BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_cards_version_upd AFTER UPDATE ON cards
+        BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;
+        CREATE TRIGGER IF NOT EXISTS trg_cards_version_del AFTER DELETE ON cards
+        BEGIN UPDATE catalog_version SET version = version + 1 WHERE id = 1; END;
+        """
+    )
+
+
+async def _m004_card_tags(db: aiosqlite.Connection) -> None:
+    """Normalized (card_id, tag) pairs indexed by tag, backfilled from cards.tags."""
+    await db.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS card_tags (
+            card_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (card_id, tag)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS ix_card_tags_tag_card ON card_tags(tag, card_id);
+
+        CREATE TRIGGER IF NOT EXISTS trg_cards_tags_del AFTER DELETE ON cards
+        BEGIN DELETE FROM card_tags WHERE card_id = OLD.id; END;
+        """
+    )
+    cur = await db.execute("SELECT id, tags FROM cards")
+    pairs = [(int(r[0]), t) for r in await cur.fetchall() for t in split_tags(r[1])]
+    await db.executemany("INSERT OR IGNORE INTO card_tags(card_id, tag) VALUES (?, ?)", pairs)
+
+
+async def _m005_user_frontier(db: aiosqlite.Connection) -> None:
+    """Persisted per-user count of never-answered cards (see srsbot.frontier)."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS user_frontier (
+            user_id INTEGER PRIMARY KEY,
+            catalog_version INTEGER NOT NULL,
+            unseen_count INTEGER NOT NULL
+        )
+        """
+    )
+
+
+async def _m006_push_minute(db: aiosqlite.Connection) -> None:
+    """Indexed push minute so the scheduler tick only reads users due now."""
+    await _add_column(db, "user_config", "push_minute_utc", "INTEGER NOT NULL DEFAULT 540")
+    if await _has_column(db, "user_config", "push_time"):
+        cur = await db.execute("SELECT user_id, push_time FROM user_config")
+        rows = [(push_minute(r[1]), int(r[0])) for r in await cur.fetchall()]
+        await db.executemany("UPDATE user_config SET push_minute_utc=? WHERE user_id=?", rows)
+    await db.execute(
+        "CREATE INDEX IF NOT EXISTS ix_user_config_push_minute ON user_config(push_minute_utc)"
+    )
+    if await _has_column(db, "user_state", "snoozed_until"):
+        await db.execute(
+            "CREATE INDEX IF NOT EXISTS ix_user_state_snoozed_until ON user_state(snoozed_until)"
+        )
+
+
+async def _m007_push_outbox(db: aiosqlite.Connection) -> None:
+    """Durable queue of pushes between the scheduler tick and delivery."""
+    await db.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS push_outbox (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            push_date TEXT NOT NULL,
+            text TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending'
+                CHECK(status IN ('pending','sending','sent','failed')),
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TEXT NOT NULL,
+            last_error TEXT,
+            created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            sent_at TEXT,
+            UNIQUE (user_id, push_date)
+        );
+        CREATE INDEX IF NOT EXISTS ix_push_outbox_status_next ON push_outbox(status, next_attempt_at);
+        """
+    )
+
+
+async def _m008_user_timezone(db: aiosqlite.Connection) -> None:
+    """Per-user timezone (NULL = DEFAULT_TZ) and scheduler job bookkeeping.
+
+    Push buckets stored so far assumed UTC; they are recomputed from the local
+    push time on the next scheduler tick.
+    """
+    await _add_column(db, "user_config", "tz", "TEXT")
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS scheduler_state (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+    )
+
+
+async def _m009_leases(db: aiosqlite.Connection) -> None:
+    """Named leases with expiry, for single-process background jobs."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """
+    )
+
+
+async def _m010_session_snapshots(db: aiosqlite.Connection) -> None:
+    """Snapshots of in-memory Today sessions, restored after a restart or eviction."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS session_snapshots (
+            user_id INTEGER PRIMARY KEY,
+            session_date TEXT NOT NULL,
+            queue BLOB NOT NULL,
+            shown_ids BLOB NOT NULL,
+            shown INTEGER NOT NULL DEFAULT 0,
+            good INTEGER NOT NULL DEFAULT 0,
+            consecutive_good INTEGER NOT NULL DEFAULT 0,
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+        """
+    )
+
+
+async def _m011_day_seen(db: aiosqlite.Connection) -> None:
+    """Cards first served per user and day, replacing the JSON seen-id columns."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS day_seen (
+            user_id INTEGER NOT NULL,
+            session_date TEXT NOT NULL,
+            kind TEXT NOT NULL CHECK (kind IN ('review','new')),
+            card_id INTEGER NOT NULL,
+            PRIMARY KEY (user_id, session_date, kind, card_id)
+        ) WITHOUT ROWID
+        """
+    )
+    await db.execute("CREATE INDEX IF NOT EXISTS ix_day_seen_date ON day_seen(session_date)")
+    for kind, column in (("review", "review_seen_ids_json"), ("new", "new_seen_ids_json")):
+        await db.execute(
+            f"""
+            INSERT OR IGNORE INTO day_seen(user_id, session_date, kind, card_id)
+            SELECT d.user_id, d.session_date, '{kind}', j.value
+            FROM user_day_state d, json_each(d.{column}) j
+            WHERE json_valid(d.{column}) AND j.type='integer'
+            """
+        )
+    await db.execute("UPDATE user_day_state SET review_seen_ids_json=NULL, new_seen_ids_json=NULL")
+
+
+async def _m012_daily_user_stats(db: aiosqlite.Connection) -> None:
+    """Per-user, per-UTC-day answer counters maintained with each answer.
+
+    Answers logged before this migration are rolled up by
+    `db.backfill_daily_user_stats`; the highest such rowid is recorded here so
+    the backfill never double counts answers the live path already counted.
+    """
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS daily_user_stats (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            shown INTEGER NOT NULL DEFAULT 0,
+            good INTEGER NOT NULL DEFAULT 0,
+            again INTEGER NOT NULL DEFAULT 0,
+            new_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID
+        """
+    )
+    await db.execute(
+        "INSERT OR IGNORE INTO scheduler_state(key, value) "
+        "SELECT 'daily_stats_backfill_upto', COALESCE(MAX(rowid), 0) FROM answers"
+    )
+
+
+async def _m013_answer_daily_card(db: aiosqlite.Connection) -> None:
+    """Per-user, per-day, per-card answer counts that compacted answers roll into."""
+    await db.execute(
+        """
+        CREATE TABLE IF NOT EXISTS answer_daily_card (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            card_id INTEGER NOT NULL,
+            good INTEGER NOT NULL DEFAULT 0,
+            again INTEGER NOT NULL DEFAULT 0,
+            new_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, day, card_id)
+        ) WITHOUT ROWID
+        """
+    )
+
+
+async def _m014_due_forecast(db: aiosqlite.Connection) -> None:
+    """Review cards due per user and day, kept in step with `progress` by triggers."""
+    await db.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS due_forecast (
+            user_id INTEGER NOT NULL,
+            day TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (user_id, day)
+        ) WITHOUT ROWID;
+
+        CREATE TRIGGER IF NOT EXISTS trg_progress_forecast_ins AFTER INSERT ON progress
+        WHEN new.state='review' AND new.due_at IS NOT NULL
+        BEGIN
+            INSERT INTO due_forecast(user_id, day, count) VALUES (new.user_id, new.due_at, 1)
+            ON CONFLICT(user_id, day) DO UPDATE SET count=count+1;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_progress_forecast_del AFTER DELETE ON progress
+        WHEN old.state='review' AND old.due_at IS NOT NULL
+        BEGIN
+            UPDATE due_forecast SET count=count-1 WHERE user_id=old.user_id AND day=old.due_at;
+            DELETE FROM due_forecast WHERE user_id=old.user_id AND day=old.due_at AND count<=0;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_progress_forecast_upd AFTER UPDATE OF user_id, state, due_at ON progress
+        WHEN old.user_id IS NOT new.user_id OR old.state IS NOT new.state OR old.due_at IS NOT new.due_at
+        BEGIN
+            UPDATE due_forecast SET count=count-1
+            WHERE user_id=old.user_id AND day=old.due_at AND old.state='review';
+            DELETE FROM due_forecast WHERE user_id=old.user_id AND day=old.due_at AND count<=0;
+            INSERT INTO due_forecast(user_id, day, count)
+            SELECT new.user_id, new.due_at, 1 WHERE new.state='review' AND new.due_at IS NOT NULL
+            ON CONFLICT(user_id, day) DO UPDATE SET count=count+1;
+        END;
+        """
+    )
+    await db.execute(
+        "INSERT OR IGNORE INTO due_forecast(user_id, day, count) "
+        "SELECT user_id, due_at, COUNT(*) FROM progress "
+        "WHERE state='review' AND due_at IS NOT NULL GROUP BY user_id, due_at"
+    )
+
+
+# cards.tags split on commas as a JSON array; blank parts are skipped by the caller
+_TAGS_JSON = (
+    "'[\"' || replace(replace(replace(replace(replace(replace(COALESCE(new.tags, ''), "
+    "'\\', '\\\\'), '\"', '\\\"'), char(9), ' '), char(10), ' '), char(13), ' '), ',', '\",\"') || '\"]'"
+)
+
+
+async def _m015_card_tags_sync(db: aiosqlite.Connection) -> None:
+    """Keep `card_tags` in step with inserts and `tags` updates on `cards`.
+
+    Mirrors `content.split_tags` in SQL (comma split, trim, lowercase, dedupe)
+    so rows written outside `db.set_card_tags` are indexed too.
+    """
+    select_tags = (
+        f"SELECT new.id, lower(trim(value)) FROM json_each({_TAGS_JSON}) WHERE trim(value) <> ''"
+    )
+    await db.executescript(
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_cards_tags_ins AFTER INSERT ON cards
+        BEGIN
+            INSERT OR IGNORE INTO card_tags(card_id, tag) {select_tags};
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_cards_tags_upd AFTER UPDATE OF id, tags ON cards
+        BEGIN
+            DELETE FROM card_tags WHERE card_id = old.id;
+            INSERT OR IGNORE INTO card_tags(card_id, tag) {select_tags};
+        END;
+        """
+    )
+
+
+MIGRATIONS: list[tuple[int, Migration]] = [
+    (1, _m001_baseline),
+    (2, _m002_legacy_columns),
+    (3, _m003_catalog_version),
+    (4, _m004_card_tags),
+    (5, _m005_user_frontier),
+    (6, _m006_push_minute),
+    (7, _m007_push_outbox),
+    (8, _m008_user_timezone),
+    (9, _m009_leases),
+    (10, _m010_session_snapshots),
+    (11, _m011_day_seen),
+    (12, _m012_daily_user_stats),
+    (13, _m013_answer_daily_card),
+    (14, _m014_due_forecast),
+    (15, _m015_card_tags_sync),
+]
+
+
+async def current_version(db: aiosqlite.Connection) -> int:
+    await db.execute(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    )
+    cur = await db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version")
+    row = await cur.fetchone()
+    return int(row[0]) if row else 0
+
+
+async def migrate(db: aiosqlite.Connection) -> int:
+    """Apply pending migrations in order and return the resulting schema version."""
+    version = await current_version(db)
+    for v, fn in MIGRATIONS:
+        if v <= version:
+            continue
+        await fn(db)
+        await db.execute("INSERT INTO schema_version(version) VALUES (?)", (v,))
+        await db.commit()
+        version = v
+    await db.commit()
+    return version
@@ -41,4 +41,10 @@ class UserConfig:
     push_time: str
     pack_tags: str
     intra_spacing_k: int
+    quiz_question_limit: int = 10
+    tz: Optional[str] = None  # IANA name; None means config.DEFAULT_TZ
+
+    @property
+    def pack_tag_list(self) -> list[str]:
+        return [t.strip() for t in self.pack_tags.split(",") if t.strip()]
 
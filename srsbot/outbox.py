@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+"""Durable push outbox.
+
+The scheduler tick only enqueues rows into `push_outbox` (at most one per user
+and day, enforced by a unique key), so a slow Telegram API never delays the
+next minute's scan. `drain_outbox` claims pending rows in batches, delivers
+them through `PushDispatcher`, and records the result with an attempt count.
+Transient failures are retried with exponential backoff. A row that was mid-send
+when the process died is marked failed, never re-sent, so a restart cannot
+produce a duplicate push. Pending rows that a newer day's row of the same user
+superseded, or that are more than a day old, expire instead of being sent
+late. Sent and failed rows are pruned daily by the scheduler.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Optional
+
+from aiogram import Bot
+
+from srsbot.config import OUTBOX_BACKOFF_SECONDS, OUTBOX_BATCH_SIZE, OUTBOX_MAX_ATTEMPTS
+from srsbot.db import get_db, get_read_db
+from srsbot.push import DispatchStats, PushDispatcher, PushMessage
+
+
+@dataclass(frozen=True)
+class OutboxItem:
+    user_id: int
+    push_date: str  # UTC YYYY-MM-DD of the scheduler bucket that queued the push
+    text: str
+
+
+def _ts(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).isoformat(timespec="seconds")
+
+
+def backoff_delay(attempts: int) -> timedelta:
+    """Delay before retry number `attempts` (1-based): base, 2x, 4x, ..."""
+    return timedelta(seconds=OUTBOX_BACKOFF_SECONDS * 2 ** max(0, attempts - 1))
+
+
+async def enqueue_pushes(items: Iterable[OutboxItem], now: Optional[datetime] = None) -> int:
+    """Insert pending rows in bulk; already-queued (user, day) pairs are ignored."""
+    ts = _ts(now or datetime.now(timezone.utc))
+    rows = [(i.user_id, i.push_date, i.text, ts) for i in items]
+    if not rows:
+        return 0
+    async with get_db() as db:
+        before = db.total_changes
+        await db.executemany(
+            "INSERT OR IGNORE INTO push_outbox(user_id, push_date, text, next_attempt_at) VALUES(?,?,?,?)",
+            rows,
+        )
+        added = db.total_changes - before
+        await db.commit()
+    return added
+
+
+async def recover_outbox() -> int:
+    """Mark rows left in 'sending' by a crashed process as failed (no resend)."""
+    async with get_db() as db:
+        cur = await db.execute(
+            "UPDATE push_outbox SET status='failed', last_error='interrupted' WHERE status='sending'"
+        )
+        await db.commit()
+        return cur.rowcount
+
+
+# push_date is the UTC date of the scheduler minute bucket that queued the row
+# (daily_tick), not the user's local date. A row from the previous UTC day can
+# still be a live retry (a 23:59 bucket backing off past midnight), so only
+# rows two or more UTC days old expire, plus any row a newer day's row of the
+# same user superseded. Revisit the cutoff if push_date ever becomes local.
+_EXPIRE_SQL = """
+UPDATE push_outbox SET status='failed', last_error='expired'
+WHERE status='pending' AND (
+    push_date < ?
+    OR EXISTS (
+        SELECT 1 FROM push_outbox n
+        WHERE n.user_id=push_outbox.user_id AND n.push_date>push_outbox.push_date
+    )
+)
+"""
+
+
+async def _claim(batch_size: int, now: datetime) -> list[tuple[int, int, str, str, int]]:
+    async with get_db() as db:
+        cutoff = now.astimezone(timezone.utc).date() - timedelta(days=1)
+        await db.execute(_EXPIRE_SQL, (cutoff.isoformat(),))
+        cur = await db.execute(
+            """
+            UPDATE push_outbox SET status='sending', attempts=attempts+1
+            WHERE id IN (
+                SELECT id FROM push_outbox
+                WHERE status='pending' AND next_attempt_at<=?
+                ORDER BY next_attempt_at, id LIMIT ?
+            )
+            RETURNING id, user_id, push_date, text, attempts
+            """,
+            (_ts(now), batch_size),
+        )
+        rows = [(int(r[0]), int(r[1]), str(r[2]), str(r[3]), int(r[4])) for r in await cur.fetchall()]
+        await db.commit()
+    return rows
+
+
+async def drain_outbox(
+    bot: Bot,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+    dispatcher: Optional[PushDispatcher] = None,
+    now: Optional[datetime] = None,
+) -> DispatchStats:
+    """Deliver one batch of due outbox rows and record the outcomes."""
+    now = now or datetime.now(timezone.utc)
+    claimed = await _claim(batch_size, now)
+    if not claimed:
+        return DispatchStats()
+    stats = await (dispatcher or PushDispatcher(bot)).dispatch(
+        PushMessage(user_id, text, key=row_id) for row_id, user_id, _, text, _ in claimed
+    )
+    sent: list[tuple[str, int]] = []
+    notified: list[tuple[str, int]] = []
+    retry: list[tuple[str, str, int]] = []
+    dead: list[tuple[str, int]] = []
+    for row_id, user_id, push_date, _, attempts in claimed:
+        outcome = stats.outcomes.get(row_id, "failed")
+        if outcome == "sent":
+            sent.append((_ts(now), row_id))
+            notified.append((push_date, user_id))
+        elif outcome == "failed" and attempts < OUTBOX_MAX_ATTEMPTS:
+            retry.append((_ts(now + backoff_delay(attempts)), outcome, row_id))
+        else:
+            dead.append((outcome, row_id))
+    async with get_db() as db:
+        await db.executemany(
+            "UPDATE push_outbox SET status='sent', sent_at=?, last_error=NULL WHERE id=?", sent
+        )
+        await db.executemany(
+            "UPDATE push_outbox SET status='pending', next_attempt_at=?, last_error=? WHERE id=?", retry
+        )
+        await db.executemany("UPDATE push_outbox SET status='failed', last_error=? WHERE id=?", dead)
+        await db.executemany(
+            "INSERT INTO user_state(user_id, last_notified_date) VALUES(?, ?) "
+            "ON CONFLICT(user_id) DO UPDATE SET last_notified_date=excluded.last_notified_date "
+            "WHERE last_notified_date IS NULL OR last_notified_date<excluded.last_notified_date",
+            [(user_id, push_date) for push_date, user_id in notified],
+        )
+        await db.commit()
+    return stats
+
+
+async def prune_outbox(before: date) -> int:
+    """Delete sent and failed rows whose push date is before `before`."""
+    async with get_db() as db:
+        cur = await db.execute(
+            "DELETE FROM push_outbox WHERE status IN ('sent','failed') AND push_date<?",
+            (before.isoformat(),),
+        )
+        await db.commit()
+        return cur.rowcount
+
+
+async def outbox_counts() -> dict[str, int]:
+    """Row counts per status (pending, sending, sent, failed)."""
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT status, COUNT(*) FROM push_outbox GROUP BY status")
+        return {str(r[0]): int(r[1]) for r in await cur.fetchall()}
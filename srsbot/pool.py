@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+"""Long-lived aiosqlite connection pool.
+
+SQLite allows a single writer at a time, so the pool keeps one writer
+connection (checked out exclusively) and a small set of reader connections.
+Connections are opened once at startup and reused for every update instead of
+spawning a fresh aiosqlite worker thread per query.
+"""
+
+import asyncio
+import contextlib
+from dataclasses import dataclass
+from typing import AsyncIterator
+
+import aiosqlite
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    checkouts: int
+    waits: int
+    in_use: int
+
+
+async def connect(path: str) -> aiosqlite.Connection:
+    """Open a connection configured the way the bot expects (Row factory, busy timeout)."""
+    db = await aiosqlite.connect(path)
+    db.row_factory = aiosqlite.Row
+    await db.execute("PRAGMA busy_timeout=5000")
+    return db
+
+
+class ConnectionPool:
+    def __init__(self, path: str, readers: int = 4) -> None:
+        self.path = path
+        self.readers = max(1, readers)
+        self._idle_readers: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._idle_writer: asyncio.Queue[aiosqlite.Connection] = asyncio.Queue()
+        self._all: list[aiosqlite.Connection] = []
+        self._checkouts = 0
+        self._waits = 0
+        self._in_use = 0
+
+    async def open(self) -> None:
+        writer = await connect(self.path)
+        self._all.append(writer)
+        self._idle_writer.put_nowait(writer)
+        for _ in range(self.readers):
+            conn = await connect(self.path)
+            self._all.append(conn)
+            self._idle_readers.put_nowait(conn)
+
+    async def close(self) -> None:
+        conns, self._all = self._all, []
+        for conn in conns:
+            with contextlib.suppress(Exception):
+                await conn.close()
+
+    @property
+    def connections(self) -> list[aiosqlite.Connection]:
+        return list(self._all)
+
+    def stats(self) -> PoolStats:
+        return PoolStats(checkouts=self._checkouts, waits=self._waits, in_use=self._in_use)
+
+    @contextlib.asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with self._checkout(self._idle_readers) as db:
+            yield db
+
+    @contextlib.asynccontextmanager
+    async def writer(self) -> AsyncIterator[aiosqlite.Connection]:
+        async with self._checkout(self._idle_writer) as db:
+            yield db
+
+    @contextlib.asynccontextmanager
+    async def _checkout(
+        self, idle: asyncio.Queue[aiosqlite.Connection]
+    ) -> AsyncIterator[aiosqlite.Connection]:
+        if idle.empty():
+            self._waits += 1
+        db = await idle.get()
+        self._checkouts += 1
+        self._in_use += 1
+        try:
+            yield db
+        finally:
+            # Never hand out a connection with a half-finished transaction
+            if db.in_transaction:
+                with contextlib.suppress(Exception):
+                    await db.rollback()
+            self._in_use -= 1
+            idle.put_nowait(db)
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+"""Rate-limited, concurrent push delivery.
+
+`PushDispatcher` sends a batch of push messages through a small pool of
+workers. Every send first takes a token from a global `TokenBucket` sized to
+Telegram's bulk-broadcast limit (about 30 messages per second per bot). A
+`TelegramRetryAfter` (HTTP 429) pauses the whole bucket for the requested
+time and puts the message back on the queue instead of dropping it.
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Iterable, Literal
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+
+from srsbot.config import PUSH_CONCURRENCY, PUSH_MAX_ATTEMPTS, PUSH_RATE_PER_SEC
+
+
+Outcome = Literal["sent", "blocked", "bad_request", "failed"]
+
+
+class TokenBucket:
+    """Token bucket with a global pause for flood-wait responses."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds` (e.g. after a RetryAfter)."""
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = self._clock()
+                if now < self._paused_until:
+                    await self._sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await self._sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(frozen=True)
+class PushMessage:
+    chat_id: int
+    text: str
+    key: int | None = None  # outcome key; defaults to chat_id
+
+
+@dataclass
+class DispatchStats:
+    sent: int = 0
+    blocked: int = 0  # user blocked the bot / chat gone (403)
+    bad_request: int = 0
+    failed: int = 0  # other errors, or retries exhausted
+    retry_after: int = 0  # 429 responses seen
+    retried: int = 0  # re-queued sends after a transient error
+    outcomes: dict[int, Outcome] = field(default_factory=dict)  # by message key
+
+
+class PushDispatcher:
+    def __init__(
+        self,
+        bot: Bot,
+        rate: float = PUSH_RATE_PER_SEC,
+        concurrency: int = PUSH_CONCURRENCY,
+        max_attempts: int = PUSH_MAX_ATTEMPTS,
+        bucket: TokenBucket | None = None,
+    ) -> None:
+        self.bot = bot
+        self.concurrency = max(1, concurrency)
+        self.max_attempts = max(1, max_attempts)
+        self.bucket = bucket or TokenBucket(rate)
+
+    async def dispatch(self, messages: Iterable[PushMessage]) -> DispatchStats:
+        """Send all messages; return per-outcome counters and outcomes per message key."""
+        stats = DispatchStats()
+        queue: asyncio.Queue[tuple[PushMessage, int]] = asyncio.Queue()
+        for m in messages:
+            queue.put_nowait((m, 1))
+        if queue.empty():
+            return stats
+        workers = [
+            asyncio.create_task(self._worker(queue, stats))
+            for _ in range(min(self.concurrency, queue.qsize()))
+        ]
+        await queue.join()
+        for w in workers:
+            w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        return stats
+
+    async def _worker(
+        self, queue: asyncio.Queue[tuple[PushMessage, int]], stats: DispatchStats
+    ) -> None:
+        while True:
+            msg, attempt = await queue.get()
+            try:
+                await self._send_one(queue, stats, msg, attempt)
+            finally:
+                queue.task_done()
+
+    async def _send_one(
+        self,
+        queue: asyncio.Queue[tuple[PushMessage, int]],
+        stats: DispatchStats,
+        msg: PushMessage,
+        attempt: int,
+    ) -> None:
+        await self.bucket.acquire()
+        outcome: Outcome
+        try:
+            await self.bot.send_message(chat_id=msg.chat_id, text=msg.text)
+            outcome = "sent"
+        except TelegramRetryAfter as e:
+            stats.retry_after += 1
+            self.bucket.pause(float(e.retry_after))
+            if attempt < self.max_attempts:
+                stats.retried += 1
+                queue.put_nowait((msg, attempt + 1))
+                return
+            outcome = "failed"
+        except TelegramForbiddenError:
+            outcome = "blocked"
+        except TelegramBadRequest:
+            outcome = "bad_request"
+        except Exception:
+            if attempt < self.max_attempts:
+                stats.retried += 1
+                queue.put_nowait((msg, attempt + 1))
+                return
+            outcome = "failed"
+        setattr(stats, outcome, getattr(stats, outcome) + 1)
+        stats.outcomes[msg.chat_id if msg.key is None else msg.key] = outcome
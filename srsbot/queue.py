@@ -3,10 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import date, timedelta
 import random
-from typing import Iterable, Sequence
+from typing import Iterable, Iterator, Sequence
 
-from srsbot.content import NewCard, select_new_cards
-from srsbot.db import get_db
+from srsbot.catalog import get_catalog
+from srsbot.config import NEW_SAMPLE_WINDOW
+from srsbot.content import NewCard, normalize_pack_tags, select_new_cards
+from srsbot.db import get_read_db
+from srsbot.frontier import get_frontier
 
 
 @dataclass(frozen=True)
@@ -64,9 +67,94 @@ def build_daily_queue_view(
     return learning + reviews + new
 
 
-async def compute_daily_candidates(user_id: int, today: date) -> tuple[list[Item], list[Item], list[NewCard]]:
-    """Compute learning due, reviews due (all), and new candidates (without limits)."""
-    async with get_db() as db:
+def _random_positions(n: int) -> Iterator[int]:
+    """Yield 0..n-1 in uniformly random order without materializing it up front.
+
+    Positions are drawn with rejection while fewer than half were taken (a pick
+    usually needs only a few); the untried rest is then shuffled.
+    """
+    taken: set[int] = set()
+    while len(taken) < n // 2:
+        i = random.randrange(n)
+        if i not in taken:
+            taken.add(i)
+            yield i
+    rest = [i for i in range(n) if i not in taken]
+    random.shuffle(rest)
+    yield from rest
+
+
+async def sample_new_cards(
+    user_id: int,
+    pack_tags: Sequence[str],
+    limit: int,
+    exclude: Iterable[int] = (),
+) -> list[NewCard]:
+    """Pick up to `limit` unseen cards from the packs without loading every candidate.
+
+    Draws the packs' card ids at random positions (each id at most once),
+    skipping cards set in the user's seen-bitmap frontier. Each window of unseen
+    cards goes through `select_new_cards`, so the one-sense-per-phrasal rule
+    holds across windows.
+
+    This runs in memory, not as bounded SQL windows over `card_tags`: the pack
+    filter is the catalog's `ids_for_packs` (read from `card_tags` in index
+    order only when the catalog loads) and "unseen" is the frontier bitmap, so
+    no query runs per pick and `ix_card_tags_tag_card` is not used at
+    selection time. Cost grows with the picks and the seen share of the
+    packs, not with catalog size (see scripts/bench_new_card_sampling.py).
+    """
+    if limit <= 0:
+        return []
+    tags = normalize_pack_tags(pack_tags)
+    catalog = await get_catalog()
+    ids = catalog.ids_for_packs(tags)
+    if not ids:
+        return []
+    frontier = await get_frontier(user_id)
+    excluded = set(exclude)
+    size = max(NEW_SAMPLE_WINDOW, limit * 4)
+    picked: list[NewCard] = []
+    phrasals: set[str] = set()
+    senses: set[str] = set()
+    window: list[NewCard] = []
+
+    def take_window() -> None:
+        for nc in select_new_cards(window, tags, limit - len(picked)):
+            picked.append(nc)
+            phrasals.add(nc.phrasal)
+            senses.add(nc.sense_uid)
+        window.clear()
+
+    for pos in _random_positions(len(ids)):
+        cid = ids[pos]
+        if cid in excluded or frontier.is_seen(cid):
+            continue
+        c = catalog.get(cid)
+        if c is None or c.phrasal in phrasals or c.sense_uid in senses:
+            continue
+        window.append(NewCard(id=c.id, phrasal=c.phrasal, sense_uid=c.sense_uid, tags=list(c.tags)))
+        if len(window) >= size:
+            take_window()
+            if len(picked) >= limit:
+                break
+    if window and len(picked) < limit:
+        take_window()
+    return picked
+
+
+async def compute_daily_candidates(
+    user_id: int,
+    today: date,
+    pack_tags: Sequence[str] = (),
+    new_limit: int = 0,
+) -> tuple[list[Item], list[Item], list[NewCard]]:
+    """Compute learning due, reviews due (all), and up to `new_limit` sampled new cards.
+
+    New cards come from `sample_new_cards`, restricted to `pack_tags`
+    (an empty selection means all packs).
+    """
+    async with get_read_db() as db:
         # Learning due: any learning state for user
         cur = await db.execute(
             "SELECT card_id FROM progress WHERE user_id=? AND state='learning'",
@@ -81,23 +169,9 @@ async def compute_daily_candidates(user_id: int, today: date) -> tuple[list[Item
         )
         reviews = [Item(int(r[0]), "review", today) for r in await cur.fetchall()]
 
-        # New candidates: cards without progress for this user
-        cur = await db.execute(
-            """
-            SELECT c.id, c.phrasal, c.sense_uid, c.tags FROM cards c
-            LEFT JOIN progress p ON p.card_id=c.id AND p.user_id=?
-            WHERE p.card_id IS NULL
-            """,
-            (user_id,),
-        )
-        new_rows = await cur.fetchall()
-        new_candidates = [
-            NewCard(id=int(r[0]), phrasal=str(r[1]), sense_uid=str(r[2]), tags=[t for t in (str(r[3] or "").split(",")) if t])
-            for r in new_rows
-        ]
-
+    new_cards = await sample_new_cards(user_id, pack_tags, new_limit)
     learning = [Item(cid, "learning") for cid in learning_ids]
-    return learning, reviews, new_candidates
+    return learning, reviews, new_cards
 
 
 async def build_round_queue(
@@ -108,9 +182,10 @@ async def build_round_queue(
     new_remaining: int,
 ) -> list[int]:
     """Build a single round queue snapshot: learning -> limited reviews -> limited new."""
-    learning, reviews_all, new_candidates = await compute_daily_candidates(user_id, today)
+    learning, reviews_all, picked_new = await compute_daily_candidates(
+        user_id, today, pack_tags, new_limit=max(0, new_remaining)
+    )
     reviews = list(reviews_all[: max(0, review_remaining)])
-    picked_new = select_new_cards(new_candidates, pack_tags, limit=max(0, new_remaining))
     # Shuffle inside buckets
     random.shuffle(learning)
     random.shuffle(reviews)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+"""Spread overdue review backlogs over the coming days.
+
+A user back from a break can have far more reviews due than
+`review_limit_per_day`. Only the cap is served each day anyway, so the rest
+is moved forward: the oldest `limit` cards stay due today and the remainder,
+oldest first, fills the free room of the next REBALANCE_MAX_DAYS days, i.e.
+`limit` minus the reviews the forecast already has due there. A full day is
+skipped, so moved cards never push a day over the cap (and are all served
+on their day, keeping their priority); whatever does not fit stays overdue
+for the next run. The `due_forecast` triggers follow the moves, and daily
+candidate queries only see today's share.
+
+Runs for every user with a backlog once per UTC day from the scheduler tick,
+and for a single user on the first /today after an absence.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Mapping, Sequence
+
+from srsbot.config import REBALANCE_ABSENCE_DAYS, REBALANCE_MAX_DAYS
+from srsbot.db import get_db, get_read_db
+from srsbot.user_config import get_user_config
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RebalanceReport:
+    users: int = 0
+    cards_moved: int = 0
+
+
+def spread_over_free_days(
+    card_ids: Sequence[int],
+    limit: int,
+    today: date,
+    booked: Mapping[date, int],
+    days: int = REBALANCE_MAX_DAYS,
+) -> list[tuple[int, date]]:
+    """Assign cards in order to the next `days` days, up to `limit` per day.
+
+    `booked` holds reviews already due per day. Returns (card_id, new_due)
+    pairs; cards beyond the free room of the window are left out.
+    """
+    moved: list[tuple[int, date]] = []
+    it = iter(card_ids)
+    for d in range(1, days + 1):
+        day = today + timedelta(days=d)
+        for _ in range(max(0, limit - booked.get(day, 0))):
+            card_id = next(it, None)
+            if card_id is None:
+                return moved
+            moved.append((card_id, day))
+    return moved
+
+
+async def rebalance_user(user_id: int, today: date, limit: int | None = None) -> int:
+    """Move the user's overdue reviews beyond `limit` into free room of the next days.
+
+    Returns cards moved.
+    """
+    if limit is None:
+        limit = (await get_user_config(user_id)).review_limit_per_day
+    limit = max(0, limit)
+    end = today + timedelta(days=REBALANCE_MAX_DAYS)
+    async with get_db() as db:
+        cur = await db.execute(
+            "SELECT card_id FROM progress WHERE user_id=? AND state='review' AND due_at<=? "
+            "ORDER BY due_at, card_id",
+            (user_id, today.isoformat()),
+        )
+        overdue = [int(r[0]) for r in await cur.fetchall()]
+        if len(overdue) <= limit:
+            return 0
+        # Read on the writer so no answer moves a card in between
+        cur = await db.execute(
+            "SELECT day, count FROM due_forecast WHERE user_id=? AND day>? AND day<=?",
+            (user_id, today.isoformat(), end.isoformat()),
+        )
+        booked = {date.fromisoformat(str(r[0])): int(r[1]) for r in await cur.fetchall()}
+        moved = spread_over_free_days(overdue[limit:], limit, today, booked)
+        if not moved:
+            return 0
+        await db.executemany(
+            "UPDATE progress SET due_at=? WHERE user_id=? AND card_id=?",
+            [(due.isoformat(), user_id, card_id) for card_id, due in moved],
+        )
+        await db.commit()
+    return len(moved)
+
+
+# Users whose reviews due by today exceed their daily cap, from the forecast rollup
+_BACKLOG_SQL = """
+SELECT f.user_id, COALESCE(c.review_limit_per_day, 35) AS lim
+FROM due_forecast f
+LEFT JOIN user_config c ON c.user_id=f.user_id
+WHERE f.day<=?
+GROUP BY f.user_id
+HAVING SUM(f.count) > lim
+"""
+
+
+async def rebalance_all(today: date) -> RebalanceReport:
+    """Rebalance every user with a backlog (one UPDATE executemany each)."""
+    async with get_read_db() as db:
+        cur = await db.execute(_BACKLOG_SQL, (today.isoformat(),))
+        users = [(int(r[0]), int(r[1])) for r in await cur.fetchall()]
+    report = RebalanceReport()
+    for user_id, limit in users:
+        moved = await rebalance_user(user_id, today, limit)
+        if moved:
+            report.users += 1
+            report.cards_moved += moved
+    return report
+
+
+async def rebalance_after_absence(user_id: int, today: date) -> int:
+    """Rebalance when the user has not answered for REBALANCE_ABSENCE_DAYS or more."""
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT MAX(day) FROM daily_user_stats WHERE user_id=?", (user_id,))
+        row = await cur.fetchone()
+    last = row[0] if row else None
+    if last is None or str(last) > (today - timedelta(days=REBALANCE_ABSENCE_DAYS)).isoformat():
+        return 0
+    moved = await rebalance_user(user_id, today)
+    if moved:
+        logger.info("user %s back after %s: %d overdue reviews spread out", user_id, last, moved)
+    return moved
@@ -1,74 +1,288 @@
 from __future__ import annotations
 
-from datetime import datetime, time, timedelta, timezone
-from typing import Optional
+import asyncio
+import json
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Optional, Sequence
 
-from aiogram import Bot
+from srsbot.catalog import get_catalog
+from srsbot.config import (
+    DAY_SEEN_RETENTION_DAYS,
+    OUTBOX_RETENTION_DAYS,
+    SCHEDULER_MAX_CATCHUP_MINUTES,
+    utc_push_minute,
+)
+from srsbot.db import get_db, get_read_db, get_scheduler_state, prune_day_seen, set_scheduler_state
+from srsbot.forecast import upcoming_load_batch
+from srsbot.frontier import rebuild_unseen_counts, unseen_count
+from srsbot.outbox import OutboxItem, enqueue_pushes, prune_outbox
+from srsbot.rebalance import rebalance_all
 
-from srsbot.config import parse_push_time
-from srsbot.db import get_db, update_last_notified
+
+logger = logging.getLogger(__name__)
+
+# scheduler_state key: UTC date the push buckets were last recomputed for
+PUSH_BUCKETS_KEY = "push_buckets_date"
+# scheduler_state key: UTC date day_seen was last pruned
+DAY_SEEN_PRUNE_KEY = "day_seen_pruned_date"
+# scheduler_state key: UTC date sent/failed outbox rows were last pruned
+OUTBOX_PRUNE_KEY = "outbox_pruned_date"
+# scheduler_state key: UTC date overdue backlogs were last rebalanced
+REBALANCE_KEY = "overdue_rebalanced_date"
+# scheduler_state key: last minute bucket (ISO, UTC) fully processed by the tick
+HIGH_WATER_KEY = "tick_high_water"
+
+
+# One grouped pass for a whole batch of users: config caps, persisted unseen
+# counts (user_frontier) and due reviews from the due_forecast rollup. Ids are
+# passed as a JSON array so the batch size is not bound by SQLite's host
+# parameter limit.
+_COUNTS_SQL = """
+SELECT c.user_id, c.review_limit_per_day, c.daily_new_target,
+       f.unseen_count, f.catalog_version,
+       (SELECT COALESCE(SUM(d.count), 0) FROM due_forecast d
+        WHERE d.user_id=c.user_id AND d.day<=:today) AS reviews_due
+FROM user_config c
+LEFT JOIN user_frontier f ON f.user_id=c.user_id
+WHERE c.user_id IN (SELECT value FROM json_each(:ids))
+"""
+
+
+async def compute_counts_batch(
+    user_ids: Sequence[int], today: Optional[date] = None
+) -> dict[int, tuple[int, int]]:
+    """Return {user_id: (reviews_due, new_available)} for all given users."""
+    if not user_ids:
+        return {}
+    day = (today or datetime.now(timezone.utc).date()).isoformat()
+    version = (await get_catalog()).version
+    async with get_read_db() as db:
+        cur = await db.execute(_COUNTS_SQL, {"today": day, "ids": json.dumps(list(user_ids))})
+        rows = await cur.fetchall()
+    # Persisted counts missing or built for an older catalog: one grouped rebuild
+    stale = [int(r[0]) for r in rows if r[3] is None or int(r[4]) != version]
+    rebuilt = await rebuild_unseen_counts(stale)
+    counts: dict[int, tuple[int, int]] = {}
+    for r in rows:
+        user_id = int(r[0])
+        unseen = rebuilt[user_id] if user_id in rebuilt else int(r[3])
+        counts[user_id] = (min(int(r[5]), int(r[1])), min(unseen, int(r[2])))
+    for user_id in user_ids:
+        # No user_config row: default caps
+        if user_id not in counts:
+            counts[user_id] = (0, min(await unseen_count(user_id), 8))
+    return counts
 
 
 async def compute_counts(user_id: int) -> tuple[int, int]:
     """Return (reviews_due, new_available) for today."""
+    return (await compute_counts_batch([user_id]))[user_id]
+
+
+# Users whose push minute is now, plus users whose snooze ran out during the
+# last minute after today's push minute had already passed. Both halves are
+# index range scans (push_minute_utc, snoozed_until), so a tick stays constant
+# in the total number of users.
+_DUE_SQL = """
+SELECT c.user_id FROM user_config c
+LEFT JOIN user_state s ON s.user_id=c.user_id
+WHERE c.push_minute_utc=:minute
+  AND (s.last_notified_date IS NULL OR s.last_notified_date<>:today)
+  AND (s.snoozed_until IS NULL OR s.snoozed_until<=:now)
+  AND NOT EXISTS (SELECT 1 FROM push_outbox o WHERE o.user_id=c.user_id AND o.push_date=:today)
+UNION
+SELECT s.user_id FROM user_state s
+JOIN user_config c ON c.user_id=s.user_id
+WHERE s.snoozed_until>:prev AND s.snoozed_until<=:now
+  AND c.push_minute_utc<:minute
+  AND (s.last_notified_date IS NULL OR s.last_notified_date<>:today)
+  AND NOT EXISTS (SELECT 1 FROM push_outbox o WHERE o.user_id=s.user_id AND o.push_date=:today)
+"""
+
+
+async def due_user_ids(now: datetime) -> list[int]:
+    """Users to notify in the UTC minute containing `now`."""
+    bucket = now.replace(second=0, microsecond=0)
+    params = {
+        "minute": bucket.hour * 60 + bucket.minute,
+        "today": bucket.date().isoformat(),
+        "now": bucket.isoformat(),
+        "prev": (bucket - timedelta(minutes=1)).isoformat(),
+    }
+    async with get_read_db() as db:
+        cur = await db.execute(_DUE_SQL, params)
+        return [int(r[0]) for r in await cur.fetchall()]
+
+
+async def refresh_push_buckets(on: date) -> int:
+    """Recompute UTC push buckets for date `on`; return the number of users moved.
+
+    Runs once per UTC day (tracked in scheduler_state) so buckets follow DST
+    changes. One UPDATE per distinct (push_time, tz) pair, so the tz math is per
+    setting combination rather than per user.
+    """
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT DISTINCT push_time, tz FROM user_config")
+        pairs = [(str(r[0]), r[1]) for r in await cur.fetchall()]
+    params = []
+    for push_time, tz in pairs:
+        minute = utc_push_minute(push_time, tz, on)
+        params.append((minute, push_time, tz, minute))
     async with get_db() as db:
-        cur = await db.execute(
-            "SELECT review_limit_per_day, daily_new_target FROM user_config WHERE user_id=?",
-            (user_id,),
+        before = db.total_changes
+        await db.executemany(
+            "UPDATE user_config SET push_minute_utc=? WHERE push_time=? AND tz IS ? AND push_minute_utc<>?",
+            params,
         )
-        row = await cur.fetchone()
-        review_limit = int(row[0]) if row else 35
-        new_target = int(row[1]) if row else 8
+        moved = db.total_changes - before
+        await db.commit()
+    return moved
 
-        cur = await db.execute(
-            "SELECT COUNT(*) FROM progress WHERE user_id=? AND state='review' AND due_at<=date('now')",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-        reviews_due = min(int(row[0] or 0), review_limit)
 
-        cur = await db.execute(
-            "SELECT COUNT(*) FROM cards c LEFT JOIN progress p ON p.card_id=c.id AND p.user_id=? WHERE p.card_id IS NULL",
-            (user_id,),
-        )
-        row = await cur.fetchone()
-        new_avail = min(int(row[0] or 0), new_target)
-    return reviews_due, new_avail
+async def _refresh_push_buckets_daily(today: date) -> None:
+    if await get_scheduler_state(PUSH_BUCKETS_KEY) == today.isoformat():
+        return
+    moved = await refresh_push_buckets(today)
+    await set_scheduler_state(PUSH_BUCKETS_KEY, today.isoformat())
+    if moved:
+        logger.info("push buckets refreshed for %s: %d users moved", today, moved)
+
+
+async def _prune_day_seen_daily(today: date) -> None:
+    if await get_scheduler_state(DAY_SEEN_PRUNE_KEY) == today.isoformat():
+        return
+    cutoff = today - timedelta(days=DAY_SEEN_RETENTION_DAYS - 1)
+    removed = await prune_day_seen(cutoff.isoformat())
+    await set_scheduler_state(DAY_SEEN_PRUNE_KEY, today.isoformat())
+    if removed:
+        logger.info("day_seen pruned before %s: %d rows", cutoff, removed)
+
+
+async def _prune_outbox_daily(today: date) -> None:
+    if await get_scheduler_state(OUTBOX_PRUNE_KEY) == today.isoformat():
+        return
+    cutoff = today - timedelta(days=OUTBOX_RETENTION_DAYS)
+    removed = await prune_outbox(cutoff)
+    await set_scheduler_state(OUTBOX_PRUNE_KEY, today.isoformat())
+    if removed:
+        logger.info("push_outbox pruned before %s: %d rows", cutoff, removed)
 
 
-async def daily_tick(bot: Bot) -> None:
-    """Run every minute; send push if time matches and not sent today or snoozed."""
-    now = datetime.now(timezone.utc)
+async def _rebalance_overdue_daily(today: date) -> None:
+    if await get_scheduler_state(REBALANCE_KEY) == today.isoformat():
+        return
+    report = await rebalance_all(today)
+    await set_scheduler_state(REBALANCE_KEY, today.isoformat())
+    if report.cards_moved:
+        logger.info("overdue rebalanced: %d cards for %d users", report.cards_moved, report.users)
+
+
+def push_text(reviews: int, new: int, tomorrow: Optional[int] = None) -> str:
+    text = f"You have {reviews + new} cards today: {reviews} reviews + {new} new."
+    if tomorrow:
+        text += f" {tomorrow} reviews due tomorrow."
+    return text + " Start? (/today)"
+
+
+async def daily_tick(now: Optional[datetime] = None) -> int:
+    """Run every minute; enqueue pushes for users due now. Returns rows queued.
+
+    Delivery happens in `srsbot.outbox.drain_outbox`.
+    """
+    now = now or datetime.now(timezone.utc)
+    await _refresh_push_buckets_daily(now.date())
+    await _prune_day_seen_daily(now.date())
+    await _prune_outbox_daily(now.date())
+    await _rebalance_overdue_daily(now.date())
+    due = await due_user_ids(now)
+    counts = await compute_counts_batch(due, now.date())
+    loads = await upcoming_load_batch(due, now.date())
     today = now.date().isoformat()
-    async with get_db() as db:
-        cur = await db.execute("SELECT user_id, push_time FROM user_config")
-        users = await cur.fetchall()
-    for row in users:
-        user_id = int(row[0])
-        push_t = parse_push_time(row[1])
-        # Check last notified and snooze
-        async with get_db() as db:
-            cur = await db.execute(
-                "SELECT last_notified_date, snoozed_until FROM user_state WHERE user_id=?",
-                (user_id,),
-            )
-            st = await cur.fetchone()
-        last_notified = (st[0] if st else None)
-        snoozed_until = (st[1] if st else None)
-        if snoozed_until and now < datetime.fromisoformat(snoozed_until):
-            continue
-        # Only once per day
-        if last_notified == today:
-            continue
-        if now.hour == push_t.hour and now.minute == push_t.minute:
-            reviews, new = await compute_counts(user_id)
-            try:
-                await bot.send_message(
-                    chat_id=user_id,
-                    text=f"You have {reviews + new} cards today: {reviews} reviews + {new} new. Start? (/today)",
-                )
-                await update_last_notified(user_id, now.date())
-            except Exception:
-                # Ignore send errors (e.g., bot not started by user)
-                pass
+    return await enqueue_pushes(
+        [
+            OutboxItem(user_id, today, push_text(*counts[user_id], loads[user_id].tomorrow))
+            for user_id in due
+        ],
+        now,
+    )
+
+
+@dataclass(frozen=True)
+class SchedulerMetrics:
+    buckets_processed: int
+    buckets_caught_up: int  # processed after their minute had already passed
+    buckets_dropped: int  # older than SCHEDULER_MAX_CATCHUP_MINUTES, never processed
+    last_lag_seconds: float  # delay between a bucket's start and its processing
+    max_lag_seconds: float
+
+
+_processed = 0
+_caught_up = 0
+_dropped = 0
+_last_lag = 0.0
+_max_lag = 0.0
+
+
+def scheduler_metrics() -> SchedulerMetrics:
+    return SchedulerMetrics(_processed, _caught_up, _dropped, _last_lag, _max_lag)
+
+
+def reset_scheduler_metrics() -> None:
+    global _processed, _caught_up, _dropped, _last_lag, _max_lag
+    _processed = _caught_up = _dropped = 0
+    _last_lag = _max_lag = 0.0
+
+
+async def run_due_buckets(
+    now: Optional[datetime] = None, clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc)
+) -> int:
+    """Tick every minute bucket after the persisted high-water mark up to `now`.
+
+    The high-water mark is stored after each bucket, so a slow tick or a
+    restart resumes where it stopped instead of skipping users. Returns the
+    number of buckets processed.
+    """
+    global _processed, _caught_up, _dropped, _last_lag, _max_lag
+    now = now or clock()
+    current = now.replace(second=0, microsecond=0)
+    mark = await get_scheduler_state(HIGH_WATER_KEY)
+    bucket = datetime.fromisoformat(mark) + timedelta(minutes=1) if mark else current
+    earliest = current - timedelta(minutes=SCHEDULER_MAX_CATCHUP_MINUTES - 1)
+    if bucket < earliest:
+        dropped = int((earliest - bucket).total_seconds() // 60)
+        _dropped += dropped
+        logger.warning("scheduler: dropping %d minute buckets older than the catch-up window", dropped)
+        bucket = earliest
+    processed = 0
+    while bucket <= current:
+        lag = (clock() - bucket).total_seconds()
+        _last_lag = lag
+        _max_lag = max(_max_lag, lag)
+        await daily_tick(bucket)
+        await set_scheduler_state(HIGH_WATER_KEY, bucket.isoformat())
+        if bucket < current:
+            _caught_up += 1
+        processed += 1
+        bucket += timedelta(minutes=1)
+    _processed += processed
+    if processed > 1:
+        logger.info("scheduler: caught up %d minute buckets (lag %.1fs)", processed - 1, _max_lag)
+    return processed
+
+
+async def run_scheduler_loop() -> None:
+    """Tick at every wall-clock minute boundary, using monotonic deadlines.
 
+    The sleep is computed from the next minute boundary, not a fixed 60 s
+    after the tick, so tick runtime never accumulates as drift; any bucket a
+    long tick overran is processed by `run_due_buckets` on the next pass.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        await run_due_buckets()
+        now = datetime.now(timezone.utc)
+        deadline = loop.time() + 60 - now.second - now.microsecond / 1_000_000
+        while (remaining := deadline - loop.time()) > 0:
+            await asyncio.sleep(remaining)
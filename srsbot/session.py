@@ -1,31 +1,264 @@
 from __future__ import annotations
 
+"""In-memory Today sessions (round queue and per-session counters).
+
+Sessions live in a bounded LRU; one idle longer than SESSION_IDLE_TTL_SECONDS,
+or pushed out by newer users, is evicted. Each session is snapshotted to
+`session_snapshots` at most SESSION_SNAPSHOT_SECONDS after it was last used,
+and a cache miss restores the snapshot taken the same day, so neither
+eviction nor a restart resets a user's round. A handler can still change its
+session after an await that a periodic flush ran during (e.g. `on_ans` pops
+the queue after `process_answer`), so eviction and shutdown snapshot every
+session they drop, not only those marked used since the last flush.
+
+Queues and shown ids are `array('i')`, kept as raw bytes in the snapshot,
+stamped with the day the session belongs to (not the day it is written).
+Handlers run on one event loop; the only await in `get` is the snapshot read
+on a miss, and if another handler cached the user meanwhile `setdefault`
+keeps that session, so the store needs no lock.
+"""
+
 import asyncio
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Set
+import bisect
+import logging
+import sys
+import time
+from array import array
+from collections import OrderedDict
+from datetime import date, datetime, timezone
+from typing import Callable, Iterable, Optional
+
+from srsbot.config import SESSION_CACHE_SIZE, SESSION_IDLE_TTL_SECONDS, SESSION_SNAPSHOT_SECONDS
+from srsbot.db import get_db, get_read_db
+
+
+logger = logging.getLogger(__name__)
+
+# (session_date, queue, shown_ids, shown, good, consecutive_good); None deletes the row
+Snapshot = tuple[str, bytes, bytes, int, int, int]
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _to_bytes(a: array) -> bytes:
+    # Snapshots are stored little-endian
+    if sys.byteorder == "big":
+        a = array("i", a)
+        a.byteswap()
+    return a.tobytes()
+
+
+def _from_bytes(b: bytes) -> array:
+    a = array("i")
+    a.frombytes(b)
+    if sys.byteorder == "big":
+        a.byteswap()
+    return a
 
 
-@dataclass
 class SessionData:
-    queue: List[int] = field(default_factory=list)
-    shown: int = 0
-    good: int = 0
-    consecutive_good: int = 0
-    shown_card_ids: Set[int] = field(default_factory=set)
+    __slots__ = ("day", "_queue", "shown", "good", "consecutive_good", "_shown_ids", "current_card_id", "touched")
+
+    def __init__(self, day: Optional[date] = None) -> None:
+        self.day = day or _utc_today()  # session date the snapshot is stamped with
+        self._queue = array("i")
+        self.shown = 0
+        self.good = 0
+        self.consecutive_good = 0
+        self._shown_ids = array("i")  # sorted
+        # Card on screen awaiting an answer: 0 when none, None when unknown
+        # (fresh or restored session, any answer is accepted)
+        self.current_card_id: Optional[int] = None
+        self.touched = 0.0  # store clock at last access
+
+    @property
+    def queue(self) -> array:
+        return self._queue
+
+    @queue.setter
+    def queue(self, ids: Iterable[int]) -> None:
+        self._queue = array("i", ids)
+
+    def is_stale_answer(self, card_id: int) -> bool:
+        """True for an answer to a card that is no longer on screen (double tap)."""
+        return self.current_card_id is not None and self.current_card_id != card_id
+
+    def was_shown(self, card_id: int) -> bool:
+        i = bisect.bisect_left(self._shown_ids, card_id)
+        return i < len(self._shown_ids) and self._shown_ids[i] == card_id
+
+    def mark_shown(self, card_id: int) -> None:
+        if not self.was_shown(card_id):
+            bisect.insort(self._shown_ids, card_id)
+
+    def snapshot(self) -> Snapshot:
+        return (
+            self.day.isoformat(),
+            _to_bytes(self._queue),
+            _to_bytes(self._shown_ids),
+            self.shown,
+            self.good,
+            self.consecutive_good,
+        )
+
+    @classmethod
+    def from_snapshot(cls, snap: Snapshot) -> SessionData:
+        day, queue, shown_ids, shown, good, consecutive_good = snap
+        s = cls(date.fromisoformat(day))
+        s.shown, s.good, s.consecutive_good = shown, good, consecutive_good
+        s._queue = _from_bytes(queue)
+        s._shown_ids = _from_bytes(shown_ids)
+        return s
 
 
 class SessionStore:
-    def __init__(self) -> None:
-        self._data: Dict[int, SessionData] = {}
-        self._lock = asyncio.Lock()
+    def __init__(
+        self,
+        max_users: int = SESSION_CACHE_SIZE,
+        idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+        flush_delay: float = SESSION_SNAPSHOT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        today: Callable[[], date] = _utc_today,
+    ) -> None:
+        self.max_users = max_users
+        self.idle_ttl = idle_ttl
+        self.flush_delay = flush_delay
+        self._clock = clock
+        self._today = today
+        self._lru: OrderedDict[int, SessionData] = OrderedDict()
+        self._dirty: set[int] = set()  # cached sessions used since the last snapshot
+        self._pending: dict[int, Optional[Snapshot]] = {}  # evicted or cleared, not yet written
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self.restored = 0
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._lru)
 
     async def get(self, user_id: int) -> SessionData:
-        async with self._lock:
-            return self._data.setdefault(user_id, SessionData())
+        """Return the user's session, restoring today's snapshot on a cache miss."""
+        s = self._lru.get(user_id)
+        if s is None:
+            restored = await self._restore(user_id)
+            # Another handler may have restored it while we awaited
+            s = self._lru.setdefault(user_id, restored)
+        self._lru.move_to_end(user_id)
+        s.touched = self._clock()
+        self._dirty.add(user_id)
+        self._evict()
+        self._schedule_flush()
+        return s
+
+    async def _restore(self, user_id: int) -> SessionData:
+        if user_id in self._pending:
+            snap = self._pending.pop(user_id)
+        else:
+            async with get_read_db() as db:
+                cur = await db.execute(
+                    "SELECT session_date, queue, shown_ids, shown, good, consecutive_good "
+                    "FROM session_snapshots WHERE user_id=?",
+                    (user_id,),
+                )
+                row = await cur.fetchone()
+            snap = (
+                (str(row[0]), bytes(row[1]), bytes(row[2]), int(row[3]), int(row[4]), int(row[5]))
+                if row
+                else None
+            )
+        today = self._today()
+        if snap is None or snap[0] != today.isoformat():
+            return SessionData(today)
+        self.restored += 1
+        return SessionData.from_snapshot(snap)
 
     async def clear(self, user_id: int) -> None:
-        async with self._lock:
-            self._data.pop(user_id, None)
+        self._lru.pop(user_id, None)
+        self._dirty.discard(user_id)
+        self._pending[user_id] = None
+        self._schedule_flush()
+
+    def _evict(self) -> int:
+        """Drop idle and over-capacity sessions, keeping their snapshots for the next flush."""
+        deadline = self._clock() - self.idle_ttl
+        n = 0
+        while self._lru:
+            user_id, s = next(iter(self._lru.items()))
+            if len(self._lru) <= self.max_users and s.touched > deadline:
+                break
+            del self._lru[user_id]
+            self._dirty.discard(user_id)
+            self._pending[user_id] = s.snapshot()
+            n += 1
+        self.evicted += n
+        return n
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        try:
+            self._evict()
+            await self.flush()
+        except Exception:
+            logger.exception("session snapshot failed; will retry")
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> int:
+        """Write snapshots of used, evicted and cleared sessions; return rows touched."""
+        pending, self._pending = self._pending, {}
+        for user_id in self._dirty:
+            pending[user_id] = self._lru[user_id].snapshot()
+        self._dirty = set()
+        if not pending:
+            return 0
+        upserts = [(uid, *snap) for uid, snap in pending.items() if snap is not None]
+        deletes = [(uid,) for uid, snap in pending.items() if snap is None]
+        try:
+            async with get_db() as db:
+                await db.executemany(
+                    "INSERT INTO session_snapshots(user_id, session_date, queue, shown_ids, shown, good, consecutive_good) "
+                    "VALUES(?,?,?,?,?,?,?) ON CONFLICT(user_id) DO UPDATE SET "
+                    "session_date=excluded.session_date, queue=excluded.queue, shown_ids=excluded.shown_ids, "
+                    "shown=excluded.shown, good=excluded.good, consecutive_good=excluded.consecutive_good, "
+                    "updated_at=CURRENT_TIMESTAMP",
+                    upserts,
+                )
+                await db.executemany("DELETE FROM session_snapshots WHERE user_id=?", deletes)
+                await db.commit()
+        except Exception:
+            # Keep anything newer that arrived while writing
+            for uid, snap in pending.items():
+                if uid not in self._lru:
+                    self._pending.setdefault(uid, snap)
+                else:
+                    self._dirty.add(uid)
+            raise
+        return len(pending)
+
+    async def close(self) -> None:
+        """Cancel the pending timer and snapshot every cached session (shutdown)."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        self._dirty.update(self._lru)
+        await self.flush()
+
+    def reset(self) -> None:
+        """Drop all sessions and unwritten snapshots (tests)."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._lru.clear()
+        self._dirty.clear()
+        self._pending.clear()
 
 
 store = SessionStore()
+
+
+def reset_session_store() -> None:
+    store.reset()
@@ -6,11 +6,13 @@ This module centralizes message cleanup so the chat always contains a single
 active UI message for navigation screens.
 """
 
+from dataclasses import dataclass
+
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest
-from aiogram.types import InlineKeyboardMarkup
+from aiogram.types import InlineKeyboardMarkup, Message
 
-from srsbot.db import get_ui_state, set_ui_state
+from srsbot.ui_state import get_ui_state, set_ui_state
 
 
 # Screen identifiers
@@ -24,6 +26,40 @@ SCREEN_SNOOZE = "snooze"
 SCREEN_QUIZ = "quiz"
 
 
+@dataclass(frozen=True)
+class RenderStats:
+    edits: int
+    sends: int
+    skipped: int  # identical to the last rendered screen: no API call
+    not_modified: int  # "message is not modified" answered as success
+    api_calls_avoided: int
+
+
+_edits = 0
+_sends = 0
+_skipped = 0
+_not_modified = 0
+
+
+def render_stats() -> RenderStats:
+    # A skip saves the edit; a handled "not modified" saves the delete + send
+    return RenderStats(_edits, _sends, _skipped, _not_modified, _skipped + 2 * _not_modified)
+
+
+def reset_render_stats() -> None:
+    global _edits, _sends, _skipped, _not_modified
+    _edits = _sends = _skipped = _not_modified = 0
+
+
+def screen_fingerprint(text: str, reply_markup: InlineKeyboardMarkup | None) -> int:
+    markup = reply_markup.model_dump_json(exclude_none=True) if reply_markup is not None else ""
+    return hash((text, markup))
+
+
+def _is_not_modified(e: TelegramBadRequest) -> bool:
+    return "message is not modified" in str(e).lower()
+
+
 async def show_screen(
     bot: Bot,
     user_id: int,
@@ -33,33 +69,82 @@ async def show_screen(
 ) -> None:
     """Render a screen by editing previous UI message or replacing it.
 
+    - If the previous UI message already shows exactly this text and markup
+      (same fingerprint), no API call is made.
     - If a previous `last_ui_message_id` exists, try to edit it in-place.
-      If editing fails (e.g., content is identical or message is gone), delete
-      and send a fresh one.
+      "Message is not modified" counts as success; other edit failures (e.g.
+      the message is gone) delete it and send a fresh one.
     - If no previous UI message, send a new one.
-    Always update `last_ui_message_id` and `current_screen` in DB.
+    Always update `last_ui_message_id` and `current_screen` in UI state.
     """
+    global _edits, _sends, _skipped, _not_modified
     state = await get_ui_state(user_id)
     chat_id = user_id
     last_id = int(state["last_ui_message_id"]) if state and state["last_ui_message_id"] else None
+    fingerprint = screen_fingerprint(text, reply_markup)
 
     if last_id is not None:
+        if state is not None and state.screen_fingerprint == fingerprint:
+            _skipped += 1
+            if state.current_screen != screen_id:
+                await set_ui_state(user_id, current_screen=screen_id)
+            return
         try:
+            _edits += 1
             await bot.edit_message_text(
                 chat_id=chat_id,
                 message_id=last_id,
                 text=text,
                 reply_markup=reply_markup,
             )
-            await set_ui_state(user_id, last_ui_message_id=last_id, current_screen=screen_id)
+        except TelegramBadRequest as e:
+            if not _is_not_modified(e):
+                # Try to delete and re-send if edit is not possible
+                try:
+                    await bot.delete_message(chat_id, last_id)
+                except Exception:
+                    pass
+                last_id = None
+            else:
+                _not_modified += 1
+        if last_id is not None:
+            await set_ui_state(
+                user_id, last_ui_message_id=last_id, current_screen=screen_id, screen_fingerprint=fingerprint
+            )
             return
-        except TelegramBadRequest:
-            # Try to delete and re-send if edit is not possible
-            try:
-                await bot.delete_message(chat_id, last_id)
-            except Exception:
-                pass
 
     # Send a fresh message
+    _sends += 1
     msg = await bot.send_message(chat_id, text, reply_markup=reply_markup)
-    await set_ui_state(user_id, last_ui_message_id=msg.message_id, current_screen=screen_id)
+    await set_ui_state(
+        user_id, last_ui_message_id=msg.message_id, current_screen=screen_id, screen_fingerprint=fingerprint
+    )
+
+
+async def edit_screen(
+    message: Message,
+    user_id: int,
+    text: str,
+    reply_markup: InlineKeyboardMarkup | None = None,
+) -> None:
+    """Edit a UI message in place from a callback handler.
+
+    Keeps the fingerprint used by `show_screen` in sync, skips edits that
+    would not change the tracked message, and treats "not modified" as success.
+    """
+    global _edits, _skipped, _not_modified
+    state = await get_ui_state(user_id)
+    tracked = state is not None and state.last_ui_message_id == message.message_id
+    fingerprint = screen_fingerprint(text, reply_markup)
+    if tracked and state is not None and state.screen_fingerprint == fingerprint:
+        _skipped += 1
+        return
+    try:
+        _edits += 1
+        await message.edit_text(text, reply_markup=reply_markup)
+    except TelegramBadRequest as e:
+        if not _is_not_modified(e):
+            raise
+        _not_modified += 1
+    if tracked:
+        await set_ui_state(user_id, screen_fingerprint=fingerprint)
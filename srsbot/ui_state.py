@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+"""Write-through cache of `user_ui_state` (last UI message, screen, awaiting input).
+
+Every screen render reads and writes this state, so it is served from a
+bounded in-process LRU. Writes update the cache immediately and are flushed to
+SQLite in one coalesced transaction at most UI_STATE_FLUSH_SECONDS later, so a
+restart loses at most that window of UI state. Entries waiting for a flush are
+never evicted.
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Optional
+
+from srsbot.config import UI_STATE_CACHE_SIZE, UI_STATE_FLUSH_SECONDS
+from srsbot.db import get_db, get_read_db
+
+
+logger = logging.getLogger(__name__)
+
+_SENTINEL: Any = object()
+
+
+class UiState:
+    __slots__ = (
+        "user_id",
+        "last_ui_message_id",
+        "current_screen",
+        "awaiting_input_field",
+        "screen_fingerprint",  # in-memory only, see srsbot.ui.screen_fingerprint
+    )
+
+    def __init__(
+        self,
+        user_id: int,
+        last_ui_message_id: Optional[int] = None,
+        current_screen: Optional[str] = None,
+        awaiting_input_field: Optional[str] = None,
+    ) -> None:
+        self.user_id = user_id
+        self.last_ui_message_id = last_ui_message_id
+        self.current_screen = current_screen
+        self.awaiting_input_field = awaiting_input_field
+        self.screen_fingerprint: Optional[int] = None
+
+    def __getitem__(self, key: str) -> Any:
+        # Row-style access, as callers used with aiosqlite.Row
+        return getattr(self, key)
+
+
+class UiStateCache:
+    def __init__(self, max_users: int = UI_STATE_CACHE_SIZE, flush_delay: float = UI_STATE_FLUSH_SECONDS) -> None:
+        self.max_users = max_users
+        self.flush_delay = flush_delay
+        self._lru: OrderedDict[int, UiState | None] = OrderedDict()
+        self._dirty: dict[int, UiState] = {}
+        self._flush_task: Optional[asyncio.Task[None]] = None
+        self.db_reads = 0
+        self.db_flushes = 0
+
+    async def get(self, user_id: int) -> UiState | None:
+        if user_id in self._dirty:
+            return self._dirty[user_id]
+        if user_id in self._lru:
+            self._lru.move_to_end(user_id)
+            return self._lru[user_id]
+        self.db_reads += 1
+        async with get_read_db() as db:
+            cur = await db.execute(
+                "SELECT last_ui_message_id, current_screen, awaiting_input_field FROM user_ui_state WHERE user_id=?",
+                (user_id,),
+            )
+            row = await cur.fetchone()
+        state = (
+            UiState(
+                user_id,
+                int(row[0]) if row[0] is not None else None,
+                str(row[1]) if row[1] is not None else None,
+                str(row[2]) if row[2] is not None else None,
+            )
+            if row
+            else None
+        )
+        self._remember(user_id, state)
+        return state
+
+    def _remember(self, user_id: int, state: UiState | None) -> None:
+        self._lru[user_id] = state
+        self._lru.move_to_end(user_id)
+        while len(self._lru) > self.max_users:
+            self._lru.popitem(last=False)
+
+    async def update(
+        self,
+        user_id: int,
+        last_ui_message_id: Any = _SENTINEL,
+        current_screen: Any = _SENTINEL,
+        awaiting_input_field: Any = _SENTINEL,
+        screen_fingerprint: Any = _SENTINEL,
+    ) -> UiState:
+        """Set the given fields (others are kept) and schedule a flush.
+
+        Changing the UI message id drops the fingerprint unless a new one is given.
+        """
+        state = await self.get(user_id) or UiState(user_id)
+        if last_ui_message_id is not _SENTINEL and last_ui_message_id != state.last_ui_message_id:
+            state.screen_fingerprint = None
+        if screen_fingerprint is not _SENTINEL:
+            state.screen_fingerprint = screen_fingerprint
+        if last_ui_message_id is not _SENTINEL:
+            state.last_ui_message_id = last_ui_message_id
+        if current_screen is not _SENTINEL:
+            state.current_screen = current_screen
+        if awaiting_input_field is not _SENTINEL:
+            state.awaiting_input_field = awaiting_input_field
+        self._remember(user_id, state)
+        if (last_ui_message_id, current_screen, awaiting_input_field) == (_SENTINEL,) * 3:
+            return state  # fingerprint only, nothing to persist
+        self._dirty[user_id] = state
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+        return state
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_delay)
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("ui state flush failed; will retry")
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def flush(self) -> int:
+        """Write all pending states in one transaction; return rows written."""
+        if not self._dirty:
+            return 0
+        pending, self._dirty = self._dirty, {}
+        rows = [
+            (s.user_id, s.last_ui_message_id, s.current_screen, s.awaiting_input_field)
+            for s in pending.values()
+        ]
+        try:
+            async with get_db() as db:
+                await db.executemany(
+                    "INSERT INTO user_ui_state(user_id, last_ui_message_id, current_screen, awaiting_input_field) VALUES(?,?,?,?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET last_ui_message_id=excluded.last_ui_message_id, "
+                    "current_screen=excluded.current_screen, awaiting_input_field=excluded.awaiting_input_field",
+                    rows,
+                )
+                await db.commit()
+        except Exception:
+            # Keep newer updates made while flushing
+            for uid, s in pending.items():
+                self._dirty.setdefault(uid, s)
+            raise
+        self.db_flushes += 1
+        return len(rows)
+
+    async def close(self) -> None:
+        """Cancel the pending timer and flush synchronously (shutdown)."""
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+            await asyncio.gather(self._flush_task, return_exceptions=True)
+        await self.flush()
+
+
+_cache = UiStateCache()
+
+
+def ui_state_cache() -> UiStateCache:
+    return _cache
+
+
+async def get_ui_state(user_id: int) -> UiState | None:
+    """Return UI state for a user if any (cached)."""
+    return await _cache.get(user_id)
+
+
+async def set_ui_state(
+    user_id: int,
+    last_ui_message_id: int | None = None,
+    current_screen: str | None = None,
+    awaiting_input_field: str | None | object = _SENTINEL,
+    screen_fingerprint: int | None | object = _SENTINEL,
+) -> None:
+    """Update UI state fields for the user; None message id/screen keep the existing value."""
+    await _cache.update(
+        user_id,
+        last_ui_message_id if last_ui_message_id is not None else _SENTINEL,
+        current_screen if current_screen is not None else _SENTINEL,
+        awaiting_input_field,
+        screen_fingerprint,
+    )
+
+
+async def clear_ui_message(user_id: int) -> None:
+    """Clear stored UI message id for the user (screen unchanged)."""
+    await _cache.update(user_id, last_ui_message_id=None)
+
+
+async def set_awaiting_input(user_id: int, field: str | None) -> None:
+    """Set or clear the awaiting input field in UI state."""
+    await _cache.update(user_id, awaiting_input_field=field)
+
+
+async def flush_ui_state() -> int:
+    return await _cache.flush()
+
+
+def reset_ui_state_cache() -> None:
+    """Drop cached and pending state (tests, or after switching databases)."""
+    global _cache
+    if _cache._flush_task is not None:
+        _cache._flush_task.cancel()
+    _cache = UiStateCache()
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+"""Per-user `UserConfig` cache.
+
+Config is read on every Today round, answer and quiz, but only changes from
+the settings and packs screens. Rows are loaded once into a bounded LRU of
+`models.UserConfig`; the writers call `invalidate_user_config`. A TTL bounds
+staleness when another bot process changed the row.
+"""
+
+import time
+from collections import OrderedDict
+
+from srsbot.config import USER_CONFIG_CACHE_SIZE, USER_CONFIG_TTL_SECONDS
+from srsbot.db import get_read_db
+from srsbot.models import UserConfig
+
+
+_cache: OrderedDict[int, tuple[float, UserConfig]] = OrderedDict()
+
+
+def default_user_config(user_id: int) -> UserConfig:
+    return UserConfig(
+        user_id=user_id,
+        daily_new_target=8,
+        review_limit_per_day=35,
+        push_time="09:00",
+        pack_tags="daily",
+        intra_spacing_k=3,
+        quiz_question_limit=10,
+        tz=None,
+    )
+
+
+async def _load(user_id: int) -> UserConfig | None:
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT daily_new_target, review_limit_per_day, push_time, pack_tags, intra_spacing_k, "
+            "quiz_question_limit, tz FROM user_config WHERE user_id=?",
+            (user_id,),
+        )
+        row = await cur.fetchone()
+    if row is None:
+        return None
+    return UserConfig(
+        user_id=user_id,
+        daily_new_target=int(row[0]),
+        review_limit_per_day=int(row[1]),
+        push_time=str(row[2]),
+        pack_tags=str(row[3] or ""),
+        intra_spacing_k=int(row[4]),
+        quiz_question_limit=int(row[5]) if row[5] is not None else 10,
+        tz=row[6],
+    )
+
+
+async def get_user_config(user_id: int) -> UserConfig:
+    """Return the user's config (defaults if there is no row yet). Do not mutate."""
+    hit = _cache.get(user_id)
+    now = time.monotonic()
+    if hit is not None and now - hit[0] < USER_CONFIG_TTL_SECONDS:
+        _cache.move_to_end(user_id)
+        return hit[1]
+    cfg = await _load(user_id)
+    if cfg is None:
+        # Not cached: the row appears once the user runs /start
+        _cache.pop(user_id, None)
+        return default_user_config(user_id)
+    _cache[user_id] = (now, cfg)
+    _cache.move_to_end(user_id)
+    if len(_cache) > USER_CONFIG_CACHE_SIZE:
+        _cache.popitem(last=False)
+    return cfg
+
+
+def invalidate_user_config(user_id: int) -> None:
+    """Drop the cached config after writing to `user_config`."""
+    _cache.pop(user_id, None)
+
+
+def reset_user_configs() -> None:
+    _cache.clear()
@@ -3,6 +3,7 @@ from __future__ import annotations
 """Input validators for Settings inline UI."""
 
 from typing import Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 
 def validate_int_in_range(text: str, lo: int, hi: int) -> Tuple[bool, str | None]:
@@ -27,9 +28,14 @@ def validate_hhmm(text: str) -> Tuple[bool, str | None]:
 
 
 def validate_timezone(text: str) -> Tuple[bool, str | None]:
-    # Optional: accept non-empty tokens with at least one slash
     s = text.strip()
+    if s.upper() == "UTC":
+        return True, None
     if "/" not in s or len(s) < 3:
         return False, "Invalid timezone. Expected format like Europe/Berlin."
+    try:
+        ZoneInfo(s)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False, "Unknown timezone. Expected an IANA name like Europe/Berlin."
     return True, None
 
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Iterable
+
+import pytest
+import pytest_asyncio
+
+import srsbot.db as dbmod
+from srsbot.catalog import reset_catalog
+from srsbot.content import split_tags
+from srsbot.frontier import reset_frontiers
+from srsbot.session import reset_session_store
+from srsbot.ui_state import reset_ui_state_cache
+from srsbot.user_config import reset_user_configs
+
+
+@pytest_asyncio.fixture
+async def db_path(tmp_path, monkeypatch) -> AsyncIterator[Path]:
+    """Point srsbot.db at a fresh, fully migrated temp database."""
+    path: Path = tmp_path / "test.db"
+    monkeypatch.setattr(dbmod, "DB_PATH", path, raising=False)
+    await dbmod.init_db()
+    reset_catalog()
+    reset_frontiers()
+    reset_ui_state_cache()
+    reset_user_configs()
+    reset_session_store()
+    yield path
+    reset_catalog()
+    reset_frontiers()
+    reset_ui_state_cache()
+    reset_user_configs()
+    reset_session_store()
+
+
+InsertCards = Callable[[Iterable[tuple[int, str, str]]], Awaitable[None]]
+
+
+@pytest.fixture
+def insert_cards(db_path: Path) -> InsertCards:
+    """Return a coroutine inserting (id, phrasal, tags) cards with their card_tags rows."""
+
+    async def insert(rows: Iterable[tuple[int, str, str]]) -> None:
+        async with dbmod.get_db() as db:
+            for card_id, phrasal, tags in rows:
+                await db.execute(
+                    "INSERT INTO cards(id, phrasal, meaning_en, examples_json, tags, sense_uid) VALUES(?,?,?,?,?,?)",
+                    (card_id, phrasal, f"meaning of {phrasal}", '["Ex one.", "Ex two."]', tags, f"{phrasal}__{card_id}"),
+                )
+                await dbmod.set_card_tags(db, card_id, split_tags(tags))
+            await db.commit()
+
+    return insert
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+import srsbot.db as dbmod
+from srsbot.answer_service import process_answer
+from srsbot.user_config import get_user_config
+
+
+async def _setup_user(user_id: int, today: date) -> None:
+    await dbmod.ensure_user_config(user_id)
+    await dbmod.init_or_get_day_state(user_id, today.isoformat())
+
+
+@pytest.mark.asyncio
+async def test_process_answer_writes_everything_in_one_commit(db_path):
+    today = date(2024, 1, 1)
+    await _setup_user(1, today)
+    await get_user_config(1)  # warm config cache
+    pool = await dbmod.open_pool(readers=1)
+    statements: list[str] = []
+    try:
+        for conn in pool.connections:
+            await conn.set_trace_callback(statements.append)
+        outcome = await process_answer(1, 10, "good", today)
+    finally:
+        await dbmod.close_pool()
+
+    assert outcome.was_new
+    assert outcome.result.requeue_after == 3
+    assert outcome.counters is not None
+    assert outcome.counters.shown_new_today == 1
+    assert outcome.counters.good_today == 1
+    assert statements.count("COMMIT") == 1
+    assert sum(1 for s in statements if s.lstrip().upper().startswith("SELECT")) == 1
+
+    async with dbmod.get_read_db() as db:
+        cur = await db.execute("SELECT learning_good_count FROM progress WHERE user_id=1 AND card_id=10")
+        assert (await cur.fetchone())[0] == 1
+        cur = await db.execute("SELECT COUNT(*), SUM(is_new) FROM answers WHERE user_id=1")
+        assert tuple(await cur.fetchone()) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_process_answer_counts_first_serve_once(db_path):
+    today = date(2024, 1, 1)
+    await _setup_user(1, today)
+    await process_answer(1, 10, "again", today)
+    outcome = await process_answer(1, 10, "good", today)
+    assert outcome.counters is not None
+    # The same new card answered twice counts as one new card shown today
+    assert outcome.counters.shown_new_today == 1
+    assert outcome.counters.good_today == 1
+    assert outcome.counters.again_today == 1
+
+
+@pytest.mark.asyncio
+async def test_review_first_serve_and_prune(db_path):
+    today = date(2024, 1, 2)
+    await _setup_user(1, today)
+    async with dbmod.get_db() as db:
+        await db.execute(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES (1, 4, 'review', 2, '2024-01-01')"
+        )
+        await db.execute("INSERT INTO day_seen VALUES (1, '2024-01-01', 'review', 4)")
+        await db.commit()
+    first = await process_answer(1, 4, "good", today)
+    second = await process_answer(1, 4, "good", today)
+    assert first.counters is not None and first.counters.served_review_count == 1
+    assert second.counters is not None and second.counters.served_review_count == 1
+
+    assert await dbmod.prune_day_seen(today.isoformat()) == 1
+    async with dbmod.get_read_db() as db:
+        cur = await db.execute("SELECT session_date, kind, card_id FROM day_seen WHERE user_id=1")
+        assert [tuple(r) for r in await cur.fetchall()] == [("2024-01-02", "review", 4)]
+
+
+@pytest.mark.asyncio
+async def test_process_answer_without_day_state(db_path):
+    outcome = await process_answer(2, 5, "good", date(2024, 1, 1))
+    assert outcome.counters is None
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from srsbot.catalog import get_catalog, refresh_catalog, run_catalog_refresh_loop
+
+
+@pytest.mark.asyncio
+async def test_catalog_parses_records_and_pack_counts(insert_cards):
+    await insert_cards([(1, "bring up", "Work, meetings"), (2, "bring up", "daily"), (3, "look up", "work")])
+
+    catalog = await get_catalog()
+    card = catalog.get(1)
+    assert card is not None
+    assert card.examples == ("Ex one.", "Ex two.")
+    assert card.tags == ("work", "meetings")
+    assert not hasattr(card, "__dict__")
+    assert dict(catalog.pack_counts) == {"work": 2, "meetings": 1, "daily": 1}
+    assert catalog.total_phrasals == 2
+    assert catalog.get(99) is None
+
+
+@pytest.mark.asyncio
+async def test_catalog_refreshes_only_when_version_changes(insert_cards):
+    await insert_cards([(1, "bring up", "work")])
+    catalog = await get_catalog()
+    assert len(catalog) == 1
+    assert await refresh_catalog() is False
+
+    await insert_cards([(2, "look up", "work")])
+    assert await refresh_catalog() is True
+    refreshed = await get_catalog()
+    assert len(refreshed) == 2
+    assert refreshed.version > catalog.version
+
+
+@pytest.mark.asyncio
+async def test_refresh_loop_picks_up_reseeded_cards(insert_cards):
+    await insert_cards([(1, "bring up", "work")])
+    assert len(await get_catalog()) == 1
+    task = asyncio.create_task(run_catalog_refresh_loop(interval=0.01))
+    try:
+        await insert_cards([(2, "look up", "work")])
+        for _ in range(100):
+            if len(await get_catalog()) == 2:
+                break
+            await asyncio.sleep(0.01)
+        assert len(await get_catalog()) == 2
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
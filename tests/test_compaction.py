@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import csv
+import gzip
+from datetime import date
+
+import pytest
+
+from srsbot.compaction import compact_answers, run_compaction_daily
+from srsbot.db import get_db, get_read_db
+
+
+async def _insert_answers(rows) -> None:
+    async with get_db() as db:
+        await db.executemany(
+            "INSERT INTO answers(user_id, card_id, answer, is_new, ts) VALUES(?,?,?,?,?)", rows
+        )
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_old_answers_roll_up_and_are_deleted_in_chunks(db_path, tmp_path):
+    old = [(1, 5, "good" if i % 3 else "again", int(i == 0), f"2024-01-0{1 + i % 2} 10:00:{i:02d}") for i in range(7)]
+    recent = [(1, 5, "good", 0, "2024-03-30 09:00:00")]
+    await _insert_answers(old + recent)
+
+    report = await compact_answers(date(2024, 4, 1), retention_days=30, chunk=3, archive_dir=tmp_path / "arc")
+    assert report.rows_deleted == 7 and report.chunks == 3
+    assert report.archive_path is not None and report.archive_bytes > 0
+
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT ts FROM answers")
+        assert [r[0] for r in await cur.fetchall()] == ["2024-03-30 09:00:00"]
+        cur = await db.execute("SELECT day, card_id, good, again, new_count FROM answer_daily_card ORDER BY day")
+        assert [tuple(r) for r in await cur.fetchall()] == [
+            ("2024-01-01", 5, 2, 2, 1),
+            ("2024-01-02", 5, 2, 1, 0),
+        ]
+    with gzip.open(report.archive_path, "rt") as f:
+        archived = list(csv.reader(f))
+    assert len(archived) == 7 and archived[0][4] == "2024-01-01 10:00:00"
+
+
+@pytest.mark.asyncio
+async def test_daily_run_is_once_per_day(db_path):
+    await _insert_answers([(1, 1, "good", 0, "2000-01-01 00:00:00")])
+    first = await run_compaction_daily(date(2024, 1, 1))
+    assert first is not None and first.rows_deleted == 1
+    assert await run_compaction_daily(date(2024, 1, 1)) is None
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import aiosqlite
+import pytest
+
+import srsbot.db as dbmod
+from srsbot.answer_service import process_answer
+from srsbot.handlers.stats import _build_stats_text
+from srsbot.migrations import MIGRATIONS, migrate
+
+
+@pytest.mark.asyncio
+async def test_answers_maintain_rollup_and_stats_read_it(db_path):
+    today = datetime.now(timezone.utc).date()
+    old = (today - timedelta(days=3)).isoformat()
+    async with dbmod.get_db() as db:
+        await db.execute("INSERT INTO daily_user_stats VALUES (1, ?, 4, 3, 1, 2)", (old,))
+        await db.execute("INSERT INTO daily_user_stats VALUES (1, '2000-01-01', 50, 50, 0, 0)")
+        await db.commit()
+    await process_answer(1, 10, "good", today)
+    await process_answer(1, 10, "again", today)
+    await process_answer(1, 11, "good", today)
+
+    async with dbmod.get_read_db() as db:
+        cur = await db.execute(
+            "SELECT shown, good, again, new_count FROM daily_user_stats WHERE user_id=1 AND day=?",
+            (today.isoformat(),),
+        )
+        assert tuple(await cur.fetchone()) == (3, 2, 1, 3)  # new_count mirrors answers.is_new
+
+    text = await _build_stats_text(1)
+    assert "Today: shown 3, good 2, accuracy 67%" in text
+    assert "Week: shown 7, good 5, accuracy 71%" in text
+
+
+@pytest.mark.asyncio
+async def test_backfill_rolls_up_only_pre_migration_answers(tmp_path, monkeypatch):
+    path = tmp_path / "legacy.db"
+    async with aiosqlite.connect(path) as db:
+        for v, fn in MIGRATIONS:
+            if v < 12:
+                await fn(db)
+        await db.executemany(
+            "INSERT INTO answers(user_id, card_id, answer, is_new, ts) VALUES(?,?,?,?,?)",
+            [
+                (1, 1, "good", 1, "2024-01-01 08:00:00"),
+                (1, 2, "again", 0, "2024-01-01 23:59:59"),
+                (1, 3, "good", 0, "2024-01-02 00:00:01"),
+                (2, 1, "good", 1, "2024-01-01 10:00:00"),
+            ],
+        )
+        await db.commit()
+        await migrate(db)
+    monkeypatch.setattr(dbmod, "DB_PATH", path, raising=False)
+    # Answered after the upgrade: counted live, not by the backfill
+    await process_answer(1, 4, "good", date(2024, 1, 2))
+
+    assert await dbmod.backfill_daily_user_stats(chunk=3) == 4
+    assert await dbmod.backfill_daily_user_stats() == 0  # rerun is a no-op
+    async with dbmod.get_read_db() as db:
+        cur = await db.execute(
+            "SELECT user_id, day, shown, good, again, new_count FROM daily_user_stats "
+            "WHERE day<'2025-01-01' ORDER BY 1, 2"
+        )
+        rows = [tuple(r) for r in await cur.fetchall()]
+    assert rows == [
+        (1, "2024-01-01", 2, 1, 1, 1),
+        (1, "2024-01-02", 1, 1, 0, 0),
+        (2, "2024-01-01", 1, 1, 0, 1),
+    ]
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from srsbot.pool import ConnectionPool
+
+
+@pytest.mark.asyncio
+async def test_pool_reuses_connections_and_counts(tmp_path):
+    pool = ConnectionPool((tmp_path / "pool.db").as_posix(), readers=2)
+    await pool.open()
+    try:
+        async with pool.writer() as db:
+            await db.execute("CREATE TABLE t (x INTEGER)")
+            await db.execute("INSERT INTO t VALUES (1)")
+            await db.commit()
+        async with pool.reader() as db:
+            cur = await db.execute("SELECT COUNT(*) FROM t")
+            assert (await cur.fetchone())[0] == 1
+            assert pool.stats().in_use == 1
+
+        stats = pool.stats()
+        assert stats.checkouts == 2
+        assert stats.waits == 0
+        assert stats.in_use == 0
+        assert len(pool.connections) == 3
+    finally:
+        await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_is_exclusive_and_rolls_back_leftovers(tmp_path):
+    pool = ConnectionPool((tmp_path / "pool.db").as_posix(), readers=1)
+    await pool.open()
+    try:
+        async with pool.writer() as db:
+            await db.execute("CREATE TABLE t (x INTEGER)")
+            await db.commit()
+
+        order: list[str] = []
+
+        async def first() -> None:
+            async with pool.writer() as db:
+                await db.execute("INSERT INTO t VALUES (1)")  # left uncommitted
+                order.append("first")
+                await asyncio.sleep(0.05)
+
+        async def second() -> None:
+            await asyncio.sleep(0.01)
+            async with pool.writer() as db:
+                order.append("second")
+                assert not db.in_transaction
+
+        await asyncio.gather(first(), second())
+        assert order == ["first", "second"]
+        assert pool.stats().waits == 1
+
+        async with pool.reader() as db:
+            cur = await db.execute("SELECT COUNT(*) FROM t")
+            assert (await cur.fetchone())[0] == 0
+    finally:
+        await pool.close()
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from srsbot.answer_service import process_answer
+from srsbot.db import get_db, get_read_db
+from srsbot.forecast import UpcomingLoad, check_due_forecast, due_histogram, upcoming_load
+from srsbot.scheduler import push_text
+
+
+async def _forecast(user_id: int) -> dict[str, int]:
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT day, count FROM due_forecast WHERE user_id=?", (user_id,))
+        return {str(r[0]): int(r[1]) for r in await cur.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_triggers_follow_progress_writes(db_path):
+    today = date(2024, 1, 10)
+    async with get_db() as db:
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES (1, ?, 'review', 1, ?)",
+            [(1, "2024-01-08"), (2, "2024-01-10"), (3, "2024-01-11"), (4, "2024-01-15")],
+        )
+        await db.execute(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES (1, 5, 'learning', 0, NULL)"
+        )
+        await db.commit()
+    assert await upcoming_load(1, today) == UpcomingLoad(due_now=2, tomorrow=1, next_7_days=2)
+
+    # Learning card graduates to tomorrow; a lapsed review card leaves the forecast
+    await process_answer(1, 5, "good", today)
+    await process_answer(1, 5, "good", today)
+    await process_answer(1, 2, "again", today)
+    assert await _forecast(1) == {"2024-01-08": 1, "2024-01-11": 2, "2024-01-15": 1}
+
+    async with get_db() as db:
+        await db.execute("DELETE FROM progress WHERE user_id=1 AND card_id=4")
+        await db.commit()
+    assert await due_histogram(1, date(2024, 1, 9), date(2024, 1, 20)) == {date(2024, 1, 11): 2}
+    assert await check_due_forecast() == []
+
+
+@pytest.mark.asyncio
+async def test_checker_reports_and_repairs_drift(db_path):
+    async with get_db() as db:
+        await db.execute(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES (2, 1, 'review', 1, '2024-02-01')"
+        )
+        await db.execute("UPDATE due_forecast SET count=5 WHERE user_id=2")
+        await db.execute("INSERT INTO due_forecast VALUES (2, '2024-03-01', 4)")
+        await db.commit()
+    drift = await check_due_forecast([2])
+    assert {(d.day, d.stored, d.actual) for d in drift} == {("2024-02-01", 5, 1), ("2024-03-01", 4, 0)}
+    assert await check_due_forecast([3]) == []
+
+    await check_due_forecast(repair=True)
+    assert await _forecast(2) == {"2024-02-01": 1}
+    assert await check_due_forecast() == []
+
+
+def test_push_text_mentions_tomorrow_only_when_due():
+    assert "tomorrow" not in push_text(3, 2, 0)
+    assert push_text(3, 2, 4) == "You have 5 cards today: 3 reviews + 2 new. 4 reviews due tomorrow. Start? (/today)"
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from srsbot.answer_service import process_answer
+from srsbot.catalog import refresh_catalog
+from srsbot.db import get_db, get_read_db
+from srsbot.frontier import get_frontier, rebuild_unseen_counts, reset_frontiers, unseen_count
+from srsbot.queue import sample_new_cards
+
+
+def _work_cards(ids: range) -> list[tuple[int, str, str]]:
+    return [(i, f"verb {i}", "work") for i in ids]
+
+
+@pytest.mark.asyncio
+async def test_unseen_count_is_updated_on_first_answer_only(insert_cards):
+    await insert_cards(_work_cards(range(1, 11)))
+    assert await unseen_count(1) == 10
+
+    today = date(2024, 1, 1)
+    await process_answer(1, 3, "good", today)
+    await process_answer(1, 3, "again", today)
+    assert await unseen_count(1) == 9
+    assert (await get_frontier(1)).is_seen(3)
+
+    # Uncached users read the persisted count
+    reset_frontiers()
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT unseen_count FROM user_frontier WHERE user_id=1")
+        assert (await cur.fetchone())[0] == 9
+    assert await unseen_count(1) == 9
+
+
+@pytest.mark.asyncio
+async def test_frontier_rebuilds_when_catalog_changes(insert_cards):
+    await insert_cards(_work_cards(range(1, 6)))
+    await process_answer(1, 1, "good", date(2024, 1, 1))
+    assert await unseen_count(1) == 4
+
+    await insert_cards(_work_cards(range(6, 9)))
+    assert await refresh_catalog()
+    assert await unseen_count(1) == 7
+    picked = await sample_new_cards(1, ["work"], 10)
+    assert sorted(c.id for c in picked) == [2, 3, 4, 5, 6, 7, 8]
+
+
+@pytest.mark.asyncio
+async def test_cold_frontier_does_not_rewrite_matching_row(insert_cards):
+    await insert_cards(_work_cards(range(1, 6)))
+    assert await unseen_count(1) == 5
+    await process_answer(1, 2, "good", date(2024, 1, 1))
+    reset_frontiers()
+    async with get_db() as db:
+        await db.executescript(
+            """
+            CREATE TABLE frontier_writes (n INTEGER);
+            CREATE TRIGGER trg_fw AFTER UPDATE ON user_frontier BEGIN INSERT INTO frontier_writes VALUES (1); END;
+            """
+        )
+    assert (await get_frontier(1)).unseen_count == 4
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT COUNT(*) FROM frontier_writes")
+        assert (await cur.fetchone())[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_rebuild_unseen_counts_upserts_in_one_statement(insert_cards):
+    await insert_cards(_work_cards(range(1, 6)))
+    async with get_db() as db:
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state) VALUES (?, ?, 'learning')",
+            [(1, 1), (1, 2), (2, 3)],
+        )
+        await db.execute("INSERT INTO user_frontier VALUES (2, 0, 99)")
+        await db.commit()
+    assert await rebuild_unseen_counts([1, 2, 3, 1]) == {1: 3, 2: 4, 3: 5}
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT user_id, unseen_count FROM user_frontier ORDER BY user_id")
+        assert [tuple(r) for r in await cur.fetchall()] == [(1, 3), (2, 4), (3, 5)]
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from srsbot.db import ensure_user_config, set_timezone
+from srsbot.lease import Lease, run_while_leader
+from srsbot.outbox import drain_outbox
+from srsbot.push import PushDispatcher
+from srsbot.scheduler import daily_tick
+
+NINE = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        await asyncio.sleep(0.001)
+        self.sent.append(chat_id)
+
+
+@pytest.mark.asyncio
+async def test_lease_is_exclusive_until_expired_or_released(db_path):
+    now = [1000.0]
+    a = Lease("scheduler", holder="a", ttl=10, clock=lambda: now[0])
+    b = Lease("scheduler", holder="b", ttl=10, clock=lambda: now[0])
+    assert await a.try_acquire() and a.held
+    assert not await b.try_acquire()
+    now[0] += 5
+    assert await a.try_acquire()  # heartbeat renews
+    now[0] += 9
+    assert not await b.try_acquire()
+    now[0] += 2  # a stopped renewing and expired
+    assert not a.held
+    assert await b.try_acquire()
+    assert not await a.try_acquire()
+    await b.release()
+    assert await a.try_acquire()
+
+
+@pytest.mark.asyncio
+async def test_several_instances_send_each_push_exactly_once(db_path):
+    for uid in range(1, 31):
+        await ensure_user_config(uid)
+        await set_timezone(uid, "UTC")
+    bot = FakeBot()
+    running: list[str] = []
+
+    def make_job(name: str):
+        async def job() -> None:
+            running.append(name)
+            while True:
+                await daily_tick(NINE)
+                await drain_outbox(bot, dispatcher=PushDispatcher(bot, rate=1000), now=NINE)  # type: ignore[arg-type]
+                await asyncio.sleep(0.01)
+
+        return job
+
+    instances = [
+        asyncio.create_task(
+            run_while_leader(Lease("scheduler", holder=f"i{n}", ttl=0.3), make_job(f"i{n}"), heartbeat=0.05)
+        )
+        for n in range(3)
+    ]
+    await asyncio.sleep(0.3)
+    assert len(running) == 1
+    # Leader goes away; another instance takes over and finds nothing left to send
+    leader = int(running[0][1:])
+    instances[leader].cancel()
+    await asyncio.gather(instances[leader], return_exceptions=True)
+    await asyncio.sleep(0.3)
+    for t in instances:
+        t.cancel()
+    await asyncio.gather(*instances, return_exceptions=True)
+
+    assert len(running) == 2 and running[0] != running[1]
+    assert sorted(bot.sent) == list(range(1, 31))
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import srsbot.handlers.today as today_mod
+from srsbot.middleware import PerUserSerialMiddleware
+from srsbot.session import store
+
+
+@pytest.mark.asyncio
+async def test_updates_of_one_user_run_in_order_others_in_parallel():
+    mw = PerUserSerialMiddleware()
+    log: list[tuple[str, str]] = []
+
+    async def handler(event, data):
+        log.append(("start", event))
+        await asyncio.sleep(0.01)
+        log.append(("end", event))
+
+    def call(user_id: int, name: str):
+        return mw(handler, name, {"event_from_user": SimpleNamespace(id=user_id)})
+
+    await asyncio.gather(call(1, "a1"), call(1, "a2"), call(2, "b1"))
+    # a1 finishes before a2 starts; b1 overlaps with a1
+    assert log.index(("end", "a1")) < log.index(("start", "a2"))
+    assert log.index(("start", "b1")) < log.index(("end", "a1"))
+    assert len(mw) == 0  # locks are dropped when idle
+
+
+class FakeCallback:
+    def __init__(self, user_id: int, data: str) -> None:
+        self.from_user = SimpleNamespace(id=user_id)
+        self.data = data
+        self.message = None
+        self.answered = 0
+
+    async def answer(self, *args, **kwargs) -> None:
+        self.answered += 1
+
+
+@pytest.mark.asyncio
+async def test_double_tap_answers_card_once(db_path, monkeypatch):
+    answered: list[int] = []
+
+    async def fake_process_answer(user_id, card_id, ans, today):
+        answered.append(card_id)
+        result = SimpleNamespace(requeue_after=None)
+        return SimpleNamespace(result=result, counters=None)
+
+    monkeypatch.setattr(today_mod, "process_answer", fake_process_answer)
+    s = await store.get(1)
+    s.queue = [6, 7]
+    s.current_card_id = 5
+
+    mw = PerUserSerialMiddleware()
+    taps = [FakeCallback(1, "ans:good:5") for _ in range(2)]
+    await asyncio.gather(
+        *(mw(lambda e, d: today_mod.on_ans(e), cb, {"event_from_user": cb.from_user}) for cb in taps)
+    )
+    assert answered == [5]
+    assert s.current_card_id == 6 and list(s.queue) == [7]
+    assert all(cb.answered == 1 for cb in taps)
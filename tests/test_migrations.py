@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import aiosqlite
+import pytest
+
+from srsbot.migrations import MIGRATIONS, current_version, migrate
+
+
+async def _columns(db: aiosqlite.Connection, table: str) -> set[str]:
+    cur = await db.execute(f"PRAGMA table_info({table})")
+    return {str(r[1]) for r in await cur.fetchall()}
+
+
+@pytest.mark.asyncio
+async def test_migrate_fresh_db_once(tmp_path):
+    async with aiosqlite.connect(tmp_path / "m.db") as db:
+        latest = MIGRATIONS[-1][0]
+        assert await migrate(db) == latest
+        assert await current_version(db) == latest
+        cur = await db.execute("SELECT COUNT(*) FROM schema_version")
+        assert (await cur.fetchone())[0] == len(MIGRATIONS)
+        # Second run is a no-op
+        assert await migrate(db) == latest
+        cur = await db.execute("SELECT COUNT(*) FROM schema_version")
+        assert (await cur.fetchone())[0] == len(MIGRATIONS)
+
+
+@pytest.mark.asyncio
+async def test_migrate_adds_legacy_columns(tmp_path):
+    async with aiosqlite.connect(tmp_path / "legacy.db") as db:
+        # Database created by an old build, before versioning and column additions
+        await db.executescript(
+            """
+            CREATE TABLE user_ui_state (user_id INTEGER PRIMARY KEY, last_ui_message_id INTEGER, current_screen TEXT);
+            CREATE TABLE user_config (user_id INTEGER PRIMARY KEY, daily_new_target INTEGER NOT NULL DEFAULT 8);
+            """
+        )
+        await migrate(db)
+        assert {"awaiting_input_field", "quiz_state_json"} <= await _columns(db, "user_ui_state")
+        assert "quiz_question_limit" in await _columns(db, "user_config")
+
+
+@pytest.mark.asyncio
+async def test_migrate_moves_json_seen_ids_to_day_seen(tmp_path):
+    async with aiosqlite.connect(tmp_path / "seen.db") as db:
+        for v, fn in MIGRATIONS:
+            if v < 11:
+                await fn(db)
+        await db.execute(
+            "INSERT INTO user_day_state(user_id, session_date, review_seen_ids_json, new_seen_ids_json) "
+            "VALUES (1, '2024-01-01', '[3, 5]', '[7]'), (2, '2024-01-01', 'oops', NULL)"
+        )
+        await migrate(db)
+        cur = await db.execute("SELECT user_id, kind, card_id FROM day_seen ORDER BY 1, 2, 3")
+        assert [tuple(r) for r in await cur.fetchall()] == [(1, "new", 7), (1, "review", 3), (1, "review", 5)]
+        cur = await db.execute("SELECT COUNT(*) FROM user_day_state WHERE review_seen_ids_json IS NOT NULL")
+        assert (await cur.fetchone())[0] == 0
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from srsbot.db import get_db
+from srsbot.queue import sample_new_cards
+
+
+def _cards(n: int) -> list[tuple[int, str, str]]:
+    # Two senses per phrasal; odd ids are in the "work" pack
+    return [(i, f"verb {(i + 1) // 2}", "work" if i % 2 else "daily") for i in range(1, n + 1)]
+
+
+@pytest.mark.asyncio
+async def test_sample_respects_limit_packs_and_one_sense_per_phrasal(insert_cards):
+    await insert_cards(_cards(200))
+    random.seed(1)
+    picked = await sample_new_cards(1, [], 8)
+    assert len(picked) == 8
+    assert len({c.phrasal for c in picked}) == 8
+
+    work = await sample_new_cards(1, ["work"], 8)
+    assert len(work) == 8 and all(c.id % 2 == 1 for c in work)
+
+
+@pytest.mark.asyncio
+async def test_sample_skips_seen_and_excluded_and_wraps(insert_cards):
+    await insert_cards(_cards(20))
+    async with get_db() as db:
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state) VALUES (1, ?, 'learning')",
+            [(i,) for i in range(1, 19)],
+        )
+        await db.commit()
+    # Only cards 19 and 20 are unseen; they share a phrasal, so one is picked
+    for seed in range(5):
+        random.seed(seed)
+        picked = await sample_new_cards(1, [], 8)
+        assert len(picked) == 1 and picked[0].id in {19, 20}
+    assert await sample_new_cards(1, [], 8, exclude=[19, 20]) == []
+
+
+@pytest.mark.asyncio
+async def test_sample_draws_from_the_whole_pack(insert_cards):
+    await insert_cards(_cards(400))
+    spans = []
+    for seed in range(20):
+        random.seed(seed)
+        ids = [c.id for c in await sample_new_cards(1, ["work"], 8)]
+        spans.append(max(ids) - min(ids))
+    # A contiguous walk would keep picks within one window of ~32 ids
+    assert sum(spans) / len(spans) > 200
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError
+from aiogram.methods import SendMessage
+
+from srsbot.db import get_db, get_read_db
+from srsbot.outbox import (
+    OutboxItem,
+    backoff_delay,
+    drain_outbox,
+    enqueue_pushes,
+    outbox_counts,
+    prune_outbox,
+    recover_outbox,
+)
+from srsbot.push import PushDispatcher
+
+T0 = datetime(2024, 1, 1, 9, 0, tzinfo=timezone.utc)
+
+
+class FlakyBot:
+    def __init__(self, fail_times: int = 0, blocked: set[int] | None = None) -> None:
+        self.fail_times = fail_times
+        self.blocked = blocked or set()
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        if chat_id in self.blocked:
+            raise TelegramForbiddenError(SendMessage(chat_id=chat_id, text=text), "blocked")
+        if self.fail_times > 0:
+            self.fail_times -= 1
+            raise ConnectionError("network down")
+        self.sent.append(chat_id)
+
+
+def _dispatcher(bot: FlakyBot) -> PushDispatcher:
+    return PushDispatcher(bot, rate=1000, max_attempts=1)  # type: ignore[arg-type]
+
+
+async def _row(user_id: int) -> tuple:
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT status, attempts, last_error FROM push_outbox WHERE user_id=?", (user_id,)
+        )
+        return tuple(await cur.fetchone())
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_per_user_and_day(db_path):
+    items = [OutboxItem(u, "2024-01-01", "hi") for u in (1, 2, 3)]
+    assert await enqueue_pushes(items, T0) == 3
+    assert await enqueue_pushes(items, T0) == 0
+    assert await outbox_counts() == {"pending": 3}
+
+
+@pytest.mark.asyncio
+async def test_drain_marks_sent_failed_and_notified(db_path):
+    await enqueue_pushes([OutboxItem(u, "2024-01-01", "hi") for u in (1, 2)], T0)
+    bot = FlakyBot(blocked={2})
+    stats = await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0)  # type: ignore[arg-type]
+    assert (stats.sent, stats.blocked) == (1, 1)
+    assert await _row(1) == ("sent", 1, None)
+    assert await _row(2) == ("failed", 1, "blocked")
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT last_notified_date FROM user_state WHERE user_id=1")
+        assert (await cur.fetchone())[0] == "2024-01-01"
+
+
+@pytest.mark.asyncio
+async def test_transient_failure_retries_with_backoff(db_path):
+    await enqueue_pushes([OutboxItem(1, "2024-01-01", "hi")], T0)
+    bot = FlakyBot(fail_times=1)
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0)  # type: ignore[arg-type]
+    assert await _row(1) == ("pending", 1, "failed")
+    # Not due again before the backoff elapses
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0 + timedelta(seconds=1))  # type: ignore[arg-type]
+    assert bot.sent == []
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0 + backoff_delay(1))  # type: ignore[arg-type]
+    assert bot.sent == [1] and await _row(1) == ("sent", 2, None)
+
+
+@pytest.mark.asyncio
+async def test_interrupted_rows_are_not_resent_after_restart(db_path):
+    await enqueue_pushes([OutboxItem(1, "2024-01-01", "hi")], T0)
+    async with get_db() as db:
+        # Process died after claiming the row
+        await db.execute("UPDATE push_outbox SET status='sending', attempts=1")
+        await db.commit()
+    assert await recover_outbox() == 1
+    bot = FlakyBot()
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0)  # type: ignore[arg-type]
+    assert bot.sent == [] and await _row(1) == ("failed", 1, "interrupted")
+
+
+@pytest.mark.asyncio
+async def test_backed_off_row_expires_when_next_day_is_queued(db_path):
+    await enqueue_pushes([OutboxItem(1, "2024-01-01", "old")], T0)
+    bot = FlakyBot(fail_times=1)
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0)  # type: ignore[arg-type]
+    nxt = T0 + timedelta(days=1)
+    await enqueue_pushes([OutboxItem(1, "2024-01-02", "new")], nxt)
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=nxt)  # type: ignore[arg-type]
+    assert bot.sent == [1]
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT push_date, status, last_error FROM push_outbox ORDER BY push_date")
+        assert [tuple(r) for r in await cur.fetchall()] == [
+            ("2024-01-01", "failed", "expired"),
+            ("2024-01-02", "sent", None),
+        ]
+        cur = await db.execute("SELECT last_notified_date FROM user_state WHERE user_id=1")
+        assert (await cur.fetchone())[0] == "2024-01-02"
+
+
+@pytest.mark.asyncio
+async def test_rows_older_than_a_day_expire_and_notified_date_never_moves_back(db_path):
+    await enqueue_pushes([OutboxItem(1, "2024-01-01", "hi")], T0)
+    async with get_db() as db:
+        await db.execute("INSERT INTO user_state(user_id, last_notified_date) VALUES (2, '2024-01-03')")
+        await db.commit()
+    await enqueue_pushes([OutboxItem(2, "2024-01-02", "hi")], T0)
+    bot = FlakyBot()
+    # A Jan 1 row may still be a live retry on Jan 2 (UTC), not on Jan 3
+    await drain_outbox(bot, dispatcher=_dispatcher(bot), now=T0 + timedelta(days=2))  # type: ignore[arg-type]
+    assert bot.sent == [2]
+    assert await _row(1) == ("failed", 0, "expired")
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT last_notified_date FROM user_state WHERE user_id=2")
+        assert (await cur.fetchone())[0] == "2024-01-03"
+
+
+@pytest.mark.asyncio
+async def test_prune_removes_only_finished_rows_before_cutoff(db_path):
+    await enqueue_pushes(
+        [OutboxItem(1, "2024-01-01", "a"), OutboxItem(2, "2024-01-01", "b"), OutboxItem(3, "2024-01-05", "c")],
+        T0,
+    )
+    async with get_db() as db:
+        await db.execute("UPDATE push_outbox SET status='sent' WHERE user_id IN (1, 3)")
+        await db.commit()
+    assert await prune_outbox(date(2024, 1, 5)) == 1
+    assert await outbox_counts() == {"pending": 1, "sent": 1}
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from srsbot.push import PushDispatcher, PushMessage, TokenBucket
+
+
+class FakeBot:
+    """Bot double with send latency, a 429 on selected calls and blocked chats."""
+
+    def __init__(self, latency: float = 0.0, retry_after_calls: int = 0, blocked: set[int] | None = None) -> None:
+        self.latency = latency
+        self.retry_after_calls = retry_after_calls
+        self.blocked = blocked or set()
+        self.calls = 0
+        self.sent: list[int] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            method = SendMessage(chat_id=chat_id, text=text)
+            if self.retry_after_calls > 0:
+                self.retry_after_calls -= 1
+                raise TelegramRetryAfter(method, "Flood control exceeded", retry_after=0)
+            if chat_id in self.blocked:
+                raise TelegramForbiddenError(method, "bot was blocked by the user")
+            self.sent.append(chat_id)
+        finally:
+            self.in_flight -= 1
+
+
+def _messages(n: int) -> list[PushMessage]:
+    return [PushMessage(i, "hi") for i in range(1, n + 1)]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_bounds_concurrency_and_counts_outcomes():
+    bot = FakeBot(latency=0.01, blocked={3})
+    stats = await PushDispatcher(bot, rate=1000, concurrency=4).dispatch(_messages(20))  # type: ignore[arg-type]
+    assert bot.max_in_flight <= 4
+    assert sorted(bot.sent) == [i for i in range(1, 21) if i != 3]
+    assert (stats.sent, stats.blocked, stats.failed) == (19, 1, 0)
+    assert stats.outcomes[3] == "blocked"
+
+
+@pytest.mark.asyncio
+async def test_retry_after_requeues_instead_of_dropping():
+    bot = FakeBot(retry_after_calls=3)
+    stats = await PushDispatcher(bot, rate=1000, concurrency=2, max_attempts=5).dispatch(_messages(5))  # type: ignore[arg-type]
+    assert sorted(bot.sent) == [1, 2, 3, 4, 5]
+    assert stats.retry_after == 3 and stats.retried == 3 and stats.sent == 5
+
+
+@pytest.mark.asyncio
+async def test_retry_after_gives_up_after_max_attempts():
+    bot = FakeBot(retry_after_calls=10)
+    stats = await PushDispatcher(bot, rate=1000, max_attempts=2).dispatch(_messages(1))  # type: ignore[arg-type]
+    assert stats.outcomes == {1: "failed"} and bot.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    bucket = TokenBucket(rate=100, capacity=1)
+    t0 = time.monotonic()
+    for _ in range(11):
+        await bucket.acquire()
+    # 1 burst token, then 10 more at 100/s
+    assert time.monotonic() - t0 >= 0.09
+
+    bucket.pause(0.05)
+    t0 = time.monotonic()
+    await bucket.acquire()
+    assert time.monotonic() - t0 >= 0.04
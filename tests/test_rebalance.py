@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from srsbot.db import ensure_user_config, get_db, get_read_db
+from srsbot.forecast import check_due_forecast, due_histogram
+from srsbot.rebalance import rebalance_after_absence, rebalance_all, spread_over_free_days
+
+TODAY = date(2024, 3, 10)
+
+
+async def _seed_overdue(user_id: int, n: int) -> None:
+    async with get_db() as db:
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES (?, ?, 'review', 2, ?)",
+            [(user_id, i, f"2024-02-{1 + i % 28:02d}") for i in range(n)],
+        )
+        await db.commit()
+
+
+async def _due_by_today(user_id: int) -> int:
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT COUNT(*) FROM progress WHERE user_id=? AND state='review' AND due_at<=?",
+            (user_id, TODAY.isoformat()),
+        )
+        return int((await cur.fetchone())[0])
+
+
+@pytest.mark.asyncio
+async def test_nightly_job_spreads_backlogs_over_cap(db_path):
+    await ensure_user_config(1)  # review_limit_per_day 35
+    await _seed_overdue(1, 100)
+    await _seed_overdue(2, 20)  # no config row, default cap, nothing to move
+
+    report = await rebalance_all(TODAY)
+    assert (report.users, report.cards_moved) == (1, 65)
+    assert await _due_by_today(1) == 35
+    assert await _due_by_today(2) == 20
+    hist = await due_histogram(1, date(2024, 3, 11), date(2024, 3, 31))
+    assert sum(hist.values()) == 65 and max(hist.values()) <= 35
+    assert sorted(hist) == [date(2024, 3, 11), date(2024, 3, 12)]
+    assert await check_due_forecast() == []
+
+    # Nothing left over the cap: a second run is a no-op
+    assert (await rebalance_all(TODAY)).cards_moved == 0
+
+
+@pytest.mark.asyncio
+async def test_backlog_only_fills_free_room_on_busy_days(db_path):
+    await ensure_user_config(1)  # review_limit_per_day 35
+    await _seed_overdue(1, 100)
+    async with get_db() as db:
+        # Mar 11 is already full, Mar 12 has 20 due
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES (1, ?, 'review', 3, ?)",
+            [(1000 + i, "2024-03-11") for i in range(35)] + [(2000 + i, "2024-03-12") for i in range(20)],
+        )
+        await db.commit()
+
+    assert (await rebalance_all(TODAY)).cards_moved == 65
+    hist = await due_histogram(1, date(2024, 3, 11), date(2024, 3, 31))
+    assert hist == {date(2024, 3, 11): 35, date(2024, 3, 12): 35, date(2024, 3, 13): 35, date(2024, 3, 14): 15}
+    assert await check_due_forecast() == []
+
+    # With each day's share reviewed, the following nights find nothing to roll forward
+    for d in range(5):
+        day = TODAY + timedelta(days=d)
+        if d:
+            assert (await rebalance_all(day)).cards_moved == 0
+        async with get_db() as db:
+            cur = await db.execute(
+                "UPDATE progress SET due_at='2024-06-01' WHERE user_id=1 AND due_at<=?", (day.isoformat(),)
+            )
+            assert cur.rowcount <= 35
+            await db.commit()
+
+
+def test_spread_skips_full_days_and_leaves_the_overflow():
+    booked = {TODAY + timedelta(days=d): 2 for d in range(1, 4)}
+    booked[TODAY + timedelta(days=2)] = 0
+    moved = spread_over_free_days(list(range(10)), 2, TODAY, booked, days=3)
+    assert moved == [(0, TODAY + timedelta(days=2)), (1, TODAY + timedelta(days=2))]
+
+
+@pytest.mark.asyncio
+async def test_first_today_after_absence(db_path):
+    await ensure_user_config(1)
+    await _seed_overdue(1, 50)
+    async with get_db() as db:
+        await db.execute("INSERT INTO daily_user_stats(user_id, day, shown) VALUES (1, '2024-03-09', 5)")
+        await db.commit()
+    assert await rebalance_after_absence(1, TODAY) == 0  # active yesterday
+
+    async with get_db() as db:
+        await db.execute("UPDATE daily_user_stats SET day='2024-03-01' WHERE user_id=1")
+        await db.commit()
+    assert await rebalance_after_absence(1, TODAY) == 15
+    assert await _due_by_today(1) == 35
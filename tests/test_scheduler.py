@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+import pytest
+
+from srsbot.db import ensure_user_config, get_db, get_read_db, set_push_time, set_timezone
+from srsbot.outbox import drain_outbox, outbox_counts
+from srsbot.scheduler import (
+    compute_counts,
+    compute_counts_batch,
+    daily_tick,
+    due_user_ids,
+    refresh_push_buckets,
+    reset_scheduler_metrics,
+    run_due_buckets,
+    scheduler_metrics,
+)
+
+
+class FakeBot:
+    def __init__(self) -> None:
+        self.sent: list[int] = []
+
+    async def send_message(self, chat_id: int, text: str) -> None:
+        self.sent.append(chat_id)
+
+
+def _utc(hh: int, mm: int, ss: int = 0) -> datetime:
+    return datetime(2024, 1, 1, hh, mm, ss, tzinfo=timezone.utc)
+
+
+async def _snooze(user_id: int, until: datetime) -> None:
+    async with get_db() as db:
+        await db.execute("UPDATE user_state SET snoozed_until=? WHERE user_id=?", (until.isoformat(), user_id))
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_push_bucket_follows_push_time_and_timezone(db_path):
+    await ensure_user_config(1)
+    await set_push_time(1, "07:45")
+    await set_timezone(1, "Asia/Yerevan")  # UTC+4, no DST
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT push_time, push_minute_utc FROM user_config WHERE user_id=1")
+        assert tuple(await cur.fetchone()) == ("07:45", 225)
+    await set_timezone(1, "UTC")
+    await set_push_time(1, "00:30")
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT push_minute_utc FROM user_config WHERE user_id=1")
+        assert (await cur.fetchone())[0] == 30
+
+
+@pytest.mark.asyncio
+async def test_refresh_push_buckets_follows_dst(db_path):
+    for uid in (1, 2):
+        await ensure_user_config(uid)
+        await set_timezone(uid, "Europe/Berlin")
+    await refresh_push_buckets(date(2024, 1, 15))
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT push_minute_utc FROM user_config")
+        assert {r[0] for r in await cur.fetchall()} == {8 * 60}  # 09:00 CET
+    assert await refresh_push_buckets(date(2024, 7, 15)) == 2
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT push_minute_utc FROM user_config")
+        assert {r[0] for r in await cur.fetchall()} == {7 * 60}  # 09:00 CEST
+
+
+@pytest.mark.asyncio
+async def test_due_users_by_minute_and_snooze(db_path):
+    for uid in (1, 2, 3):
+        await ensure_user_config(uid)  # default 09:00
+        await set_timezone(uid, "UTC")
+    await set_push_time(3, "10:00")
+    await _snooze(2, _utc(9, 30, 15))
+
+    assert await due_user_ids(_utc(8, 59)) == []
+    assert await due_user_ids(_utc(9, 0, 42)) == [1]
+    assert await due_user_ids(_utc(9, 30)) == []
+    # Snooze expired during 09:30, after the 09:00 push minute
+    assert await due_user_ids(_utc(9, 31)) == [2]
+    assert await due_user_ids(_utc(10, 0)) == [3]
+
+
+@pytest.mark.asyncio
+async def test_daily_tick_enqueues_once_per_day(db_path):
+    await ensure_user_config(1)
+    await set_timezone(1, "UTC")
+    bot = FakeBot()
+    assert await daily_tick(_utc(9, 0)) == 1
+    # Rerun of the same minute (e.g. after a restart) queues nothing new
+    assert await daily_tick(_utc(9, 0, 30)) == 0
+    await drain_outbox(bot, now=_utc(9, 0, 40))  # type: ignore[arg-type]
+    assert bot.sent == [1]
+    assert await due_user_ids(_utc(9, 0, 50)) == []
+
+
+@pytest.mark.asyncio
+async def test_compute_counts_batch_matches_caps_and_progress(db_path):
+    async with get_db() as db:
+        await db.executemany(
+            "INSERT INTO cards(id, phrasal, meaning_en, examples_json, tags, sense_uid) VALUES(?,?,?,?,?,?)",
+            [(i, f"verb {i}", "m", "[]", "daily", f"s{i}") for i in range(1, 21)],
+        )
+        await db.commit()
+    for uid in (1, 2):
+        await ensure_user_config(uid)
+    async with get_db() as db:
+        await db.execute("UPDATE user_config SET review_limit_per_day=2 WHERE user_id=2")
+        await db.executemany(
+            "INSERT INTO progress(user_id, card_id, state, box, due_at) VALUES(?,?,?,1,?)",
+            [(1, 1, "review", "2024-01-01"), (1, 2, "learning", "2024-01-01")]
+            + [(2, i, "review", "2023-12-31") for i in range(1, 16)],
+        )
+        await db.commit()
+
+    counts = await compute_counts_batch([1, 2], date(2024, 1, 1))
+    assert counts == {1: (1, 8), 2: (2, 5)}
+    assert await compute_counts(2) == (2, 5)
+
+
+@pytest.mark.asyncio
+async def test_run_due_buckets_catches_up_missed_minutes(db_path):
+    reset_scheduler_metrics()
+    await ensure_user_config(1)
+    await set_timezone(1, "UTC")
+    await set_push_time(1, "09:01")
+
+    assert await run_due_buckets(_utc(8, 59, 30), clock=lambda: _utc(8, 59, 31)) == 1
+    # A long stall: 09:00..09:03 are all processed, including the 09:01 push
+    assert await run_due_buckets(_utc(9, 3, 5), clock=lambda: _utc(9, 3, 5)) == 4
+    assert await outbox_counts() == {"pending": 1}
+    # Nothing left to do within the same minute
+    assert await run_due_buckets(_utc(9, 3, 40)) == 0
+
+    m = scheduler_metrics()
+    assert (m.buckets_processed, m.buckets_caught_up, m.buckets_dropped) == (5, 3, 0)
+    assert m.max_lag_seconds == 185  # 09:00 bucket handled at 09:03:05
+
+
+@pytest.mark.asyncio
+async def test_run_due_buckets_bounds_catch_up_after_long_downtime(db_path, monkeypatch):
+    reset_scheduler_metrics()
+    monkeypatch.setattr("srsbot.scheduler.SCHEDULER_MAX_CATCHUP_MINUTES", 10)
+    await run_due_buckets(_utc(8, 0))
+    assert await run_due_buckets(_utc(9, 0)) == 10
+    assert scheduler_metrics().buckets_dropped == 50
@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pytest
+
+from srsbot.db import get_read_db
+from srsbot.session import SessionData, SessionStore
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _snapshot_rows() -> dict[int, str]:
+    async with get_read_db() as db:
+        cur = await db.execute("SELECT user_id, session_date FROM session_snapshots")
+        return {int(r[0]): str(r[1]) for r in await cur.fetchall()}
+
+
+def test_session_data_queue_and_shown_ids():
+    s = SessionData(date(2024, 1, 1))
+    s.queue = [5, 3, 9]
+    s.queue.insert(1, 7)
+    assert s.queue.pop(0) == 5
+    assert list(s.queue) == [7, 3, 9]
+    for cid in (9, 2, 9, 4):
+        s.mark_shown(cid)
+    assert s.was_shown(4) and s.was_shown(9) and not s.was_shown(3)
+
+    restored = SessionData.from_snapshot(s.snapshot())
+    assert restored.day == date(2024, 1, 1)
+    assert list(restored.queue) == [7, 3, 9]
+    assert restored.was_shown(2) and not restored.was_shown(5)
+
+
+@pytest.mark.asyncio
+async def test_evicted_sessions_come_back_from_snapshot(db_path):
+    clock = FakeClock()
+    store = SessionStore(max_users=2, idle_ttl=60, flush_delay=3600, clock=clock, today=lambda: date(2024, 1, 1))
+    for uid in (1, 2, 3):
+        s = await store.get(uid)
+        s.queue = [uid * 10, uid * 10 + 1]
+        s.good = uid
+    assert len(store) == 2 and store.evicted == 1  # user 1 pushed out
+
+    s1 = await store.get(1)  # restored from the unwritten snapshot
+    assert list(s1.queue) == [10, 11] and s1.good == 1
+
+    clock.now += 61
+    await store.get(3)
+    assert len(store) == 1  # the others went idle
+    assert await store.flush() == 3
+    assert await _snapshot_rows() == {1: "2024-01-01", 2: "2024-01-01", 3: "2024-01-01"}
+
+    s2 = await store.get(2)
+    assert list(s2.queue) == [20, 21] and s2.good == 2
+    assert store.restored == 2
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_restart_restores_only_same_day_sessions(db_path):
+    day = date(2024, 1, 1)
+    store = SessionStore(flush_delay=3600, today=lambda: day)
+    s = await store.get(1)
+    s.queue = [4, 5, 6]
+    s.mark_shown(3)
+    await store.close()
+
+    again = SessionStore(flush_delay=3600, today=lambda: day)
+    s = await again.get(1)
+    assert list(s.queue) == [4, 5, 6] and s.was_shown(3)
+
+    tomorrow = SessionStore(flush_delay=3600, today=lambda: date(2024, 1, 2))
+    assert list((await tomorrow.get(1)).queue) == []
+
+    await again.clear(1)
+    await again.flush()
+    assert await _snapshot_rows() == {}
+    for st in (again, tomorrow):
+        st.reset()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_keeps_the_session_day_across_midnight(db_path):
+    day = [date(2024, 1, 1)]
+    store = SessionStore(flush_delay=3600, today=lambda: day[0])
+    s = await store.get(1)
+    s.queue = [4, 5]
+    day[0] = date(2024, 1, 2)
+    await store.flush()
+    # Yesterday's round is not restored as today's
+    assert await _snapshot_rows() == {1: "2024-01-01"}
+    again = SessionStore(flush_delay=3600, today=lambda: day[0])
+    fresh = await again.get(1)
+    assert list(fresh.queue) == [] and fresh.day == date(2024, 1, 2)
+    for st in (store, again):
+        st.reset()
+
+
+@pytest.mark.asyncio
+async def test_change_after_a_flush_survives_eviction(db_path):
+    clock = FakeClock()
+    store = SessionStore(idle_ttl=60, flush_delay=3600, clock=clock, today=lambda: date(2024, 1, 1))
+    s = await store.get(1)
+    s.queue = [10, 11, 12]
+    # A flush lands while the handler awaits, then the handler pops the queue
+    await store.flush()
+    s.queue.pop(0)
+    clock.now += 61
+    await store.get(2)  # user 1 is evicted as idle
+    assert len(store) == 1
+    await store.flush()
+    again = SessionStore(flush_delay=3600, today=lambda: date(2024, 1, 1))
+    assert list((await again.get(1)).queue) == [11, 12]
+    for st in (store, again):
+        st.reset()
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+
+from srsbot.ui import render_stats, reset_render_stats, show_screen
+from srsbot.ui_state import flush_ui_state, reset_ui_state_cache
+
+
+class FakeBot:
+    """Keeps each sent message's content; edits to identical content fail like Telegram."""
+
+    def __init__(self) -> None:
+        self.messages: dict[int, tuple] = {}
+        self.calls: list[str] = []
+
+    async def send_message(self, chat_id: int, text: str, reply_markup=None):
+        self.calls.append("send")
+        message_id = len(self.messages) + 1
+        self.messages[message_id] = (text, reply_markup)
+        return SimpleNamespace(message_id=message_id)
+
+    async def edit_message_text(self, chat_id: int, message_id: int, text: str, reply_markup=None):
+        self.calls.append("edit")
+        if self.messages.get(message_id) == (text, reply_markup):
+            method = EditMessageText(chat_id=chat_id, message_id=message_id, text=text)
+            raise TelegramBadRequest(method, "Bad Request: message is not modified")
+        self.messages[message_id] = (text, reply_markup)
+
+    async def delete_message(self, chat_id: int, message_id: int) -> None:
+        self.calls.append("delete")
+        self.messages.pop(message_id, None)
+
+
+def _kb(label: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text=label, callback_data="x")]])
+
+
+@pytest.mark.asyncio
+async def test_identical_screen_skips_api_call(db_path):
+    reset_render_stats()
+    bot = FakeBot()
+    await show_screen(bot, 1, "Menu", _kb("a"), "menu")  # type: ignore[arg-type]
+    await show_screen(bot, 1, "Menu", _kb("a"), "menu")  # type: ignore[arg-type]
+    await show_screen(bot, 1, "Menu", _kb("b"), "menu")  # type: ignore[arg-type]
+    assert bot.calls == ["send", "edit"]
+    stats = render_stats()
+    assert (stats.sends, stats.edits, stats.skipped, stats.api_calls_avoided) == (1, 1, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_not_modified_is_success_without_resend(db_path):
+    reset_render_stats()
+    bot = FakeBot()
+    await show_screen(bot, 1, "Menu", None, "menu")  # type: ignore[arg-type]
+    # Fingerprints are in-memory only: after a restart the first edit hits Telegram
+    await flush_ui_state()
+    reset_ui_state_cache()
+    await show_screen(bot, 1, "Menu", None, "menu")  # type: ignore[arg-type]
+    assert bot.calls == ["send", "edit"]
+    assert render_stats().not_modified == 1
+    await show_screen(bot, 1, "Menu", None, "menu")  # type: ignore[arg-type]
+    assert bot.calls == ["send", "edit"]
+    assert render_stats().api_calls_avoided == 3
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from srsbot.db import get_read_db
+from srsbot.ui_state import (
+    UiStateCache,
+    get_ui_state,
+    reset_ui_state_cache,
+    set_awaiting_input,
+    set_ui_state,
+    ui_state_cache,
+)
+
+
+async def _db_row(user_id: int) -> tuple | None:
+    async with get_read_db() as db:
+        cur = await db.execute(
+            "SELECT last_ui_message_id, current_screen, awaiting_input_field FROM user_ui_state WHERE user_id=?",
+            (user_id,),
+        )
+        row = await cur.fetchone()
+    return tuple(row) if row else None
+
+
+@pytest.mark.asyncio
+async def test_renders_read_once_and_coalesce_writes(db_path):
+    cache = ui_state_cache()
+    assert await get_ui_state(1) is None
+    for i in range(20):
+        await set_ui_state(1, last_ui_message_id=100 + i, current_screen="menu")
+        state = await get_ui_state(1)
+        assert state is not None and state["last_ui_message_id"] == 100 + i
+    await set_awaiting_input(1, "push_time")
+    assert cache.db_reads == 1
+    assert await _db_row(1) is None  # not flushed yet
+
+    await asyncio.sleep(cache.flush_delay + 0.1)
+    assert cache.db_flushes == 1
+    assert await _db_row(1) == (119, "menu", "push_time")
+
+    # A restarted process reads the flushed state back
+    reset_ui_state_cache()
+    state = await get_ui_state(1)
+    assert state is not None and state.current_screen == "menu"
+
+
+@pytest.mark.asyncio
+async def test_pending_writes_survive_eviction(db_path):
+    cache = UiStateCache(max_users=2, flush_delay=60)
+    for uid in range(1, 6):
+        await cache.update(uid, current_screen=f"s{uid}")
+    state = await cache.get(1)
+    assert state is not None and state.current_screen == "s1"
+    assert await cache.flush() == 5
+    assert await _db_row(5) == (None, "s5", None)
+    await cache.close()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import pytest
+
+import srsbot.user_config as ucmod
+from srsbot.db import ensure_user_config, get_db
+from srsbot.user_config import get_user_config, invalidate_user_config
+
+
+@pytest.mark.asyncio
+async def test_config_is_loaded_once_until_invalidated(db_path, monkeypatch):
+    await ensure_user_config(7)
+    loads = 0
+    real_load = ucmod._load
+
+    async def counting_load(user_id: int):
+        nonlocal loads
+        loads += 1
+        return await real_load(user_id)
+
+    monkeypatch.setattr(ucmod, "_load", counting_load)
+
+    cfg = await get_user_config(7)
+    assert cfg.daily_new_target == 8
+    for _ in range(5):
+        assert await get_user_config(7) is cfg
+    assert loads == 1
+
+    async with get_db() as db:
+        await db.execute(
+            "UPDATE user_config SET daily_new_target=12, pack_tags=' work, ,daily' WHERE user_id=7"
+        )
+        await db.commit()
+    assert (await get_user_config(7)).daily_new_target == 8  # still cached
+
+    invalidate_user_config(7)
+    cfg = await get_user_config(7)
+    assert cfg.daily_new_target == 12
+    assert cfg.pack_tag_list == ["work", "daily"]
+    assert loads == 2
+
+
+@pytest.mark.asyncio
+async def test_missing_row_returns_defaults_uncached(db_path):
+    cfg = await get_user_config(99)
+    assert cfg.quiz_question_limit == 10 and cfg.pack_tag_list == ["daily"]
+    await ensure_user_config(99)
+    async with get_db() as db:
+        await db.execute("UPDATE user_config SET quiz_question_limit=5 WHERE user_id=99")
+        await db.commit()
+    assert (await get_user_config(99)).quiz_question_limit == 5
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_ttl(db_path, monkeypatch):
+    await ensure_user_config(3)
+    await get_user_config(3)
+    async with get_db() as db:
+        await db.execute("UPDATE user_config SET intra_spacing_k=5 WHERE user_id=3")
+        await db.commit()
+    monkeypatch.setattr(ucmod, "USER_CONFIG_TTL_SECONDS", 0)
+    assert (await get_user_config(3)).intra_spacing_k == 5